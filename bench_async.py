@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Przepustowość bramy asyncio (gate.py --algorithm async) w funkcji liczby
+korutyn-badaczy na ranku: uruchamia gate.py pod mpiexec dla kolejnych
+N i R i z podsumowania ranku 0 wyciąga przejścia na sekundę, komunikaty
+MPI na przejście i średni czas oczekiwania.
+
+    python3 bench_async.py --np 2 4 --researchers 1 10 100 \\
+        --iterations 2 -- --Y 50
+
+Grupowanie żądań badaczy jednego ranku (mniej komunikatów na przejście):
+
+    python3 bench_async.py --np 4 --researchers 30 -- --Y 4 --batch-us 100000
+
+Przepustowość ogranicza sama brama: pojemność Y, czas tunelu i zmiany
+kierunku (badacze losują A/B po równo, więc ciągi jednego kierunku są
+krótkie) – przy R badaczach na ranku jeden przebieg trwa mniej więcej
+N·R·iteracje / (przejść/s).  Koszt transportu i pętli postępu pokazuje
+kolumna CPU ms (czas procesora na przejście).
+"""
+
+import argparse, re, shlex, subprocess, sys
+
+SUMMARY = re.compile(r"przejść: (\d+), komunikaty/przejście: protokół ([\d.]+), "
+                     r"MPI ([\d.]+),.*śr\. oczekiwanie: ([\d.]+) ms")
+RATE = re.compile(r"przepustowość: ([\d.]+) przejść/s")
+CPU = re.compile(r"CPU: ([\d.]+) ms/przejście")
+
+
+def run_gate(mpiexec, n, r, extra):
+    cmd = (shlex.split(mpiexec) + ["-n", str(n), sys.executable, "gate.py",
+           "--silent", "--algorithm", "async", "--researchers", str(r)]
+           + extra)
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    m, rate, cpu = SUMMARY.search(out), RATE.search(out), CPU.search(out)
+    if m is None or rate is None:
+        raise RuntimeError(f"brak podsumowania w wyjściu: {' '.join(cmd)}")
+    passages, _, msgs, wait = m.groups()
+    return (int(passages), float(rate.group(1)), float(msgs), float(wait),
+            float(cpu.group(1)))
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--np", type=int, nargs="+", default=[2, 4])
+    p.add_argument("--researchers", type=int, nargs="+",
+                   default=[1, 10, 100])
+    p.add_argument("--iterations", type=int, default=2)
+    p.add_argument("--mpiexec", default="mpiexec --oversubscribe")
+    p.add_argument("gate_args", nargs=argparse.REMAINDER,
+                   help="dodatkowe argumenty dla gate.py (po --)")
+    args = p.parse_args()
+    extra = ["--iterations", str(args.iterations)]
+    extra += [a for a in args.gate_args if a != "--"]
+
+    print(f"{'N':>4} {'R':>6} {'przejść':>8} {'przejść/s':>10} "
+          f"{'MPI/przejście':>14} {'oczekiwanie ms':>15} {'CPU ms':>8}")
+    for n in args.np:
+        for r in args.researchers:
+            passages, rate, msgs, wait, cpu = run_gate(args.mpiexec, n, r,
+                                                       extra)
+            print(f"{n:>4} {r:>6} {passages:>8} {rate:>10.1f} "
+                  f"{msgs:>14.2f} {wait:>15.1f} {cpu:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
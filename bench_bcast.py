@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Rozgłaszanie REQUEST / RELEASE (Proc._bcast, ścieżka binary): koszt
+u nadawcy i czas rundy, gdy wszystkie ranki rozgłaszają naraz.
+
+W każdej rundzie każdy rank rozgłasza jeden rekord i czeka, aż dostanie
+rozgłoszenia wszystkich pozostałych.  Trzy tryby:
+
+• send  – jak dawniej: blokujący Send do każdego peera po kolei,
+• isend – --bcast flat: Isend do każdego peera, jeden Waitall,
+• tree  – --bcast tree: Isend tylko do dzieci w drzewie dwumianowym
+          nadawcy, odbiorcy przekazują dalej (jak Proc._relay).
+
+    mpiexec -n 16 python3 bench_bcast.py --rounds 2000
+
+Wynik: średni czas wywołania rozgłoszenia u nadawcy [µs], wysyłek na
+rozgłoszenie u nadawcy, czas rundy [µs] i rekordów/s na rank.  Przy
+rekordach większych niż limit eager (--pad) tryb send może się
+zakleszczyć – dwa ranki czekają w Send na siebie nawzajem; isend i tree
+nie czekają na odbiorcę, zanim same zaczną odbierać.
+"""
+
+from mpi4py import MPI
+import argparse, time
+
+import gate_wire as wire
+
+TAG = wire.tag_of(0)
+
+
+def kids(me, root, n):
+    # jak Proc._kids: dzieci r = (me - root) mod n to r + 2^k dla 2^k > r
+    r, k, out = (me - root) % n, 1, []
+    while k < n:
+        if r < k and r + k < n:
+            out.append((root + r + k) % n)
+        k <<= 1
+    return out
+
+
+def run(c, mode, rounds, pad):
+    me, n = c.Get_rank(), c.Get_size()
+    words = wire.REC + pad
+    peers = [p for p in range(n) if p != me]
+    tree = {root: kids(me, root, n) for root in range(n)}
+    sbuf, rbuf = wire.new_buf(1 + pad // wire.REC), wire.new_buf(1 + pad // wire.REC)
+    fbufs = [wire.new_buf(1 + pad // wire.REC) for _ in range(n)]
+    st = MPI.Status()
+    t_send, sends = 0.0, 0
+
+    c.Barrier()
+    t0 = time.perf_counter()
+    for rnd in range(rounds):
+        wire.pack(sbuf, 0, rnd, "A", me)
+        t = time.perf_counter()
+        if mode == "send":
+            for p in peers:
+                c.Send([sbuf, words, MPI.INT], p, TAG)
+            sends += len(peers)
+            wave = []
+        else:
+            # na zakończenie Isend czekamy dopiero po odbiorze rundy
+            dsts = peers if mode == "isend" else tree[me]
+            wave = [c.Isend([sbuf, words, MPI.INT], p, TAG) for p in dsts]
+            sends += len(dsts)
+        t_send += time.perf_counter() - t
+
+        got = 0
+        while got < n - 1:
+            msg = c.Mprobe(MPI.ANY_SOURCE, TAG, st)
+            msg.Recv([rbuf, MPI.INT])
+            got += 1
+            if mode == "tree":
+                origin = rbuf[wire.F_ARG]
+                fb = fbufs[origin]
+                fb[:] = rbuf
+                wave += [c.Isend([fb, words, MPI.INT], p, TAG)
+                         for p in tree[origin]]
+        MPI.Request.Waitall(wave)
+    c.Barrier()
+    total = time.perf_counter() - t0
+    return t_send / rounds, sends / rounds, total / rounds
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rounds", type=int, default=2000)
+    p.add_argument("--pad", type=int, default=0,
+                   help="dodatkowe słowa int32 w rekordzie (rozmiar komunikatu)")
+    p.add_argument("--modes", nargs="+", default=["send", "isend", "tree"],
+                   choices=["send", "isend", "tree"])
+    args = p.parse_args()
+    c = MPI.COMM_WORLD
+    n = c.Get_size()
+
+    res = {}
+    for mode in args.modes:
+        mine = run(c, mode, args.rounds, args.pad)
+        rows = c.gather(mine, root=0)
+        if c.Get_rank() == 0:
+            res[mode] = [max(r[i] for r in rows) for i in range(3)]
+
+    if c.Get_rank() == 0:
+        print(f"N = {n}, rund: {args.rounds}, "
+              f"rekord: {(wire.REC + args.pad) * 4} B")
+        print(f"{'tryb':>6} {'nadawca µs':>11} {'wysyłek':>8} "
+              f"{'runda µs':>10} {'rekordów/s':>11}")
+        for mode, (ts, sends, tr) in res.items():
+            print(f"{mode:>6} {ts * 1e6:>11.1f} {sends:>8.1f} "
+                  f"{tr * 1e6:>10.1f} {(n - 1) / tr:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Odbiór porcjami vs komunikat po komunikacie (Proc._poll, ścieżka binary).
+
+Ranki 1..N-1 w każdej rundzie wysyłają do ranku 0 po --burst par
+REQUEST + RELEASE naraz (jak N-1 procesów, które jednocześnie stają
+w kolejce i z niej schodzą), a potem czekają na ACK każdego REQUEST.
+Rank 0 obsługuje je jak Proc: zegar Lamporta, GateQueue.push /
+remove_pid i ACK do nadawcy.  Dwa tryby odbioru na ranku 0:
+
+• seq   – jak dotąd: Iprobe + Recv, obsługa i blokujący Send ACK
+          dla każdego komunikatu osobno,
+• batch – jak Proc._poll + _apply: Improbe + Mrecv zbiera wszystko,
+          co czeka, obsługa całej porcji, ACK do jednego nadawcy sklejone
+          (do MAX_BATCH rekordów) i wysłane jedną falą Isend + Waitall.
+
+    mpiexec -n 8 python3 bench_drain.py --rounds 2000 --burst 4
+
+Wynik: obsłużone komunikaty/s na ranku 0 w obu trybach (najlepszy
+z --repeat pomiarów – na zatłoczonej maszynie rozrzut jest duży),
+stosunek obu i liczba komunikatów ACK na rundę.
+"""
+
+from mpi4py import MPI
+import argparse, time
+
+from gate_queue import GateQueue
+import gate_wire as wire
+
+REQ, ACK, REL = 0, 1, 2
+
+
+def sender(c, args):
+    buf, st = wire.new_buf(wire.MAX_BATCH), MPI.Status()
+    for _ in range(args.rounds):
+        for k in range(args.burst):
+            wire.pack(buf, REQ, k, "A" if k & 1 else "B")
+            c.Send([buf, wire.REC, MPI.INT], 0, wire.tag_of(REQ))
+            wire.pack(buf, REL, k, None)
+            c.Send([buf, wire.REC, MPI.INT], 0, wire.tag_of(REL))
+        acked = 0
+        while acked < args.burst:
+            # ACK pojedynczo (seq) albo sklejone w TAG_BATCH (batch)
+            c.Recv([buf, MPI.INT], 0, MPI.ANY_TAG, st)
+            acked += wire.nrec(st)
+
+
+class Receiver:
+    def __init__(self, c, total):
+        self.c, self.left = c, total
+        self.clock, self.Q = 0, GateQueue()
+        self.buf, self.st = wire.new_buf(), MPI.Status()
+        self.msgs = 0                  # wysłane komunikaty ACK
+
+    def handle(self, src, typ, ts, dir_):
+        # to samo, co _dispatch + _h_req / _h_rel z Proc (bez zmian bramy)
+        self.clock = max(self.clock, ts) + 1
+        self.left -= 1
+        if typ == REQ:
+            self.Q.push(ts, src, dir_)
+            self.clock += 1
+            return self.clock
+        self.Q.remove_pid(src)
+        return None
+
+    def seq(self):
+        c, buf, st, sbuf = self.c, self.buf, self.st, wire.new_buf()
+        while self.left:
+            if not c.Iprobe(source=MPI.ANY_SOURCE, tag=MPI.ANY_TAG, status=st):
+                continue
+            src = st.Get_source()
+            c.Recv([buf, MPI.INT], src, st.Get_tag())
+            typ, ts, dir_, _ = wire.unpack(buf)
+            ack = self.handle(src, typ, ts, dir_)
+            if ack is not None:
+                wire.pack(sbuf, ACK, ack, None)
+                c.Send([sbuf, wire.REC, MPI.INT], src, wire.tag_of(ACK))
+                self.msgs += 1
+
+    def batch(self):
+        c, buf, st = self.c, self.buf, self.st
+        wbufs = []
+        while self.left:
+            got = []
+            while True:
+                msg = c.Improbe(MPI.ANY_SOURCE, MPI.ANY_TAG, st)
+                if msg is None:
+                    break
+                msg.Recv([buf, MPI.INT])
+                got.append((st.Get_source(), wire.unpack(buf)))
+            if not got:
+                continue
+            out = {}                   # jak Proc._out: dst -> [ts ACK, ...]
+            for src, (typ, ts, dir_, _) in got:
+                ack = self.handle(src, typ, ts, dir_)
+                if ack is not None:
+                    out.setdefault(src, []).append(ack)
+            wave = []
+            for dst, tss in out.items():
+                for i in range(0, len(tss), wire.MAX_BATCH):
+                    part = tss[i:i + wire.MAX_BATCH]
+                    if len(wave) == len(wbufs):
+                        wbufs.append(wire.new_buf(wire.MAX_BATCH))
+                    b = wbufs[len(wave)]
+                    for k, ts in enumerate(part):
+                        wire.pack(b, ACK, ts, None, off=k * wire.REC)
+                    tag = wire.tag_of(ACK) if len(part) == 1 else wire.TAG_BATCH
+                    wave.append(c.Isend([b, len(part) * wire.REC, MPI.INT],
+                                        dst, tag))
+            self.msgs += len(wave)
+            MPI.Request.Waitall(wave)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rounds", type=int, default=2000)
+    p.add_argument("--burst", type=int, default=4,
+                   help="par REQUEST + RELEASE od każdego nadawcy na rundę")
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+    c = MPI.COMM_WORLD
+    rank, size = c.Get_rank(), c.Get_size()
+    if size < 2:
+        raise SystemExit("potrzeba co najmniej 2 procesów (mpiexec -n N)")
+    total = (size - 1) * args.rounds * args.burst * 2
+
+    res, msgs = {"seq": 0.0, "batch": 0.0}, {}
+    for _ in range(args.repeat):
+        for mode in res:           # na przemian, żeby szum trafiał w oba
+            c.Barrier()
+            t0 = time.perf_counter()
+            if rank == 0:
+                r = Receiver(c, total)
+                getattr(r, mode)()
+                msgs[mode] = r.msgs
+            else:
+                sender(c, args)
+            c.Barrier()
+            res[mode] = max(res[mode], total / (time.perf_counter() - t0))
+
+    if rank == 0:
+        print(f"N = {size}, runda: {size - 1} × {args.burst} × "
+              f"(REQUEST + RELEASE), rund: {args.rounds}")
+        print(f"{'tryb':>6} {'komunikatów/s':>14} {'ACK MPI/rundę':>14}")
+        for mode, rate in res.items():
+            print(f"{mode:>6} {rate:>14.0f} {msgs[mode] / args.rounds:>14.2f}")
+        print(f"batch/seq: {res['batch'] / res['seq']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
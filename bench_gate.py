@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Porównanie algorytmów bramy: uruchamia gate.py pod mpiexec dla kolejnych
+N i algorytmów, a z podsumowania ranku 0 wyciąga liczbę komunikatów na
+przejście (w tym między węzłami) i średni czas oczekiwania na wejście.
+
+    python3 bench_gate.py --np 4 8 --algorithms lamport ra --iterations 5
+
+Skalowanie (komunikaty i opóźnienie na przejście od N = 4 do N = 512):
+
+    python3 bench_gate.py --np 4 8 16 32 64 128 256 512 \
+        --algorithms lamport ra token quorum --iterations 3
+
+Ruch między węzłami przy wielu rankach na węźle (tu: udawane węzły po 8):
+
+    python3 bench_gate.py --np 32 64 --algorithms lamport token hier \
+        --iterations 3 -- --node-size 8
+
+Wiele bram na jednym komunikatorze (koszt CPU i komunikatów od K):
+
+    python3 bench_gate.py --np 8 --algorithms multi --gates 1 4 16 64 \
+        --iterations 3
+"""
+
+import argparse, re, shlex, subprocess, sys
+
+SUMMARY = re.compile(r"przejść: (\d+), komunikaty/przejście: protokół ([\d.]+), "
+                     r"MPI ([\d.]+), między węzłami ([\d.]+)"
+                     r".*śr\. oczekiwanie: ([\d.]+) ms")
+CPU = re.compile(r"CPU: ([\d.]+) ms/przejście")
+
+
+def run_gate(mpiexec, n, algorithm, extra):
+    cmd = (shlex.split(mpiexec) + ["-n", str(n), sys.executable, "gate.py",
+           "--silent", "--algorithm", algorithm] + extra)
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    m = SUMMARY.search(out)
+    if m is None:
+        raise RuntimeError(f"brak podsumowania w wyjściu: {' '.join(cmd)}")
+    passages, recs, msgs, remote, wait = m.groups()
+    cpu = float(CPU.search(out).group(1))
+    return (int(passages), float(recs), float(msgs), float(remote),
+            float(wait), cpu)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--np", type=int, nargs="+", default=[4, 8])
+    p.add_argument("--algorithms", nargs="+", default=["lamport", "ra"])
+    p.add_argument("--iterations", type=int, default=5)
+    p.add_argument("--Y", type=int, default=3)
+    p.add_argument("--gates", type=int, nargs="+", default=[1],
+                   help="liczby bram K (tylko --algorithms multi)")
+    p.add_argument("--mpiexec", default="mpiexec --oversubscribe")
+    p.add_argument("gate_args", nargs=argparse.REMAINDER,
+                   help="dodatkowe argumenty dla gate.py (po --)")
+    args = p.parse_args()
+    extra = ["--iterations", str(args.iterations), "--Y", str(args.Y)]
+    extra += [a for a in args.gate_args if a != "--"]
+
+    print(f"{'N':>4} {'algorytm':>9} {'K':>4} {'przejść':>8} "
+          f"{'kom./przejście':>15} {'MPI/przejście':>14} "
+          f"{'między węzłami':>15} {'oczekiwanie ms':>15} {'CPU ms':>8}")
+    for n in args.np:
+        for alg in args.algorithms:
+            for k in (args.gates if alg == "multi" else [1]):
+                kx = ["--gates", str(k)] if alg == "multi" else []
+                passages, recs, msgs, remote, wait, cpu = run_gate(
+                    args.mpiexec, n, alg, extra + kx)
+                print(f"{n:>4} {alg:>9} {k:>4} {passages:>8} {recs:>15.2f} "
+                      f"{msgs:>14.2f} {remote:>15.2f} {wait:>15.1f} "
+                      f"{cpu:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Sonda pomiarowa dla bench_sweep.py – uruchamiana pod mpiexec zamiast
+samego wariantu bramy:
+
+    mpiexec -n 8 python3 bench_probe.py --variant gate:token \\
+        --think exp:0.1 --tunnel uniform:0.05,0.1 --mix 0.7 -- --Y 2
+
+Importuje wariant (gate.py z --algorithm albo jeden ze starych skryptów
+gate_one / gate_nont / gate_correction), dziedziczy po jego Proc i:
+• zapisuje czas żądania, wejścia i wyjścia z tunelu (wejście: przejście
+  w HELD, w starych skryptach powrót z enter()),
+• liczy wysłane komunikaty i bajty (komunikator jest podklasą Intracomm
+  z licznikami w send / Send / isend / Isend); operacje RMA wariantu
+  rma dolicza z jego liczników,
+• losuje obciążenie z --think / --tunnel / --mix: wariantom z gate_core
+  podmienia metody _think_time / _tunnel_time / _pick_dir, przez które
+  losują pętle run() wszystkich wariantów (też multi i async), a starym
+  skryptom – moduł random (sen to tam uniform(0.2, 0.4), tunel
+  uniform(0.15, 0.3), kierunek choice([A, B])).
+Na końcu rank 0 wypisuje jedną linię "BENCH {json}" z metrykami.
+"""
+
+from mpi4py import MPI
+import argparse, importlib, json, pickle, random, sys, time
+
+from gate_types import DIR
+
+PREFIX = "BENCH "
+THINK_DEFAULT, TUNNEL_DEFAULT = (0.2, 0.4), (0.15, 0.3)
+
+
+# ---------- obciążenie ----------
+def parse_dist(spec):
+    """uniform:a,b | exp:średnia | const:x  ->  funkcja rng -> czas [s]."""
+    kind, _, val = spec.partition(":")
+    nums = [float(v) for v in val.split(",")] if val else []
+    if kind == "uniform" and len(nums) == 2:
+        return lambda rng: rng.uniform(*nums)
+    if kind == "exp" and len(nums) == 1:
+        return lambda rng: rng.expovariate(1.0 / nums[0])
+    if kind == "const" and len(nums) == 1:
+        return lambda rng: nums[0]
+    raise ValueError(f"nieznany rozkład: {spec!r}")
+
+
+class Workload:
+    """Sen, tunel i kierunek wg CLI; w starych skryptach zastępuje moduł
+    random."""
+
+    def __init__(self, think, tunnel, mix):
+        self.rng = random.Random()
+        self.think, self.tunnel, self.mix = think, tunnel, mix
+
+    def seed(self, s):
+        self.rng.seed(s)
+
+    def uniform(self, lo, hi):
+        if (lo, hi) == THINK_DEFAULT:
+            return self.think(self.rng)
+        if (lo, hi) == TUNNEL_DEFAULT:
+            return self.tunnel(self.rng)
+        raise ValueError(f"nieznane losowanie uniform({lo}, {hi}) – "
+                         f"ani sen, ani tunel")
+
+    def choice(self, seq):
+        # [DIR.A, DIR.B]: A z prawdopodobieństwem mix
+        return seq[0] if self.rng.random() < self.mix else seq[1]
+
+
+# ---------- liczniki ruchu ----------
+def nbytes(spec):
+    if isinstance(spec, (list, tuple)):
+        if len(spec) == 3:
+            return spec[1] * spec[2].Get_size()
+        spec = spec[0]
+    return memoryview(spec).nbytes
+
+
+class CountingComm(MPI.Intracomm):
+    def _count(self, n):
+        self.msgs += 1
+        self.nbytes += n
+
+    def send(self, obj, dest, tag=0):
+        self._count(len(pickle.dumps(obj, MPI.pickle.PROTOCOL)))
+        return super().send(obj, dest, tag)
+
+    def Send(self, buf, dest, tag=0):
+        self._count(nbytes(buf))
+        return super().Send(buf, dest, tag)
+
+    # fale ACK i rozgłoszenia (_send_recs, _bcast) idą przez Isend
+    def isend(self, obj, dest, tag=0):
+        self._count(len(pickle.dumps(obj, MPI.pickle.PROTOCOL)))
+        return super().isend(obj, dest, tag)
+
+    def Isend(self, buf, dest, tag=0):
+        self._count(nbytes(buf))
+        return super().Isend(buf, dest, tag)
+
+
+# ---------- wariant ----------
+def load_variant(variant, gate_args):
+    """Zwraca (klasa Proc, moduł z pętlą run(), Y)."""
+    module, _, algorithm = variant.partition(":")
+    if module == "gate":
+        import gate
+        import gate_core as core
+        argv = gate_args + (["--algorithm", algorithm] if algorithm else [])
+        args = gate.p.parse_args(argv)
+        core.configure(args)
+        return gate.ALGORITHMS[args.algorithm], core, args.Y
+    sys.argv = [module + ".py"] + gate_args   # stare skrypty parsują przy imporcie
+    mod = importlib.import_module(module)
+    return mod.Proc, mod, mod.Y
+
+
+def probe_class(base, log, wl):
+    # wejście liczymy przy przejściu w HELD, nie przy powrocie z enter():
+    # gate:multi i gate:async wpuszczają badaczy z własnej pętli run()
+    # (_held_g / _held(r)), z pominięciem enter()
+    def entered(t_req, d):
+        log.append(("E", t_req, time.time(), d))
+
+    def left():
+        log.append(("L", time.time(), time.time(), None))
+
+    if hasattr(base, "_held_g"):                 # gate:multi
+        class Probe(base):
+            def _held_g(self, g):
+                super()._held_g(g)
+                entered(g.t_req, g.want.value)
+
+            def leave(self, gate):
+                super().leave(gate)
+                left()
+    elif hasattr(base, "researcher"):            # gate:async
+        class Probe(base):
+            def _held(self, r):
+                super()._held(r)
+                entered(r.t_req, r.want.value)
+
+            def _leave(self, r):
+                super()._leave(r)
+                left()
+    elif hasattr(base, "_held"):                 # pozostałe Proc z gate_core
+        class Probe(base):
+            def _held(self):
+                super()._held()
+                entered(self._t_req, self.wantDir.value)
+
+            def leave(self):
+                super().leave()
+                left()
+    else:                                        # gate_one / gate_nont / ...
+        class Probe(base):
+            def enter(self, d):
+                t0 = time.time()
+                super().enter(d)
+                if not getattr(self, "should_terminate", False):
+                    entered(t0, d.value)
+
+            def leave(self):
+                super().leave()
+                left()
+    if hasattr(base, "_pick_dir"):               # Proc z gate_core
+        class Probe(Probe):
+            def _think_time(self):
+                return wl.think(wl.rng)
+
+            def _tunnel_time(self):
+                return wl.tunnel(wl.rng)
+
+            def _pick_dir(self):
+                return wl.choice([DIR.A, DIR.B])
+    return Probe
+
+
+# ---------- metryki (rank 0) ----------
+def percentile(xs, q):
+    if not xs:
+        return 0.0
+    return xs[min(len(xs) - 1, int(q / 100 * len(xs)))]
+
+
+def summarize(logs, t0, msgs, nbytes_, y):
+    waits = sorted(t1 - t0_ for log in logs for k, t0_, t1, _ in log if k == "E")
+    entries = sorted((t1, d) for log in logs for k, _, t1, d in log if k == "E")
+    leaves = [t for log in logs for k, t, _, _ in log if k == "L"]
+    passages = len(leaves)
+    t_end = max(leaves, default=t0)
+    duration = max(t_end - t0, 1e-9)
+
+    switches = sum(1 for (_, a), (_, b) in zip(entries, entries[1:]) if a != b)
+
+    # zajętość tunelu: +1 przy wejściu, -1 przy wyjściu (wyjścia pierwsze
+    # przy remisie), średnia ważona czasem od startu do ostatniego wyjścia
+    ev = sorted([(t, 1) for t, _ in entries] + [(t, -1) for t in leaves],
+                key=lambda e: (e[0], e[1]))
+    inside = peak = 0
+    area, last = 0.0, t0
+    for t, step in ev:
+        area += inside * (min(t, t_end) - last)
+        last = min(t, t_end)
+        inside += step
+        peak = max(peak, inside)
+    occ = area / duration
+
+    n = max(passages, 1)
+    return {
+        "passages": passages,
+        "duration_s": round(duration, 4),
+        "passages_per_s": round(passages / duration, 3),
+        "wait_p50_ms": round(percentile(waits, 50) * 1e3, 3),
+        "wait_p95_ms": round(percentile(waits, 95) * 1e3, 3),
+        "wait_p99_ms": round(percentile(waits, 99) * 1e3, 3),
+        "wait_mean_ms": round(sum(waits) / max(len(waits), 1) * 1e3, 3),
+        "wait_max_ms": round(max(waits, default=0.0) * 1e3, 3),
+        "msgs_per_passage": round(msgs / n, 3),
+        "bytes_per_passage": round(nbytes_ / n, 1),
+        "dir_switches": switches,
+        "occupancy_mean": round(occ, 3),
+        "occupancy_max": peak,
+        "occupancy_ratio": round(occ / y, 3),
+    }
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--variant", default="gate:lamport",
+                   help="gate[:algorytm] albo gate_one / gate_nont / gate_correction")
+    p.add_argument("--think", default="uniform:0.2,0.4",
+                   help="rozkład snu między przejściami: uniform:a,b | exp:m | const:x")
+    p.add_argument("--tunnel", default="uniform:0.15,0.3",
+                   help="rozkład czasu w tunelu (jak --think)")
+    p.add_argument("--mix", type=float, default=0.5,
+                   help="udział kierunku A w żądaniach")
+    p.add_argument("gate_args", nargs=argparse.REMAINDER,
+                   help="argumenty wariantu (po --)")
+    args = p.parse_args()
+    gate_args = [a for a in args.gate_args if a != "--"]
+
+    cls, mod, y = load_variant(args.variant, gate_args)
+    wl = Workload(parse_dist(args.think), parse_dist(args.tunnel), args.mix)
+    wl.seed(MPI.COMM_WORLD.Get_rank() * 1234 + int(time.time()))
+    if not hasattr(cls, "_pick_dir"):
+        mod.random = wl                  # stary skrypt: run() sam woła seed
+
+    comm = CountingComm(MPI.COMM_WORLD)
+    comm.msgs, comm.nbytes = 0, 0
+    log = []
+    pr = probe_class(cls, log, wl)(comm)
+
+    finalize, MPI.Finalize = MPI.Finalize, lambda: None   # run() kończy MPI
+    comm.Barrier()
+    t0 = time.time()
+    try:
+        pr.run()
+    finally:
+        MPI.Finalize = finalize
+
+    rma_ops = getattr(pr, "rma_ops", 0)
+    tot = MPI.COMM_WORLD.gather((log, comm.msgs + rma_ops,
+                                 comm.nbytes + rma_ops * 4, t0), root=0)
+    if MPI.COMM_WORLD.Get_rank() == 0:
+        logs, msgs, nb, starts = zip(*tot)
+        row = {"variant": args.variant, "N": MPI.COMM_WORLD.Get_size(),
+               "Y": y, "think": args.think, "tunnel": args.tunnel,
+               "mix": args.mix, "args": " ".join(gate_args)}
+        row.update(summarize(logs, min(starts), sum(msgs), sum(nb), y))
+        print(PREFIX + json.dumps(row), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Mikro‑benchmark kolejki żądań bramy: stara lista‑kopiec vs GateQueue.
+
+Jedna „operacja” to to, co proces robi dla jednego przejścia peera:
+REQUEST (wstawienie), sprawdzenie myTurn i RELEASE (usunięcie wpisu).
+Kolejka jest wstępnie wypełniona N wpisami, więc mierzymy koszt przy
+N oczekujących procesach.
+
+    python3 bench_queue.py --sizes 16 256 4096
+"""
+
+import argparse, heapq, random, time
+
+from gate_queue import GateQueue
+
+DIRS = ("A", "B")
+
+
+# ---------- dotychczasowa implementacja (z gate.py sprzed zmiany) ----------
+class LegacyQueue:
+    def __init__(self):
+        self.Q = []
+
+    def push(self, ts, pid, dir_):
+        heapq.heappush(self.Q, (ts, pid, dir_))
+
+    def remove_pid(self, pid):
+        to_remove = [entry for entry in self.Q if entry[1] == pid]
+        for entry in to_remove:
+            self.Q.remove(entry)
+        if to_remove:
+            heapq.heapify(self.Q)
+
+    def my_turn(self, pid, gate_dir, cap):
+        if not self.Q:
+            return False
+        sortedQ = sorted(self.Q)
+        if sortedQ[0][2] != gate_dir:
+            return False
+        pos = 0
+        for ts_i, pid_i, dir_i in sortedQ:
+            if dir_i != gate_dir:
+                break
+            pos += 1
+            if pid_i == pid:
+                return pos <= cap
+        return False
+
+
+def _fill(q, n, rng):
+    for pid in range(n):
+        q.push(pid, pid, rng.choice(DIRS))
+    return n
+
+
+def bench(cls, n, ops, cap, seed):
+    rng = random.Random(seed)
+    q = cls()
+    ts = _fill(q, n, rng)
+    pids = [rng.randrange(n) for _ in range(ops)]
+    dirs = [rng.choice(DIRS) for _ in range(ops)]
+    t0 = time.perf_counter()
+    for i in range(ops):
+        pid = pids[i]
+        q.my_turn(pid, dirs[i], cap)
+        q.remove_pid(pid)
+        ts += 1
+        q.push(ts, pid, dirs[i])
+    return ops / (time.perf_counter() - t0)
+
+
+def check(n, ops, cap, seed):
+    # obie kolejki muszą dawać identyczne odpowiedzi myTurn
+    rng = random.Random(seed)
+    a, b = LegacyQueue(), GateQueue()
+    _fill(a, n, random.Random(seed))
+    ts = _fill(b, n, random.Random(seed))
+    for _ in range(ops):
+        pid, d, g = rng.randrange(n), rng.choice(DIRS), rng.choice(DIRS)
+        for who in (pid, rng.randrange(n)):
+            assert a.my_turn(who, g, cap) == b.my_turn(who, g, cap)
+        a.remove_pid(pid)
+        b.remove_pid(pid)
+        ts += 1
+        a.push(ts, pid, d)
+        b.push(ts, pid, d)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--sizes", type=int, nargs="+", default=[16, 256, 4096])
+    p.add_argument("--ops", type=int, default=20000,
+                   help="liczba operacji (REQUEST + myTurn + RELEASE) na rozmiar")
+    p.add_argument("--Y", type=int, default=3)
+    p.add_argument("--seed", type=int, default=1)
+    args = p.parse_args()
+
+    check(64, 2000, args.Y, args.seed)
+
+    print(f"{'N':>6} {'legacy ops/s':>14} {'GateQueue ops/s':>16} {'x':>7}")
+    for n in args.sizes:
+        # stara kolejka jest O(N log N) na operację – ograniczamy liczbę prób
+        legacy_ops = max(200, min(args.ops, 2_000_000 // n))
+        old = bench(LegacyQueue, n, legacy_ops, args.Y, args.seed)
+        new = bench(GateQueue, n, args.ops, args.Y, args.seed)
+        print(f"{n:>6} {old:>14.0f} {new:>16.0f} {new / old:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Transport bramy na jednej maszynie: pierścienie SPSC z gate_shm.py
+vs MPI Send / Iprobe + Recv (ścieżka binary z gate_core).
+
+Dwa pomiary na parze procesów, oba z aktywnym czekaniem (sched_yield):
+• opóźnienie – ping-pong jednego rekordu, wynik to połowa obiegu [µs],
+• przepustowość – strumień rekordów jak w bench_wire.py, odbiorca
+  potwierdza co --window rekordów [rekordów/s].
+
+    python3 bench_shm.py --messages 200000
+
+Część shm forkuje dwa procesy sama, część MPI uruchamia ten skrypt
+jeszcze raz pod mpiexec -n 2 (--mpi) i czyta jego wynik.
+"""
+
+import argparse, json, multiprocessing as mp, os, shlex, subprocess, sys, time
+from multiprocessing import shared_memory
+
+import mpi4py
+mpi4py.rc.initialize = False          # MPI startujemy tylko w trybie --mpi
+from mpi4py import MPI
+
+import gate_wire as wire
+from gate_shm import Ring, RING
+
+TYPES = (0, 1, 2)                     # REQUEST, ACK, RELEASE
+DIRS = ("A", "B")
+
+
+# ---------- pierścienie ----------
+def shm_side(rank, shm, args, out):
+    tx = Ring(shm.buf, rank * RING)
+    rx = Ring(shm.buf, (1 - rank) * RING)
+    pong = (1, 0, None, 0)
+
+    # czekając oddajemy procesor (jak Open MPI przy --oversubscribe),
+    # inaczej na jednym rdzeniu każdy obieg kosztuje cały kwant schedulera
+    def get():
+        while True:
+            recs = rx.take()
+            if recs:
+                return recs
+            os.sched_yield()
+
+    t0 = time.perf_counter()
+    for i in range(args.pings):
+        if rank == 0:
+            tx.put((0, i, "A", 0))
+            get()
+        else:
+            get()
+            tx.put(pong)
+    lat = (time.perf_counter() - t0) / args.pings / 2
+
+    t0 = time.perf_counter()
+    if rank == 0:
+        for i in range(args.messages):
+            while tx.full():
+                os.sched_yield()
+            typ = TYPES[i % 3]
+            tx.put((typ, i, None if typ == 1 else DIRS[i & 1], 0))
+            if (i + 1) % args.window == 0:
+                get()
+    else:
+        got = 0
+        while got < args.messages:
+            n = len(get())
+            if (got + n) // args.window > got // args.window:
+                tx.put(pong)
+            got += n
+    rate = args.messages / (time.perf_counter() - t0)
+    tx.release()
+    rx.release()
+    if rank == 0:
+        out.put((lat, rate))
+
+
+def run_shm(args):
+    ctx = mp.get_context("fork")
+    shm = shared_memory.SharedMemory(create=True, size=2 * RING)
+    out = ctx.Queue()
+    procs = [ctx.Process(target=shm_side, args=(r, shm, args, out))
+             for r in range(2)]
+    try:
+        for pr in procs:
+            pr.start()
+        res = out.get()
+        for pr in procs:
+            pr.join()
+    finally:
+        shm.close()
+        shm.unlink()
+    return res
+
+
+# ---------- MPI (jak Proc._send / Proc._poll, binary) ----------
+def mpi_side(args):
+    MPI.Init()
+    c = MPI.COMM_WORLD
+    rank, other = c.Get_rank(), 1 - c.Get_rank()
+    buf, st = wire.new_buf(), MPI.Status()
+
+    def send(typ, ts, d):
+        wire.pack(buf, typ, ts, d)
+        c.Send([buf, wire.REC, MPI.INT], other, wire.tag_of(typ))
+
+    def get():
+        while not c.Iprobe(source=other, tag=MPI.ANY_TAG, status=st):
+            pass
+        c.Recv([buf, MPI.INT], other, st.Get_tag())
+        return wire.unpack(buf)
+
+    c.Barrier()
+    t0 = time.perf_counter()
+    for i in range(args.pings):
+        if rank == 0:
+            send(0, i, "A")
+            get()
+        else:
+            get()
+            send(1, 0, None)
+    lat = (time.perf_counter() - t0) / args.pings / 2
+
+    c.Barrier()
+    t0 = time.perf_counter()
+    for i in range(args.messages):
+        if rank == 0:
+            typ = TYPES[i % 3]
+            send(typ, i, None if typ == 1 else DIRS[i & 1])
+            if (i + 1) % args.window == 0:
+                get()
+        else:
+            get()
+            if (i + 1) % args.window == 0:
+                send(1, 0, None)
+    rate = args.messages / (time.perf_counter() - t0)
+    if rank == 0:
+        print(json.dumps([lat, rate]), flush=True)
+    MPI.Finalize()
+
+
+def run_mpi(args):
+    cmd = (shlex.split(args.mpiexec) + ["-n", "2", sys.executable, __file__,
+           "--mpi", "--messages", str(args.messages), "--pings",
+           str(args.pings), "--window", str(args.window)])
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--messages", type=int, default=100000)
+    p.add_argument("--pings", type=int, default=20000)
+    p.add_argument("--window", type=int, default=64)
+    p.add_argument("--mpiexec", default="mpiexec --oversubscribe")
+    p.add_argument("--mpi", action="store_true",
+                   help="(wewnętrzne) strona MPI pod mpiexec -n 2")
+    args = p.parse_args()
+    if args.mpi:
+        mpi_side(args)
+        return
+
+    res = {"shm": run_shm(args), "mpi": run_mpi(args)}
+    print(f"{'transport':>9} {'opóźnienie µs':>14} {'rekordów/s':>12}")
+    for name, (lat, rate) in res.items():
+        print(f"{name:>9} {lat * 1e6:>14.2f} {rate:>12.0f}")
+    (ls, rs), (lm, rm) = res["shm"], res["mpi"]
+    print(f"shm/mpi: {lm / ls:.2f}x krótsze opóźnienie, "
+          f"{rs / rm:.2f}x rekordów/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Parametryczny benchmark bramy: przebiega iloczyn kartezjański N, Y,
+liczby iteracji, rozkładów snu i tunelu, udziału kierunku A oraz
+wariantów, każdy punkt uruchamia pod mpiexec przez bench_probe.py
+i zapisuje wiersz metryk jako JSON (lista) albo CSV.
+
+    python3 bench_sweep.py --np 4 8 --Y 1 3 --iterations 5 \\
+        --variants gate:lamport gate:token gate_one gate_correction \\
+        --think uniform:0.2,0.4 exp:0.05 --mix 0.5 0.9 \\
+        --format csv --out wyniki.csv
+
+Polityki kierunku (--policies, tylko gate:lamport) – przepustowość
+i zajętość vs sprawiedliwość (wait_p99_ms, wait_max_ms):
+
+    python3 bench_sweep.py --np 8 --Y 3 --think exp:0.05 \\
+        --policies fifo epoch:4 epoch:16 epoch:64
+
+Metryki (liczone przez bench_probe.py): passages_per_s, wait_p50/p95/p99/max_ms,
+msgs_per_passage, bytes_per_passage, dir_switches, occupancy_mean /
+occupancy_max / occupancy_ratio (= średnia zajętość / Y).  Punkt, który
+nie skończy się w --timeout sekund (np. gate_nont bez TERMINATE), dostaje
+status "timeout" zamiast metryk.
+"""
+
+import argparse, csv, itertools, json, shlex, subprocess, sys
+
+# jak bench_probe.PREFIX – nie importujemy sondy, bo import mpi4py
+# zainicjowałby MPI w tym procesie i zepsuł środowisko dla mpiexec
+PREFIX = "BENCH "
+
+FIELDS = ["variant", "policy", "N", "Y", "iterations", "think", "tunnel",
+          "mix", "status", "passages", "duration_s", "passages_per_s",
+          "wait_p50_ms", "wait_p95_ms", "wait_p99_ms", "wait_mean_ms",
+          "wait_max_ms",
+          "msgs_per_passage", "bytes_per_passage", "dir_switches",
+          "occupancy_mean", "occupancy_max", "occupancy_ratio"]
+
+
+def run_point(mpiexec, timeout, variant, policy, n, y, iters, think, tunnel,
+              mix, extra):
+    if policy != "fifo":
+        extra = extra + ["--dir-policy", policy]
+    cmd = (shlex.split(mpiexec) + ["-n", str(n), sys.executable, "bench_probe.py",
+           "--variant", variant, "--think", think, "--tunnel", tunnel,
+           "--mix", str(mix), "--", "--silent", "--Y", str(y),
+           "--iterations", str(iters)] + extra)
+    row = {"variant": variant, "policy": policy, "N": n, "Y": y,
+           "think": think, "tunnel": tunnel, "mix": mix}
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True,
+                             timeout=timeout).stdout
+    except subprocess.TimeoutExpired:
+        return dict(row, iterations=iters, status="timeout")
+    for line in out.splitlines():
+        if line.startswith(PREFIX):
+            row.update(json.loads(line[len(PREFIX):]))
+            return dict(row, iterations=iters, status="ok")
+    return dict(row, iterations=iters, status="error")
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--np", type=int, nargs="+", default=[4])
+    p.add_argument("--Y", type=int, nargs="+", default=[3])
+    p.add_argument("--iterations", type=int, nargs="+", default=[5])
+    p.add_argument("--think", nargs="+", default=["uniform:0.2,0.4"],
+                   help="rozkłady snu: uniform:a,b | exp:średnia | const:x")
+    p.add_argument("--tunnel", nargs="+", default=["uniform:0.15,0.3"],
+                   help="rozkłady czasu w tunelu (jak --think)")
+    p.add_argument("--mix", type=float, nargs="+", default=[0.5],
+                   help="udział kierunku A w żądaniach")
+    p.add_argument("--variants", nargs="+", default=["gate:lamport"],
+                   help="gate[:algorytm], gate_one, gate_nont, gate_correction")
+    p.add_argument("--policies", nargs="+", default=["fifo"],
+                   help="polityki kierunku dla gate:lamport: fifo | epoch:W")
+    p.add_argument("--format", choices=["json", "csv"], default="json")
+    p.add_argument("--out", help="plik wynikowy (domyślnie stdout)")
+    p.add_argument("--timeout", type=float, default=300,
+                   help="limit czasu jednego punktu [s]")
+    p.add_argument("--mpiexec", default="mpiexec --oversubscribe")
+    p.add_argument("gate_args", nargs=argparse.REMAINDER,
+                   help="dodatkowe argumenty dla gate.py (po --)")
+    args = p.parse_args()
+    extra = [a for a in args.gate_args if a != "--"]
+
+    rows = []
+    for n, y, iters, think, tunnel, mix, variant in itertools.product(
+            args.np, args.Y, args.iterations, args.think, args.tunnel,
+            args.mix, args.variants):
+        # polityki kierunku ma tylko Proc z gate_core (gate:lamport)
+        lamport = variant in ("gate", "gate:lamport")
+        for policy in (args.policies if lamport else ["fifo"]):
+            row = run_point(args.mpiexec, args.timeout, variant, policy, n, y,
+                            iters, think, tunnel, mix,
+                            extra if variant.split(":")[0] == "gate" else [])
+            rows.append(row)
+            print(f"{variant:>16} {policy:>9} N={n:<4} Y={y:<3} "
+                  f"{row['status']:>7} "
+                  f"{row.get('passages_per_s', 0):>8.2f} przejść/s  "
+                  f"p95 {row.get('wait_p95_ms', 0):>9.1f} ms  "
+                  f"max {row.get('wait_max_ms', 0):>9.1f} ms", file=sys.stderr)
+
+    out = open(args.out, "w", newline="") if args.out else sys.stdout
+    if args.format == "json":
+        json.dump(rows, out, indent=1)
+        out.write("\n")
+    else:
+        w = csv.DictWriter(out, FIELDS, extrasaction="ignore")
+        w.writeheader()
+        w.writerows(rows)
+    if args.out:
+        out.close()
+
+
+if __name__ == "__main__":
+    main()
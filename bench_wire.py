@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark formatu komunikatów: piklowane (typ, dict) vs rekord int32.
+
+Rank 0 wysyła strumień REQUEST/ACK/RELEASE do ranku 1 tak, jak robi to
+Proc._send, a rank 1 odbiera je pętlą Iprobe + recv i dekoduje jak
+Proc._poll.  Co --window komunikatów odbiorca potwierdza odbiór, żeby
+nadawca nie zasypał buforów eager.
+
+    mpiexec -n 2 python3 bench_wire.py --messages 200000
+"""
+
+from mpi4py import MPI
+import argparse, pickle, time
+
+import gate_wire as wire
+
+TYPES = (0, 1, 2)              # REQUEST, ACK, RELEASE
+DIRS = ("A", "B")
+TAG_SYNC = 99
+
+
+def send_pickle(c, n, window):
+    for i in range(n):
+        typ = TYPES[i % 3]
+        pl = {"ts": i} if typ == 1 else {"dir": DIRS[i & 1], "ts": i}
+        c.send((typ, pl), 1, 0)
+        if (i + 1) % window == 0:
+            c.recv(source=1, tag=TAG_SYNC)
+
+
+def recv_pickle(c, n, window):
+    st = MPI.Status()
+    for i in range(n):
+        while not c.Iprobe(source=0, tag=0, status=st):
+            pass
+        typ, pl = c.recv(source=st.Get_source(), tag=0)
+        ts, d = pl["ts"], pl.get("dir")
+        if (i + 1) % window == 0:
+            c.send(None, 0, TAG_SYNC)
+
+
+def send_binary(c, n, window):
+    buf = wire.new_buf()
+    for i in range(n):
+        typ = TYPES[i % 3]
+        wire.pack(buf, typ, i, None if typ == 1 else DIRS[i & 1])
+        c.Send([buf, MPI.INT], 1, wire.tag_of(typ))
+        if (i + 1) % window == 0:
+            c.recv(source=1, tag=TAG_SYNC)
+
+
+def recv_binary(c, n, window):
+    buf, st = wire.new_buf(), MPI.Status()
+    for i in range(n):
+        while not c.Iprobe(source=0, tag=MPI.ANY_TAG, status=st):
+            pass
+        c.Recv([buf, MPI.INT], st.Get_source(), st.Get_tag())
+        typ, ts, d, _ = wire.unpack(buf)
+        if (i + 1) % window == 0:
+            c.send(None, 0, TAG_SYNC)
+
+
+def pickle_bytes():
+    proto = MPI.pickle.PROTOCOL
+    sizes = [len(pickle.dumps((0, {"dir": "A", "ts": 17}), proto)),
+             len(pickle.dumps((1, {"ts": 17}), proto)),
+             len(pickle.dumps((2, {"dir": "B", "ts": 17}), proto))]
+    return sum(sizes) / len(sizes)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--messages", type=int, default=100000)
+    p.add_argument("--window", type=int, default=64)
+    args = p.parse_args()
+
+    c = MPI.COMM_WORLD
+    if c.Get_size() != 2:
+        if c.Get_rank() == 0:
+            print("uruchom na dokładnie 2 procesach")
+        return
+
+    res = {}
+    for name, snd, rcv in (("pickle", send_pickle, recv_pickle),
+                           ("binary", send_binary, recv_binary)):
+        c.Barrier()
+        t0 = time.perf_counter()
+        if c.Get_rank() == 0:
+            snd(c, args.messages, args.window)
+        else:
+            rcv(c, args.messages, args.window)
+        c.Barrier()
+        res[name] = args.messages / (time.perf_counter() - t0)
+
+    if c.Get_rank() == 0:
+        nbytes = {"pickle": pickle_bytes(), "binary": wire.REC_BYTES}
+        print(f"{'format':>8} {'msg/s':>12} {'B/msg':>7}")
+        for name in ("pickle", "binary"):
+            print(f"{name:>8} {res[name]:>12.0f} {nbytes[name]:>7.1f}")
+        print(f"binary/pickle: {res['binary'] / res['pickle']:.2f}x msg/s, "
+              f"{nbytes['binary'] / nbytes['pickle']:.2f}x bajtów")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,29 @@ Gwiezdne wrota
 """
 
 from mpi4py import MPI
-import argparse, random, time, heapq
-from enum import Enum, auto
+import argparse
+
+import gate_core as core
+import gate_policy
+from gate_core import Proc
+from gate_ra import RAProc
+from gate_token import TokenProc
+from gate_quorum import QuorumProc
+from gate_hier import HierProc
+from gate_rma import RMAProc
+from gate_multi import MultiProc
+from gate_async import AsyncProc
+
+ALGORITHMS = {
+    "lamport": Proc,       # kolejka Lamporta: REQUEST / ACK / RELEASE
+    "ra":      RAProc,     # Ricart–Agrawala: odroczone odpowiedzi, bez RELEASE
+    "token":   TokenProc,  # żeton na drzewie Raymonda: O(log N) na przejście
+    "quorum":  QuorumProc, # kwora Maekawy (siatka): O(√N) na przejście
+    "hier":    HierProc,   # liderzy węzłów + żeton między węzłami
+    "rma":     RMAProc,    # stan bramy w oknie RMA: bilety + CAS, bez odpowiadania
+    "multi":   MultiProc,  # K bram Lamporta na jednym komunikatorze (--gates)
+    "async":   AsyncProc,  # R korutyn-badaczy na rank (--researchers), asyncio
+}
 
 # ---------- CLI ----------
 p = argparse.ArgumentParser()
@@ -14,230 +35,141 @@ p.add_argument("--Y", type=int, default=3,
 p.add_argument("--iterations", type=int, default=10,
                help="ile razy każdy proces przejdzie przez bramę")
 p.add_argument("--silent", action="store_true", help="wyłącz logi")
-args = p.parse_args()
-Y, ITERS, SILENT = args.Y, args.iterations, args.silent
-
-# ---------- typy / narzędzia ----------
-class DIR(Enum):
-    A = "A"
-    B = "B"
-
-def opposite(d):
-    return DIR.B if d is DIR.A else DIR.A
-
-class State(Enum):
-    RELEASED = auto()
-    WANTED   = auto()
-    HELD     = auto()
-
-class MType(Enum):
-    REQUEST   = 0
-    ACK       = 1
-    RELEASE   = 2
-    TERMINATE = 3  # sygnał zakończenia
-
-def _log(r, t, s):
-    if not SILENT:
-        print(f"[{r}] [t{t:06d}] {s}", flush=True)
-
-# ---------- proces ----------
-class Proc:
-    def __init__(self, comm):
-        self.c   = comm
-        self.id  = comm.Get_rank()
-        self.N   = comm.Get_size()
-        self.peers = [i for i in range(self.N) if i != self.id]
-
-        # --- zmienne pseudokodu ---
-        self.clock   = 0
-        self.state   = State.RELEASED
-        self.wantDir = None
-        self.gateDir = DIR.A           # startowy kierunek bramy
-        self.Acked   = [True] * self.N
-        self.Q       = []              # kopiec (ts, pid, dir)
-        self.reqTS   = None            # timestamp naszego REQUEST
-        self.active  = [True] * self.N # czy proces się nie zakończył
-        self.should_terminate = False  # flaga kończenia na TERMINATE
-
-    # ---- Lamport ----
-    def _tick(self):
-        self.clock += 1
-        return self.clock
-
-    def _upd(self, ts):
-        self.clock = max(self.clock, ts) + 1
-
-    # ---- wysyłanie komunikatów ----
-    def _send(self, dst, typ, **pl):
-        self._tick()
-        self.c.send((typ.value, pl), dst, 0)
-
-    def _bcast(self, typ, **pl):
-        for p in self.peers:
-            self._send(p, typ, **pl)
-
-    # ---- sprawdzenie, czy mogę wejść (myTurn) ----
-    def _my_turn(self):
-        if not self.Q:
-            return False
-        sortedQ = sorted(self.Q)  # uporządkowane rosnąco po (ts, pid, dir)
-        head_ts, head_pid, head_dir = sortedQ[0]
-        # jeśli czołowy wpis nie ma kierunku gateDir, od razu false
-        if DIR(head_dir) != self.gateDir:
-            return False
-        # zlicz wpisy o tym samym kolorze aż do siebie
-        pos = 0
-        for ts_i, pid_i, dir_i in sortedQ:
-            if DIR(dir_i) != self.gateDir:
-                break
-            pos += 1
-            if pid_i == self.id:
-                return pos <= Y
-        return False
-
-    # ---- handlery ----
-    def _h_req(self, src, ts, dir_):
-        # aktualizacja zegara już była w _poll()
-        heapq.heappush(self.Q, (ts, src, dir_))
-        # jeżeli tunel jest pusty (czyli self.state != HELD) i czołowy wpis = inny kolor:
-        if self.state != State.HELD and DIR(self.Q[0][2]) != self.gateDir:
-            self.gateDir = DIR(self.Q[0][2])
-            _log(self.id, self.clock,
-                 f"Ustawiam bramę na {self.gateDir.name} (tunel pusty)")
-
-        self._send(src, MType.ACK, ts=self.clock)
-
-    def _h_ack(self, src):
-        self.Acked[src] = True
-
-    def _h_rel(self, src, ts, dir_):
-        # usuwamy *wszystkie* wpisy pochodzące od src (pid = src)
-        to_remove = [entry for entry in self.Q if entry[1] == src]
-        for entry in to_remove:
-            try:
-                self.Q.remove(entry)
-            except ValueError:
-                pass
-        if to_remove:
-            heapq.heapify(self.Q)
-
-        # po usunięciu: jeśli Q ma czołowy inny kolor, zmień gateDir
-        if self.Q and DIR(self.Q[0][2]) != self.gateDir:
-            self.gateDir = DIR(self.Q[0][2])
-            _log(self.id, self.clock,
-                 f"Przestawiam bramę na {self.gateDir.name}")
-
-    def _h_term(self, src):
-        # dowolny TERMINATE od razu każe zakończyć wszystkim
-        self.should_terminate = True
-
-    # ---- odbiór wiadomości non‐blocking ----
-    def _poll(self):
-        st = MPI.Status()
-        while self.c.Iprobe(source=MPI.ANY_SOURCE, tag=0, status=st):
-            src = st.Get_source()
-            typ_val, pl = self.c.recv(source=src, tag=0)
-            if "ts" in pl:
-                self._upd(pl["ts"])
-            typ = MType(typ_val)
-            if typ is MType.REQUEST:
-                self._h_req(src, pl["ts"], pl["dir"])
-            elif typ is MType.ACK:
-                self._h_ack(src)
-            elif typ is MType.RELEASE:
-                self._h_rel(src, pl["ts"], pl["dir"])
-            elif typ is MType.TERMINATE:
-                self._h_term(src)
-
-    # ---- wejście / wyjście z tunelu ----
-    def enter(self, d: DIR):
-        self.state, self.wantDir = State.WANTED, d
-        ts = self._tick()
-        self.reqTS = ts
-        for p in self.peers:
-            self.Acked[p] = False
-
-        heapq.heappush(self.Q, (ts, self.id, d.value))
-        self._bcast(MType.REQUEST, dir=d.value, ts=ts)
-        _log(self.id, self.clock, f"Staram się o {d.name}")
-
-        while True:
-            if self.should_terminate:
-                return  # natychmiast wyjdź, jeśli dostaliśmy TERMINATE
-
-            self._poll()
-            # warunek: od wszystkich aktywnych mamy ACK i mamy kolejkę pod gateDir
-            if all(self.Acked[p] or not self.active[p] for p in self.peers) \
-               and self._my_turn():
-                self.state = State.HELD
-                _log(self.id, self.clock, "==> WCHODZĘ <==")
-                break
-            time.sleep(0.001)
-
-    def leave(self):
-        # usuwamy własny wpis (reqTS, id, wantDir) z kolejki lokalnie
-        try:
-            self.Q.remove((self.reqTS, self.id, self.wantDir.value))
-            heapq.heapify(self.Q)
-        except ValueError:
-            pass
-
-        self.state = State.RELEASED
-        self._bcast(MType.RELEASE, dir=self.gateDir.value, ts=self._tick())
-        _log(self.id, self.clock, "<== WYCHODZĘ ==>")
-
-    # ---- główna pętla procesu ----
-    def run(self):
-        random.seed(self.id * 1234 + int(time.time()))
-
-        for _ in range(ITERS):
-            if self.should_terminate:
-                break  # przerwij wszystkie dalsze iteracje
-
-            _log(self.id, self.clock, "Śpię")
-            t_end = time.time() + random.uniform(0.2, 0.4)
-            while time.time() < t_end:
-                if self.should_terminate:
-                    break
-                self._poll()
-                time.sleep(0.005)
-            if self.should_terminate:
-                break
-
-            self.enter(random.choice([DIR.A, DIR.B]))
-            if self.should_terminate:
-                break
-
-            # tunel: symulowane przejście
-            t_in = time.time() + random.uniform(0.15, 0.3)
-            while time.time() < t_in:
-                if self.should_terminate:
-                    break
-                self._poll()
-                time.sleep(0.005)
-            if self.should_terminate:
-                break
-
-            self.leave()
-
-        # Jeżeli to JEST proces, który jako pierwszy dobiegł do końca pętli,
-        # wyślijmy TERMINATE. Pozostali i tak w pollingach wykryją tę flagę.
-        if not self.should_terminate:
-            self._bcast(MType.TERMINATE, ts=self._tick())
-            _log(self.id, self.clock, "TERMINATE")
-
-        # Poczekajmy jeszcze chwilę, żeby inne procesy przyjęły TERMINATE
-        t_fin = time.time() + 0.3
-        while time.time() < t_fin:
-            self._poll()
-            time.sleep(0.005)
-
-        MPI.Finalize()
+p.add_argument("--algorithm", choices=list(ALGORITHMS), default="lamport",
+               help="algorytm bramy")
+p.add_argument("--progress", choices=["event", "poll", "thread"],
+               default="event",
+               help="odbiór komunikatów: event – wystawione z góry Irecv "
+                    "+ Testsome, poll – Improbe + sleep (dawny tryb), "
+                    "thread – jak event, ale w osobnym wątku postępu")
+p.add_argument("--wire", choices=["binary", "pickle"], default="binary",
+               help="format komunikatów: binary – rekordy int32 z tagiem "
+                    "na typ, pickle – krotki (typ, dict) (dawny format)")
+p.add_argument("--coalesce", action="store_true",
+               help="odraczaj ACK i sklejaj komunikaty do jednego adresata; "
+                    "nie potwierdzaj REQUEST, który i tak czeka na nasz "
+                    "RELEASE (starszy wpis w drugim kierunku) – RELEASE "
+                    "działa jak ACK (wymaga --wire binary)")
+p.add_argument("--flush-us", type=int, default=500,
+               help="okno odroczenia ACK w trybie --coalesce [µs]")
+p.add_argument("--node-size", type=int, default=0,
+               help="udawaj węzły po R kolejnych ranków (0 – prawdziwe "
+                    "węzły z Split_type(COMM_TYPE_SHARED))")
+p.add_argument("--gates", type=int, default=1,
+               help="ile niezależnych bram obsługuje każdy proces "
+                    "(tylko --algorithm multi)")
+p.add_argument("--researchers", type=int, default=1,
+               help="ilu logicznych badaczy (korutyn) działa na każdym "
+                    "ranku (tylko --algorithm async)")
+p.add_argument("--batch-us", type=int, default=0,
+               help="okno zbierania żądań badaczy jednego ranku w jedno "
+                    "REQUEST z licznikiem [µs] (0 – bez grup; tylko "
+                    "--algorithm async)")
+p.add_argument("--dir-policy", default="fifo",
+               help="kolejność żądań i przełączanie kierunku: fifo (jak "
+                    "dotąd) | epoch:W – kierunki grupowane w epokach W "
+                    "tyknięć zegara Lamporta (tylko --algorithm lamport)")
+p.add_argument("--bcast", choices=["flat", "tree"], default="flat",
+               help="rozgłaszanie REQUEST / RELEASE: flat – Isend do "
+                    "każdego peera, tree – drzewo dwumianowe nadawcy, "
+                    "ranki przekazują dalej (u nadawcy O(log N) wysyłek; "
+                    "tylko --algorithm lamport bez --coalesce)")
+p.add_argument("--termination", choices=["broadcast", "quiesce"],
+               default="broadcast",
+               help="koniec pracy: broadcast – pierwszy, kto skończy, "
+                    "rozgłasza TERMINATE, a wszyscy czekają jeszcze 0,3 s "
+                    "(pozostali mogą nie zrobić wszystkich --iterations); "
+                    "quiesce – każdy rank robi swoje --iterations "
+                    "i obsługuje peerów, aż fale Iallreduce liczników "
+                    "komunikatów wykażą ciszę (wymagane przez --members, "
+                    "--depart i --fault)")
+p.add_argument("--members", type=int, default=0,
+               help="ile ranków (0..K-1) jest w bramie od startu; pozostałe "
+                    "dołączają w trakcie (JOIN + SYNC stanu) co --join-after "
+                    "s po kolei (0 – wszyscy od startu; tylko --algorithm "
+                    "lamport)")
+p.add_argument("--join-after", type=float, default=1.0,
+               help="odstęp między kolejnymi dołączeniami przy --members [s]")
+p.add_argument("--depart", action="store_true",
+               help="po swoich iteracjach rank wychodzi z bramy (DEPART): "
+                    "pozostali przestają mu wysyłać REQUEST / RELEASE "
+                    "i czekać na jego ACK (tylko --algorithm lamport)")
+p.add_argument("--lease-ms", type=int, default=0,
+               help="detektor awarii: rank, od którego nic nie przyszło "
+                    "przez tyle ms, jest wykluczany z bramy (SUSPECT do "
+                    "wszystkich), a jego wpis i brakujący ACK znikają "
+                    "(0 – wyłączony; tylko --algorithm lamport z --progress "
+                    "thread: dzierżawę odnawia wątek postępu, także gdy "
+                    "badacz jest w tunelu)")
+p.add_argument("--heartbeat-ms", type=int, default=0,
+               help="co ile ms przegląd dzierżaw i HEARTBEAT do członków, "
+                    "którym w tym czasie nic nie wysłaliśmy (0 – lease/4)")
+p.add_argument("--fault", metavar="SPEC",
+               help="wstrzyknięcie awarii (wymaga --lease-ms): crash:R:T – "
+                    "rank R po T s milknie na stałe w tunelu, pause:R:T:D – "
+                    "rank R po T s staje na D s z wysłanym REQUEST")
+p.add_argument("--stats", metavar="PLIK",
+               help="zapisz liczniki (suma i per rank) do pliku JSON")
+p.add_argument("--trace", metavar="KATALOG",
+               help="zapisuj binarny ślad zdarzeń do KATALOG/trace.<rank>.bin "
+                    "(scalanie i eksport: trace_merge.py)")
 
 # ---------- main ----------
 
 def main():
-    pr = Proc(MPI.COMM_WORLD)
+    args = p.parse_args()
+    if args.coalesce and args.wire != "binary":
+        p.error("--coalesce wymaga --wire binary")
+    if args.coalesce and args.algorithm != "lamport":
+        p.error("--coalesce działa tylko z --algorithm lamport")
+    if args.algorithm == "quorum" and args.wire != "binary":
+        p.error("--algorithm quorum wymaga --wire binary")
+    if args.progress == "thread" and args.algorithm != "lamport":
+        p.error("--progress thread działa tylko z --algorithm lamport")
+    if args.gates != 1 and args.algorithm != "multi":
+        p.error("--gates działa tylko z --algorithm multi")
+    if args.researchers != 1 and args.algorithm != "async":
+        p.error("--researchers działa tylko z --algorithm async")
+    if args.dir_policy != "fifo" and args.algorithm != "lamport":
+        p.error("--dir-policy działa tylko z --algorithm lamport")
+    try:
+        gate_policy.parse(args.dir_policy)
+    except ValueError as e:
+        p.error(str(e))
+    if args.bcast == "tree" and (args.algorithm != "lamport" or args.coalesce):
+        p.error("--bcast tree działa tylko z --algorithm lamport "
+                "bez --coalesce")
+    if args.members or args.depart:
+        if args.algorithm != "lamport" or args.bcast == "tree":
+            p.error("--members / --depart działają tylko z --algorithm "
+                    "lamport i --bcast flat")
+        if args.termination != "quiesce":
+            p.error("--members / --depart wymagają --termination quiesce")
+        if not 0 <= args.members <= MPI.COMM_WORLD.Get_size():
+            p.error("--members musi być z zakresu 0..N")
+    if args.lease_ms or args.fault:
+        if args.algorithm != "lamport" or args.bcast == "tree":
+            p.error("--lease-ms / --fault działają tylko z --algorithm "
+                    "lamport i --bcast flat")
+        if args.lease_ms and args.progress != "thread":
+            p.error("--lease-ms wymaga --progress thread")
+        if args.lease_ms and args.heartbeat_ms >= args.lease_ms:
+            p.error("--heartbeat-ms musi być mniejsze niż --lease-ms")
+    if args.fault:
+        if not args.lease_ms:
+            p.error("--fault wymaga --lease-ms")
+        if args.termination != "quiesce":
+            p.error("--fault wymaga --termination quiesce")
+        try:
+            kind, rank, _, _ = core.parse_fault(args.fault)
+        except ValueError as e:
+            p.error(str(e))
+        if not 0 <= rank < MPI.COMM_WORLD.Get_size():
+            p.error("--fault: nie ma takiego ranku")
+    if args.batch_us and args.algorithm != "async":
+        p.error("--batch-us działa tylko z --algorithm async")
+    core.configure(args)
+    pr = ALGORITHMS[args.algorithm](MPI.COMM_WORLD)
     pr.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,329 @@
+"""
+Brama dla asyncio: wielu logicznych badaczy na jednym ranku
+(--algorithm async --researchers R).
+
+Każdy badacz to korutyna, a jego żądanie ma własny wpis w kolejce
+Lamporta (pid = rank·R + slot), ale wszyscy badacze ranku dzielą zegar,
+jeden kierunek bramy i jeden transport.  Numer slotu jedzie w polu arg
+rekordu: REQUEST i RELEASE mówią, czyj to wpis, ACK – na czyje żądanie
+odpowiada.  Żądania badaczy z tego samego ranku trafiają do kolejki od
+razu, bez komunikatów – zegar i kolejka są wspólne.
+
+--batch-us W: życzenia tego samego kierunku zgłoszone w oknie W µs
+(najwyżej Y naraz) idą jako jedno żądanie zbiorcze – jeden wpis
+w kolejce z wagą n (GateQueue.push(..., n)), który w myTurn zajmuje
+n z Y miejsc.  Grupa dostaje jeden komplet ACK, wchodzi razem
+i zwalnia wpis jednym RELEASE po wyjściu ostatniego członka, więc
+pojemność i kierunek zostają dokładne.  Wagę koduje pole arg REQUEST:
+arg = slot + R·(n - 1), czyli bez grupowania arg = slot.
+
+Postęp prowadzi zadanie _pump w pętli asyncio: odbiera komunikaty
+(Testsome albo Iprobe), wypycha rekordy zebrane w _out (jak w gate_multi
+– jeden komunikat na adresata w obiegu) i budzi czekających badaczy,
+którym przyszedł komplet ACK i wypadła kolej.  Gdy nic nie przychodzi,
+drzemie przez asyncio.sleep, więc korutyny badaczy działają w tym czasie.
+
+API:
+
+    r = proc.researcher()
+    await r.enter(DIR.A) ... await r.leave()
+    async with r.passage(DIR.B): ...
+"""
+
+import asyncio, contextlib, random, time
+
+from mpi4py import MPI
+
+import gate_core as core
+from gate_core import Proc, State, MType, DIR, _log
+from gate_trace import Ev
+import gate_wire as wire
+
+
+class Batch:
+    """Żądanie w kolejce bramy: jeden badacz albo grupa (--batch-us)."""
+    __slots__ = ("slot", "pid", "dir", "members", "left", "reqTS", "need",
+                 "t_acked", "fut", "timer")
+
+    def __init__(self, d):
+        self.slot    = None            # slot wpisu w kolejce (z puli _free)
+        self.pid     = None
+        self.dir     = d
+        self.members = []
+        self.left    = 0               # ilu członków jeszcze nie wyszło
+        self.reqTS   = None
+        self.need    = 0               # ilu peerów nie przysłało jeszcze ACK
+        self.t_acked = None
+        self.fut     = asyncio.get_running_loop().create_future()
+        self.timer   = None            # koniec okna zbierania
+
+
+class Researcher:
+    """Logiczny badacz – korutyna przechodząca przez bramę."""
+    __slots__ = ("proc", "slot", "state", "want", "t_req", "batch")
+
+    def __init__(self, proc, slot):
+        self.proc  = proc
+        self.slot  = slot
+        self.state = State.RELEASED
+        self.want  = None              # wantDir
+        self.t_req = None
+        self.batch = None              # żądanie, w którym czekamy / jesteśmy
+
+    async def enter(self, d):
+        await self.proc._enter(self, d)
+
+    async def leave(self):
+        self.proc._leave(self)
+
+    @contextlib.asynccontextmanager
+    async def passage(self, d):
+        await self.enter(d)
+        try:
+            yield self
+        finally:
+            if self.state is State.HELD:
+                await self.leave()
+
+
+class AsyncProc(Proc):
+    def __init__(self, comm, researchers=None):
+        super().__init__(comm)
+        self.R = researchers or core.RESEARCHERS
+        self.res = []                  # badacze ranku, indeks = slot
+        self.inside = 0                # ilu naszych badaczy jest w tunelu
+        self._req = {}                 # slot -> wysłane żądanie (do ACK)
+        # sloty wpisów: żywych żądań jest najwyżej R (każde ma członka,
+        # który jeszcze nie wyszedł), ale badacz może zgłosić się znowu,
+        # zanim jego poprzednia grupa zwolni wpis – stąd osobna pula
+        self._free = list(range(self.R))
+        self._open = {}                # dir -> grupa w oknie zbierania
+        self._waiting = set()          # żądania czekające na wejście
+        self.batched = 0               # badacze dołączeni do cudzej grupy
+        self._dirty = False            # zmiana lokalna – sprawdź czekających
+        self.duration = 0.0            # run(): czas pracy badaczy [s]
+
+    def researcher(self):
+        if len(self.res) == self.R:
+            raise RuntimeError(f"na ranku jest już {self.R} badaczy "
+                               "(zwiększ --researchers)")
+        r = Researcher(self, len(self.res))
+        self.res.append(r)
+        return r
+
+    # ---- wysyłanie: rekordy do jednego adresata sklejane w obiegu ----
+    def _send(self, dst, typ, ts, dir_=None, arg=0):
+        if core.WIRE != "binary":
+            return super()._send(dst, typ, ts, dir_, arg)
+        self._tick()
+        self.sent_recs += 1
+        self.n_sent[typ] += 1
+        if self._tr:
+            self._trace(Ev.SEND, dir_, typ, dst, ts)
+        recs = self._out.setdefault(dst, [])
+        recs.append((typ, ts, dir_, arg))
+        if len(recs) == wire.MAX_BATCH:
+            self._flush_dst(dst)
+
+    # ---- kierunek bramy (reguły _h_req / _h_rel z Proc) ----
+    def _turn_to(self, head_dir, msg):
+        self.gateDir = DIR(head_dir)
+        self._flipped(head_dir)
+        _log(self.id, self.clock, f"{msg} na {self.gateDir.name}")
+
+    def _queued(self, ts, pid, dir_, n=1):
+        self.Q.push(ts, pid, dir_, n)
+        head_dir = self.Q.head_dir()
+        if not self.inside and head_dir != self.gateDir.value:
+            self._turn_to(head_dir, "Ustawiam bramę")
+
+    def _removed(self, pid):
+        self.Q.remove_pid(pid)
+        head_dir = self.Q.head_dir()
+        if head_dir is not None and head_dir != self.gateDir.value:
+            self._turn_to(head_dir, "Przestawiam bramę")
+
+    # ---- handlery ----
+    def _dispatch(self, src, typ, ts, dir_, arg=0):
+        self._upd(ts)
+        if typ == MType.REQUEST:
+            slot, n = arg % self.R, arg // self.R + 1
+            self._queued(ts, src * self.R + slot, dir_, n)
+            self._send(src, MType.ACK, self.clock, arg=slot)
+        elif typ == MType.ACK:
+            self._req[arg].need -= 1
+        elif typ == MType.RELEASE:
+            self._removed(src * self.R + arg)
+        elif typ == MType.TERMINATE:
+            self._h_term(src)
+
+    # ---- wejście / wyjście ----
+    def _ready(self, b):
+        if b.t_acked is None:
+            if b.need > 0:
+                return False
+            b.t_acked = time.time()
+        return self.Q.my_turn(b.pid, self.gateDir.value, core.Y)
+
+    async def _enter(self, r, d):
+        r.state, r.want, r.t_req = State.WANTED, d, time.time()
+        b = self._open.get(d)
+        if b is None:
+            b = Batch(d)
+            if core.BATCH:
+                self._open[d] = b
+                b.timer = asyncio.get_running_loop().call_later(
+                    core.BATCH, self._request, b)
+        else:
+            self.batched += 1
+        b.members.append(r)
+        r.batch = b
+        _log(self.id, self.clock, f"Staram się o {d.name} (badacz {r.slot})")
+        if b.timer is None or len(b.members) == core.Y:
+            self._request(b)
+
+        await b.fut
+        if not self.should_terminate:
+            self._held(r)
+
+    def _request(self, b):
+        # koniec okna (albo grupa pełna): jedno REQUEST za wszystkich
+        if b.timer is not None:
+            b.timer.cancel()
+            del self._open[b.dir]
+            b.timer = None
+        n = b.left = len(b.members)
+        b.slot = self._free.pop()
+        b.pid = self.id * self.R + b.slot
+        b.reqTS = ts = self._tick()
+        b.need = len(self.peers)
+        self._req[b.slot] = b
+        self._queued(ts, b.pid, b.dir.value, n)
+        for p in self.peers:
+            self._send(p, MType.REQUEST, ts, b.dir.value,
+                       b.slot + self.R * (n - 1))
+        self._waiting.add(b)
+        self._dirty = True
+
+    def _held(self, r):
+        b = r.batch
+        r.state = State.HELD
+        self.inside += 1
+        now = time.time()
+        self.wait_sum += now - r.t_req
+        self.wait_max = max(self.wait_max, now - r.t_req)
+        self.wait_ack += b.t_acked - r.t_req
+        self.wait_turn += now - b.t_acked
+        if self._tr:
+            self._tr.rec(r.t_req, b.reqTS, Ev.WANT, r.want.value, peer=r.slot)
+            self._trace(Ev.ENTER, r.want.value, peer=r.slot)
+        _log(self.id, self.clock, f"==> WCHODZĘ <== (badacz {r.slot})")
+
+    def _leave(self, r):
+        if self._tr:
+            self._trace(Ev.LEAVE, r.want.value, peer=r.slot)
+        b, r.batch = r.batch, None
+        r.state = State.RELEASED
+        self.inside -= 1
+        self.passages += 1
+        _log(self.id, self.clock, f"<== WYCHODZĘ ==> (badacz {r.slot})")
+        b.left -= 1
+        if b.left:
+            return                     # wpis grupy trzyma miejsca do końca
+        del self._req[b.slot]
+        self._free.append(b.slot)
+        self._removed(b.pid)
+        ts = self._tick()
+        for p in self.peers:
+            self._send(p, MType.RELEASE, ts, self.gateDir.value, b.slot)
+        self._dirty = True
+
+    def _wake(self):
+        for b in [b for b in self._waiting
+                  if self.should_terminate or self._ready(b)]:
+            self._waiting.discard(b)
+            b.fut.set_result(None)
+
+    # ---- postęp: odbiór, wysyłka i budzenie badaczy w pętli asyncio ----
+    async def _pump(self):
+        recv = self._poll if core.PROGRESS == "poll" else self._drain
+        nap = core.IDLE_MIN
+        while True:
+            self.polls += 1
+            if recv():
+                nap = core.IDLE_MIN
+                self._dirty = True
+            else:
+                self.empty_polls += 1
+                nap = min(nap * 2, core.IDLE_MAX)
+            if self._dirty:
+                self._dirty = False
+                self._wake()
+            if self._out:
+                self._flush()
+            # sleep(0) przy ruchu: obudzeni badacze ruszą przed drzemką
+            await asyncio.sleep(0 if nap == core.IDLE_MIN else nap)
+
+    async def _life(self, r):
+        # cykl jak w Proc.run: sen → żądanie → tunel → wyjście
+        for _ in range(core.ITERS):
+            await asyncio.sleep(self._think_time())
+            if self.should_terminate:
+                return
+            await r.enter(self._pick_dir())
+            if self.should_terminate:
+                return
+            await asyncio.sleep(self._tunnel_time())
+            await r.leave()
+
+    async def _main(self):
+        pump = asyncio.ensure_future(self._pump())
+        t0 = time.time()
+        lives = [asyncio.ensure_future(self._life(self.researcher()))
+                 for _ in range(self.R)]
+        # po TERMINATE _wake zwalnia czekających, więc badacze i tak kończą
+        done = asyncio.gather(*lives)
+        await asyncio.wait([done, pump], return_when=asyncio.FIRST_COMPLETED)
+        if pump.done():
+            pump.result()              # wyjątek w pętli postępu
+        self.duration = time.time() - t0
+
+        if core.TERMINATION == "quiesce":
+            # jak Proc._quiesce; między falami ruch obsługuje _pump
+            while True:
+                req, tot = self._census()
+                while not req.Test():
+                    await asyncio.sleep(core.IDLE_MIN)
+                if self._quiet(tot):
+                    break
+        else:
+            if not self.should_terminate:
+                self._bcast(MType.TERMINATE, self._tick())
+                _log(self.id, self.clock, "TERMINATE")
+            self._dirty = True
+            await asyncio.sleep(0.3)
+        self.shutdown_s = time.time() - t0 - self.duration
+        pump.cancel()
+        await asyncio.gather(pump, return_exceptions=True)
+
+    def _report(self):
+        super()._report()
+        n = self.c.reduce(self.passages, root=0)
+        t = self.c.reduce(self.duration, op=MPI.MAX, root=0)
+        g = self.c.reduce(self.batched, root=0)
+        if self.id == 0:
+            print(f"[0] badaczy na rank: {self.R}, przepustowość: "
+                  f"{n / max(t, 1e-9):.1f} przejść/s, w grupach: "
+                  f"{g / max(n, 1):.0%}", flush=True)
+
+    # ---- główna pętla: R korutyn-badaczy na jednym progresie ----
+    def run(self):
+        random.seed(self.id * 1234 + int(time.time()))
+        asyncio.run(self._main())
+        self._flush(force=True)
+        self._cancel_recvs()
+        self._report()
+        if self._tr:
+            self._tr.spill()
+
+        self._finalize()
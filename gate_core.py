@@ -0,0 +1,1210 @@
+"""
+Gwiezdne wrota – rdzeń: zegar Lamporta, transport i klasa Proc
+z algorytmem kolejki Lamporta (typy komunikatów są w gate_types.py).
+
+Punkt wejścia (CLI, wybór algorytmu) jest w gate.py; warianty algorytmu
+(np. gate_ra.py) dziedziczą po Proc i korzystają z tego samego transportu.
+"""
+
+from mpi4py import MPI
+import contextlib, json, random, threading, time
+from array import array
+
+from gate_queue import GateQueue
+import gate_policy
+from gate_trace import Tracer, Ev
+from gate_types import DIR, opposite, State, MType  # reeksport dla wariantów
+import gate_wire as wire
+
+# ---------- konfiguracja (ustawia ją configure() z gate.py) ----------
+Y, ITERS, SILENT = 3, 10, False
+PROGRESS, WIRE = "event", "binary"
+COALESCE, FLUSH = False, 500e-6
+NODE_SIZE, STATS, TRACE = 0, None, None
+GATES, RESEARCHERS, BATCH = 1, 1, 0.0
+POLICY, BCAST = gate_policy.Fifo(), "flat"
+TERMINATION = "broadcast"
+MEMBERS, JOIN_AFTER, DEPART = 0, 1.0, False
+LEASE, HEARTBEAT, FAULT = 0.0, 0.0, None
+
+def configure(args):
+    global Y, ITERS, SILENT, PROGRESS, WIRE, COALESCE, FLUSH, NODE_SIZE, STATS
+    global TRACE, GATES, RESEARCHERS, BATCH, POLICY, BCAST, TERMINATION
+    global MEMBERS, JOIN_AFTER, DEPART, LEASE, HEARTBEAT, FAULT
+    Y, ITERS, SILENT = args.Y, args.iterations, args.silent
+    PROGRESS, WIRE = args.progress, args.wire
+    COALESCE, FLUSH = args.coalesce, args.flush_us * 1e-6
+    NODE_SIZE, STATS, TRACE = args.node_size, args.stats, args.trace
+    GATES, RESEARCHERS = args.gates, args.researchers
+    BATCH = args.batch_us * 1e-6
+    POLICY = gate_policy.parse(args.dir_policy)
+    BCAST = args.bcast
+    TERMINATION = args.termination
+    MEMBERS, JOIN_AFTER, DEPART = args.members, args.join_after, args.depart
+    LEASE = args.lease_ms * 1e-3
+    HEARTBEAT = (args.heartbeat_ms or args.lease_ms / 4) * 1e-3
+    FAULT = parse_fault(args.fault) if args.fault else None
+
+def parse_fault(spec):
+    """crash:R:T | pause:R:T:D  ->  (rodzaj, rank, po T s, na D s)."""
+    kind, *vals = spec.split(":")
+    try:
+        nums = [float(v) for v in vals]
+    except ValueError:
+        nums = []
+    if kind == "crash" and len(nums) == 2:
+        return kind, int(nums[0]), nums[1], 0.0
+    if kind == "pause" and len(nums) == 3:
+        return kind, int(nums[0]), nums[1], nums[2]
+    raise ValueError(f"nieznana awaria: {spec!r} (crash:R:T | pause:R:T:D)")
+
+# tryb event: drzemka między Testsome rośnie od IDLE_MIN do IDLE_MAX [s]
+IDLE_MIN, IDLE_MAX = 20e-6, 500e-6
+RECV_BUF = 1024  # bufor na jeden zserializowany komunikat (pickle)
+
+# ---------- typy / narzędzia ----------
+def _log(r, t, s):
+    if not SILENT:
+        print(f"[{r}] [t{t:06d}] {s}", flush=True)
+
+# ---------- raport z liczników wszystkich ranków (też dla gate_sim) ----------
+MAXED = ("wait_max_s", "shutdown_s", "census_waves", "view",  # maksimum,
+         "fault_at", "recover_at", "detect_max_s")              # nie suma
+
+def report(rows):
+    tot = {k: sum(r[k] for r in rows) for k in rows[0]
+           if k not in ("rank", "sent", "recv") + MAXED}
+    for k in MAXED:
+        tot[k] = max(r[k] for r in rows)
+    for k in ("sent", "recv"):
+        tot[k] = {t.name: sum(r[k].get(t.name, 0) for r in rows)
+                  for t in MType}
+    n = max(tot["passages"], 1)
+    print(f"[0] przejść: {n}, komunikaty/przejście: protokół "
+          f"{tot['sent_recs'] / n:.2f}, MPI {tot['sent_msgs'] / n:.2f}, "
+          f"między węzłami {tot['sent_remote'] / n:.2f} "
+          f"(ACK zastąpionych: {tot['acks_saved']}), "
+          f"śr. oczekiwanie: {tot['wait_s'] / n * 1e3:.1f} ms, "
+          f"maks. {tot['wait_max_s'] * 1e3:.1f} ms")
+    print(f"[0] {'typ':<10} {'wysłane':>9} {'odebrane':>9}")
+    for t in MType:
+        if tot["sent"][t.name] or tot["recv"][t.name]:
+            print(f"[0] {t.name:<10} {tot['sent'][t.name]:>9} "
+                  f"{tot['recv'][t.name]:>9}")
+    polls = max(tot["polls"], 1)
+    print(f"[0] odebrane: {tot['bytes_recv']} B "
+          f"({tot['bytes_recv'] / n:.1f} B/przejście), "
+          f"obiegi odbioru: {tot['polls']} "
+          f"({tot['empty_polls'] / polls:.0%} pustych), "
+          f"zmiany kierunku: {tot['flips']}, "
+          f"CPU: {tot['cpu_s'] / n * 1e3:.1f} ms/przejście")
+    if tot["wait_ack_s"] or tot["wait_turn_s"]:
+        print(f"[0] oczekiwanie na przejście: na ACK "
+              f"{tot['wait_ack_s'] / n * 1e3:.1f} ms, na kolejkę "
+              f"{tot['wait_turn_s'] / n * 1e3:.1f} ms", flush=True)
+    if tot.get("epochs_closed"):
+        print(f"[0] polityka {POLICY.name}: zamknięć epok "
+              f"{tot['epochs_closed']} "
+              f"({tot['epochs_closed'] / n:.0%} przejść)", flush=True)
+    if tot.get("joins") or tot.get("departs"):
+        print(f"[0] członkostwo: wejść {tot['joins']}, odejść "
+              f"{tot['departs']}, ostatni widok {tot['view']}", flush=True)
+    if tot.get("fault_at"):
+        what = f"[0] awaria ({FAULT[0]}, rank {FAULT[1]}):"
+        if tot["suspects"]:
+            rec = (f", czekający weszli "
+                   f"{(tot['recover_at'] - tot['fault_at']) * 1e3:.1f} ms "
+                   f"po awarii" if tot["recover_at"] else "")
+            print(f"{what} wykrycie po {tot['detect_max_s'] * 1e3:.1f} ms "
+                  f"ciszy{rec}, wykluczeń: {tot['suspects']}, powrotów: "
+                  f"{tot['rejoins']}", flush=True)
+        else:
+            print(f"{what} bez wykluczeń (przestój krótszy niż dzierżawa)",
+                  flush=True)
+    if tot["shutdown_s"]:
+        waves = (f", fal liczenia: {tot['census_waves']}"
+                 if tot["census_waves"] else "")
+        # najkrótsze zakończenie ma rank, który skończył ostatni – to
+        # koszt samego wykrycia końca; najdłuższe: czekanie na innych
+        print(f"[0] zakończenie ({TERMINATION}): ostatni rank "
+              f"{min(r['shutdown_s'] for r in rows) * 1e3:.1f} ms, "
+              f"najdłużej {tot['shutdown_s'] * 1e3:.1f} ms{waves}",
+              flush=True)
+    if STATS:
+        with open(STATS, "w") as f:
+            json.dump({"total": tot, "ranks": rows}, f, indent=1)
+
+# ---------- proces ----------
+class Proc:
+    def __init__(self, comm):
+        self.c   = comm
+        self._setup(comm.Get_rank(), comm.Get_size())
+        self.node_of = self._topology()  # rank -> lider jego węzła
+
+        # tryb event: po jednym wystawionym odbiorze na każdego peera
+        # (kolejność FIFO w kanale zostaje zachowana)
+        # (binary: trwałe żądania Recv_init na prealokowanych buforach)
+        self._sbuf = wire.new_buf(wire.MAX_BATCH)
+        self._pbuf = wire.new_buf(wire.MAX_BATCH)
+        if PROGRESS != "poll" and WIRE == "binary":
+            self._rbufs = [wire.new_buf(wire.MAX_BATCH) for _ in self.peers]
+            self._rstats = [MPI.Status() for _ in self.peers]
+            self._rreqs = [self.c.Recv_init([b, MPI.INT], source=p,
+                                            tag=MPI.ANY_TAG)
+                           for p, b in zip(self.peers, self._rbufs)]
+            MPI.Prequest.Startall(self._rreqs)
+        elif PROGRESS != "poll":
+            self._rbufs = [bytearray(RECV_BUF) for _ in self.peers]
+            self._rreqs = [self.c.irecv(b, source=p, tag=0)
+                           for p, b in zip(self.peers, self._rbufs)]
+            self._rstats = [MPI.Status() for _ in self.peers]
+
+        # --progress thread: wątek postępu obsługuje komunikaty sam;
+        # stan procesu i wywołania MPI chroni _cv (w pozostałych trybach
+        # pusty kontekst), więc wystarcza MPI_THREAD_SERIALIZED
+        if PROGRESS == "thread":
+            if MPI.Query_thread() < MPI.THREAD_SERIALIZED:
+                raise RuntimeError("--progress thread wymaga MPI z "
+                                   "MPI_THREAD_SERIALIZED lub wyższym")
+            self._cv = threading.Condition()
+            self._stop = False
+            self._progress = threading.Thread(target=self._progress_loop,
+                                              name="gate-progress",
+                                              daemon=True)
+            self._progress.start()
+
+    # ---- stan procesu niezależny od transportu (korzysta z niego gate_sim) ----
+    def _setup(self, rank, size):
+        self.id  = rank
+        self.N   = size
+        self.peers = [i for i in range(self.N) if i != self.id]
+        self._rreqs = []
+        self._cv = contextlib.nullcontext()
+        self._progress = None
+
+        # --- zmienne pseudokodu ---
+        self.clock   = 0
+        self.state   = State.RELEASED
+        self.wantDir = None
+        self.gateDir = DIR.A           # startowy kierunek bramy
+        self.Acked   = [True] * self.N
+        self.Q       = GateQueue()     # kolejka (klucz, pid, dir), klucz z POLICY
+        self.reqTS   = None            # timestamp naszego REQUEST
+        self.ackTS   = None            # ACK liczy się, gdy ts > ackTS
+        self._floor  = None            # gate_policy: zamknięcie epoki przed wejściem
+        # --members / --depart: kto jest w bramie (widok).  REQUEST
+        # i RELEASE idą tylko do członków i tylko ich ACK są potrzebne;
+        # JOIN / DEPART dostają wszyscy, więc każdy rank zna widok
+        members = MEMBERS or self.N
+        self.active  = [p < members for p in range(self.N)]
+        self.joined  = self.active[self.id]
+        self._members = [p for p in self.peers if self.active[p]]
+        self.view    = 0               # ile zmian członkostwa widzieliśmy
+        self._sync_wait = set()        # JOIN: od kogo jeszcze czekamy na SYNC
+        self._req_view = 0             # widok w chwili naszego REQUEST (_blocks)
+
+        # --lease: detektor awarii.  Każdy odebrany komunikat odnawia
+        # dzierżawę nadawcy.  Dzierżawy sprawdza tylko czekający (od chwili
+        # swojego REQUEST), a HEARTBEAT dostają tylko ranki z wpisem w naszej
+        # kolejce, którym długo nic nie wysłaliśmy – tylko one mogą na nas
+        # czekać.  Wcielenie (inc) rośnie z każdym naszym JOIN, więc
+        # spóźnione SUSPECT o poprzednim wcieleniu nie wyrzucą nas znowu.
+        now = self._now()
+        self._heard   = [now] * self.N # kiedy ostatnio coś od p przyszło
+        self._sent_at = [now] * self.N # kiedy ostatnio coś do p wysłaliśmy
+        self._hb_next = now            # następny przegląd dzierżaw
+        self._alive_at = now           # ostatni przegląd (wykrywa nasz przestój)
+        self._t0      = now            # start pętli run() (--fault liczy od niego)
+        self._inc     = [0] * self.N   # znane wcielenia peerów
+        self.inc      = 0              # nasze wcielenie
+        self._dead    = set()          # wykluczeni (nie czekamy na ich SYNC)
+        self._expelled = False         # wykluczono nas – przed żądaniem JOIN
+        self._zombie  = False          # --fault crash: milczymy do końca
+        self._recovering = False       # czekaliśmy, gdy wykluczono peera
+        self._fault_done = False
+        self.should_terminate = False  # flaga kończenia na TERMINATE
+
+        # --coalesce (i gate_multi): rekordy czekające na wysłanie
+        # i odroczone ACK; _serve wypycha je na końcu każdego obiegu
+        self._out     = {}             # dst -> [(typ, ts, dir, arg), ...]
+        self._wave    = []             # niezakończone Isend z _send_recs
+        self._wbufs   = []             # ... i ich bufory (_wave[k] -> _wbufs[k])
+        self._batching = False         # _apply: odpowiedzi czekają w _out
+
+        # --bcast tree: rozgłoszenia idą drzewem dwumianowym nadawcy
+        self._tree    = {}             # korzeń -> nasze dzieci w jego drzewie
+        self._bseq    = 0              # ile rozgłoszeń wysłaliśmy
+        self._bdone   = [0] * self.N   # ile rozgłoszeń peera doręczyliśmy
+        self._ack_wait = {}            # peer -> ACK czekający na jego rozgłoszenia
+        self._ack_due = {}             # dst -> termin wysłania ACK
+        self.sent_msgs = 0             # komunikaty MPI
+        self.sent_recs = 0             # komunikaty protokołu (bez sklejania)
+        self.sent_remote = 0           # komunikaty MPI do innego węzła
+        self.mpi_out = 0               # wysłane komunikaty punkt-punkt ...
+        self.mpi_in  = 0               # ... i odebrane (--termination quiesce)
+        self.acks_saved = 0            # ACK zastąpione późniejszym komunikatem
+        self.passages = 0
+        self.wait_sum = 0.0            # łączny czas od REQUEST do wejścia [s]
+        self.wait_max = 0.0            # najdłuższe czekanie (sprawiedliwość)
+        self._t_req   = 0.0
+        self._t_acked = None           # enter(): chwila kompletu ACK
+        self._ack_scan = 0             # _ready(): peers[:k] już potwierdzili
+
+        # liczniki do raportu końcowego (_report); tanie, więc zawsze włączone
+        self.n_sent = [0] * len(MType) # rekordy protokołu wg typu
+        self.n_recv = [0] * len(MType)
+        self.bytes_recv  = 0           # bajty odebranych komunikatów MPI
+        self.polls       = 0           # obiegi _serve (Improbe / Testsome)
+        self.empty_polls = 0           # ... w których nic nie przyszło
+        self.flips       = 0           # zmiany kierunku bramy widziane lokalnie
+        self.epochs_closed = 0         # dodatkowe rundy REQUEST (gate_policy)
+        self.joins = self.departs = 0  # nasze JOIN / DEPART
+        self.suspects = self.rejoins = 0  # wykluczenia przez nas / nasze powroty
+        self.detect_max = 0.0          # najdłuższa cisza przed wykluczeniem
+        self.fault_at = self.recover_at = 0.0
+        self.wait_ack  = 0.0           # enter(): od REQUEST do kompletu ACK [s]
+        self.wait_turn = 0.0           # enter(): od kompletu ACK do myTurn [s]
+        self.shutdown_s = 0.0          # od końca pracy do wyjścia z _terminate
+        self.census_waves = 0          # fale Iallreduce w _quiesce
+        self._census_buf = None        # bufory trwającej fali
+        self._census_last = None       # sumy z poprzedniej fali
+        self._cpu0 = time.process_time()
+
+        # --trace: binarny ślad zdarzeń (None = wyłączony)
+        self._tr = Tracer(TRACE, self.id) if TRACE else None
+
+    # ---- topologia: węzeł = ranki ze wspólną pamięcią ----
+    def _topology(self):
+        if NODE_SIZE:
+            # --node-size R: udajemy węzły po R kolejnych ranków
+            lead = self.id - self.id % NODE_SIZE
+        else:
+            node = self.c.Split_type(MPI.COMM_TYPE_SHARED)
+            lead = node.allreduce(self.id, op=MPI.MIN)
+            node.Free()
+        return self.c.allgather(lead)
+
+    def _count_msg(self, dst):
+        self.sent_msgs += 1
+        if self.node_of[dst] != self.node_of[self.id]:
+            self.sent_remote += 1
+
+    # ---- ślad i liczniki zdarzeń ----
+    def _trace(self, kind, dir_=None, mtype=-1, peer=-1, clock=None, gate=0):
+        # SEND niesie ts komunikatu, RECV zegar po _upd – porządek
+        # (zegar, pid) przy scalaniu zgadza się wtedy z przyczynowością
+        self._tr.rec(self._now(), self.clock if clock is None else clock,
+                     kind, dir_, mtype, peer, gate)
+
+    def _flipped(self, d, gate=0):
+        self.flips += 1
+        if self._tr:
+            self._trace(Ev.FLIP, d, gate=gate)
+
+    # ---- czas ścienny (w gate_sim: czas wirtualny symulacji) ----
+    def _now(self):
+        return time.time()
+
+    # ---- Lamport ----
+    def _tick(self):
+        self.clock += 1
+        return self.clock
+
+    def _upd(self, ts):
+        self.clock = max(self.clock, ts) + 1
+
+    # ---- wysyłanie komunikatów ----
+    def _send(self, dst, typ, ts, dir_=None, arg=0):
+        if LEASE:
+            self._sent_at[dst] = self._now()
+        self._tick()
+        self.sent_recs += 1
+        self.n_sent[typ] += 1
+        if self._tr:
+            self._trace(Ev.SEND, dir_, typ, dst, ts)
+        self._transmit(dst, typ, ts, dir_, arg)
+
+    def _transmit(self, dst, typ, ts, dir_, arg):
+        # sam transport (liczniki i zegar już załatwił _send)
+        if COALESCE:
+            self._enqueue(dst, typ, ts, dir_, arg)
+            return
+        if self._batching and WIRE == "binary":
+            # odpowiedzi na porcję komunikatów wyjdą jedną falą w _flush
+            recs = self._out.setdefault(dst, [])
+            recs.append((typ, ts, dir_, arg))
+            if len(recs) == wire.MAX_BATCH:
+                self._flush_dst(dst)
+            return
+        self._count_msg(dst)
+        self.mpi_out += 1
+        if WIRE == "binary":
+            # Send wraca po skopiowaniu bufora, więc jeden wystarcza
+            wire.pack(self._sbuf, typ, ts, dir_, arg)
+            self.c.Send([self._sbuf, wire.REC, MPI.INT], dst, wire.tag_of(typ))
+        else:
+            pl = {"ts": ts} if dir_ is None else {"dir": dir_, "ts": ts}
+            if arg:
+                pl["arg"] = arg
+            self.c.send((typ.value, pl), dst, 0)
+
+    def _bcast(self, typ, ts, dir_=None, everyone=False):
+        # tree: wysyłamy tylko do dzieci w naszym drzewie (arg = nadawca),
+        # dalej roześlą je pośrednicy – u nadawcy O(log N) zamiast N-1;
+        # flat: do członków bramy (everyone: do wszystkich ranków)
+        if BCAST == "tree":
+            self._bseq += 1
+            dsts, arg = self._kids(self.id), self.id
+        else:
+            dsts, arg = self.peers if everyone else self._members, 0
+        # binary: wszystkie rekordy jako Isend i jeden Waitall w _flush –
+        # dwa ranki rozgłaszające naraz nie czekają na siebie w Send
+        wave = WIRE == "binary" and not COALESCE and not self._batching
+        self._batching |= wave
+        for p in dsts:
+            self._send(p, typ, ts, dir_, arg)
+        if wave:
+            self._batching = False
+            self._flush()
+
+    def _kids(self, root):
+        # drzewo dwumianowe o korzeniu root na rangach względnych
+        # r = (id - root) mod N: dzieci r to r + 2^k dla 2^k > r
+        kids = self._tree.get(root)
+        if kids is None:
+            r, k, kids = (self.id - root) % self.N, 1, []
+            while k < self.N:
+                if r < k and r + k < self.N:
+                    kids.append((root + r + k) % self.N)
+                k <<= 1
+            self._tree[root] = kids
+        return kids
+
+    def _relay(self, typ, ts, dir_, origin):
+        # --bcast tree: przekazujemy dalej drzewem nadawcy – wszystkie jego
+        # rozgłoszenia idą tą samą ścieżką, więc FIFO od nadawcy zostaje
+        for p in self._kids(origin):
+            self._send(p, MType(typ), ts, dir_, origin)
+        self._bdone[origin] += 1
+        need = self._ack_wait.get(origin)
+        if need is not None and need <= self._bdone[origin]:
+            del self._ack_wait[origin]
+            self.Acked[origin] = True
+        return origin
+
+    # ---- --coalesce: odraczanie ACK i sklejanie komunikatów ----
+    def _enqueue(self, dst, typ, ts, dir_, arg):
+        if typ == MType.ACK:
+            # ACK czeka chwilę – może zastąpi go inny komunikat do dst
+            self._ack_due.setdefault(dst, self._now() + FLUSH)
+            return
+        # każdy późniejszy komunikat ma ts większy niż REQUEST, na który
+        # odpowiadaliśmy, więc (Lamport + FIFO) sam działa jak ACK
+        if self._ack_due.pop(dst, None) is not None:
+            self.acks_saved += 1
+        recs = self._out.setdefault(dst, [])
+        recs.append((typ, ts, dir_, arg))
+        if len(recs) == wire.MAX_BATCH:
+            self._flush_dst(dst)
+
+    def _flush(self, force=False):
+        if self._ack_due:
+            now = self._now()
+            for dst, due in list(self._ack_due.items()):
+                if force or now >= due:
+                    del self._ack_due[dst]
+                    # ts nadajemy dopiero teraz, żeby w kanale rosły monotonicznie
+                    self._out.setdefault(dst, []).append(
+                        (MType.ACK, self._tick(), None, 0))
+        for dst in list(self._out):
+            self._flush_dst(dst)
+        # nie czekamy na odbiorców: bufory wracają do użytku, gdy skończą
+        # się wszystkie Isend (przy rekordach < limitu eager – od razu),
+        # inaczej kolejne fale dostają nowe bufory
+        if self._wave and MPI.Request.Testall(self._wave):
+            self._wave.clear()
+
+    def _flush_dst(self, dst):
+        self._send_recs(dst, self._out.pop(dst))
+
+    def _send_recs(self, dst, recs):
+        # kilka rekordów (typ, ts, dir[, arg]) w jednym komunikacie (tylko
+        # binary); Isend na osobnym buforze, na komplet czeka _flush
+        k = len(self._wave)
+        if k == len(self._wbufs):
+            self._wbufs.append(wire.new_buf(wire.MAX_BATCH))
+        buf = self._wbufs[k]
+        for i, rec in enumerate(recs):
+            wire.pack(buf, *rec, off=i * wire.REC)
+        tag = wire.tag_of(recs[0][0]) if len(recs) == 1 else wire.TAG_BATCH
+        self._wave.append(self.c.Isend([buf, len(recs) * wire.REC, MPI.INT],
+                                       dst, tag))
+        self._count_msg(dst)
+        self.mpi_out += 1
+
+    # ---- sprawdzenie, czy mogę wejść (myTurn) ----
+    def _my_turn(self):
+        # czy nasz wpis jest wśród pierwszych Y wpisów gateDir od czoła kolejki
+        return self.Q.my_turn(self.id, self.gateDir.value, Y)
+
+    # ---- handlery ----
+    def _h_req(self, src, ts, dir_):
+        # aktualizacja zegara już była w _poll()
+        if (not self.active[self.id] or not self.active[src]
+                or src in self._sync_wait):
+            # poza bramą, REQUEST od wykluczonego albo sprzed SYNC od src
+            # (jego wpis, jeśli wciąż aktualny, przyjdzie w SYNC) – tylko
+            # odpowiadamy.  Po SYNC od src wpis przyjmujemy, choćby inne
+            # SYNC jeszcze szły – src nie wyśle tego REQUEST drugi raz
+            self._send(src, MType.ACK, self.clock, arg=self._bseq)
+            return
+        old = self.Q.get(src)
+        if old is not None:
+            # drugi REQUEST przy wpisie w kolejce: nadawca zamyka epokę
+            # (gate_policy) – przesuwamy zegar za floor, zanim odpowiemy
+            self.clock = max(self.clock, POLICY.floor(old[0]))
+        else:
+            self.Q.push(POLICY.key(ts, dir_), src, dir_)
+        # jeżeli tunel jest pusty (czyli self.state != HELD) i czołowy wpis = inny kolor:
+        head_dir = self.Q.head_dir()
+        if self.state != State.HELD and head_dir != self.gateDir.value:
+            self.gateDir = DIR(head_dir)
+            self._flipped(head_dir)
+            _log(self.id, self.clock,
+                 f"Ustawiam bramę na {self.gateDir.name} (tunel pusty)")
+
+        if COALESCE and old is None and self._blocks(src):
+            # src nie wejdzie przed naszym RELEASE, a ten (ts większy niż
+            # jego REQUEST, FIFO) zadziała u niego jak ACK – nie wysyłamy
+            self.acks_saved += 1
+            return
+        self._send(src, MType.ACK, self.clock, arg=self._bseq)
+
+    def _blocks(self, src):
+        # --coalesce: nasz wpis stoi w kolejce przed wpisem src i ma inny
+        # kierunek, więc myTurn u src czeka, aż nasz RELEASE usunie wpis.
+        # src zna nasz wpis (REQUEST szedł przed tym, co od nas dostanie),
+        # o ile od naszego REQUEST nie zmienił się widok.  Drugi REQUEST
+        # (zamknięcie epoki) zawsze dostaje ACK.
+        mine = self.Q.get(self.id)
+        return (mine is not None and self._req_view == self.view
+                and mine[2] != self.Q.get(src)[2] and mine < self.Q.get(src))
+
+    def _h_ack(self, src, ts, arg=0):
+        # przy --coalesce ACK może być spóźnioną odpowiedzią na poprzedni
+        # REQUEST – liczy się tylko, jeśli jest późniejszy od naszego
+        # (przy zamykaniu epoki: od floor)
+        if BCAST == "tree" and self._bdone[src] < arg:
+            # ACK szedł wprost i wyprzedził rozgłoszenia src, które szły
+            # drzewem; Lamport wymaga, żebyśmy je znali – czekamy (_relay)
+            self._ack_wait[src] = arg
+        elif not COALESCE or ts > self.ackTS:
+            self.Acked[src] = True
+
+    def _h_rel(self, src, ts, dir_):
+        # usuwamy wpis pochodzący od src (indeks pid -> wpis, bez skanowania Q)
+        self.Q.remove_pid(src)
+
+        # po usunięciu: jeśli Q ma czołowy inny kolor, zmień gateDir
+        head_dir = self.Q.head_dir()
+        if head_dir is not None and head_dir != self.gateDir.value:
+            self.gateDir = DIR(head_dir)
+            self._flipped(head_dir)
+            _log(self.id, self.clock,
+                 f"Przestawiam bramę na {self.gateDir.name}")
+
+    def _h_term(self, src):
+        # dowolny TERMINATE od razu każe zakończyć wszystkim
+        self.should_terminate = True
+
+    # ---- członkostwo (--members / --depart) ----
+    def _set_member(self, p, on):
+        if self.active[p] == on:
+            return
+        self.active[p] = on
+        self._members = [q for q in self.peers if self.active[q]]
+        # zmiany różnych ranków są przemienne (dodanie / usunięcie innego
+        # pid), więc po dotarciu wszystkich JOIN / DEPART każdy ma ten
+        # sam zbiór i ten sam numer widoku
+        self.view += 1
+        _log(self.id, self.clock, f"Widok {self.view}: rank {p} "
+             f"{'wchodzi do' if on else 'wychodzi z'} bramy")
+
+    def _h_join(self, src, arg=0):
+        self._inc[src] = max(self._inc[src], arg)
+        self._dead.discard(src)
+        if self.active[src]:
+            # --lease: wraca ktoś, kogo jeszcze nie wykluczyliśmy (sam uznał,
+            # że jego dzierżawa wygasła) – zaczyna od czystej kolejki, więc
+            # jego stary wpis znika, a na nasze żądanie odpowie mu SYNC
+            self._h_rel(src, self.clock, None)
+            self.Acked[src] = True
+        self._set_member(src, True)
+        # SYNC: nasz zegar i – jeśli czekamy albo jesteśmy w tunelu – nasz
+        # wpis.  Każde późniejsze REQUEST / RELEASE idzie już do src i jedzie
+        # za SYNC (FIFO), więc src niczego nie zgubi ani nie dostanie dwa razy
+        if self.joined and self.state is not State.RELEASED:
+            self._send(src, MType.SYNC, self.clock, self.wantDir.value,
+                       self.reqTS)
+        else:
+            self._send(src, MType.SYNC, self.clock)
+
+    def _h_sync(self, src, ts, dir_, arg):
+        # SYNC zastępuje wpis src: po JOIN powtórzonym w trakcie dołączania
+        # (SUSPECT o nas) mógł zostać wpis z SYNC na poprzedni JOIN
+        self.Q.remove_pid(src)
+        if dir_ is not None:
+            key = POLICY.key(arg, dir_)
+            self.Q.push(key, src, dir_)
+            # src mógł już zamknąć epokę (gate_policy) – nasze żądania
+            # muszą wtedy stanąć za nim, jak po drugim REQUEST
+            floor = POLICY.floor(key)
+            if floor is not None:
+                self.clock = max(self.clock, floor)
+        self._sync_wait.discard(src)
+        self._synced()
+
+    def _synced(self):
+        if not self._sync_wait and not self.joined:
+            self.joined = True
+            head_dir = self.Q.head_dir()
+            if head_dir is not None and head_dir != self.gateDir.value:
+                self.gateDir = DIR(head_dir)
+                self._flipped(head_dir)
+
+    def _h_depart(self, src, ts):
+        self._set_member(src, False)
+        # wpis src zwykle już zniknął (RELEASE szedł przed DEPART), ale
+        # usuwamy go razem ze zmianą widoku; brak ACK od src _ready
+        # przestaje liczyć od razu (active)
+        self._h_rel(src, ts, None)
+
+    def join(self):
+        # rank spoza bramy: czysta kolejka, JOIN do wszystkich i czekanie
+        # na SYNC od każdego żywego – potem zna wszystkie wpisy i ma zegar
+        # nie mniejszy niż ich
+        with self._cv:
+            while True:
+                self._join()
+                self._serve(cond=lambda: self.joined or self._expelled)
+                if self.joined:
+                    return
+                # --lease: wykluczono nas, zanim doszły wszystkie SYNC –
+                # peery usunęły nas z widoku, więc od nowa z nowym wcieleniem
+                self._expelled = False
+                self.rejoins += 1
+                _log(self.id, self.clock, "Wykluczony w trakcie JOIN – od nowa")
+
+    def _join(self):
+        # część join() bez czekania (jak _request dla enter())
+        self.Q = GateQueue()
+        self._sync_wait = set(self.peers) - self._dead
+        self.active[self.id] = True
+        self.joins += 1
+        self.inc += 1
+        ts = self._tick()
+        for p in self.peers:
+            self._send(p, MType.JOIN, ts, arg=self.inc)
+        _log(self.id, self.clock, "JOIN")
+
+    # ---- detektor awarii (--lease) ----
+    def _watch(self):
+        # z każdego obiegu _serve / wątku postępu; właściwy przegląd co
+        # HEARTBEAT, sprawdzenie własnego przestoju – za każdym razem.
+        # Po pierwszej fali _quiesce wszyscy skończyli – nikt już nie czeka,
+        # a HEARTBEAT nie dałyby falom liczenia się ustalić.  Zwraca True,
+        # gdy właśnie uznaliśmy własną dzierżawę za straconą.
+        #
+        # Dzierżawę odnawia tylko obsługa komunikatów, dlatego --lease-ms
+        # wymaga --progress thread: kod w tunelu nie musi wołać _serve.
+        # Gdy stanie cały rank (--fault pause, przestój procesu), po
+        # powrocie wykrywamy to tutaj i wykluczony posiadacz wychodzi
+        # z tunelu od razu (run) – przeżywający już wpuszczają drugi kierunek.
+        if self._census_last is not None:
+            return False
+        now = self._now()
+        fenced = False
+        if now - self._alive_at >= LEASE - HEARTBEAT and self.active[self.id]:
+            # staliśmy tak długo, że peery mogły nas już wykluczyć –
+            # dzierżawa wygasła także po naszej stronie; przed następnym
+            # wejściem wracamy przez JOIN (jak po SUSPECT o nas).  Cisza
+            # innych w czasie naszego przestoju nic o nich nie mówi.
+            self._expelled = fenced = True
+            self._heard = [now] * self.N
+        self._alive_at = now
+        if now < self._hb_next or self._zombie or not self.active[self.id]:
+            return fenced
+        self._hb_next = now + HEARTBEAT
+        # dołączający nie ma jeszcze wpisów (REQUEST sprzed SYNC tylko
+        # potwierdza), a czekający członkowie już liczą jego dzierżawę –
+        # do końca JOIN sygnał idzie do wszystkich członków
+        dsts = [p for _, p, _ in self.Q] if self.joined else self._members
+        for p in dsts:
+            if p != self.id and now - self._sent_at[p] >= HEARTBEAT:
+                self._send(p, MType.HEARTBEAT, self.clock)
+        if self.state is State.WANTED and not self._expelled:
+            for p in self._members:
+                if now - max(self._heard[p], self._t_req) > LEASE:
+                    self._suspect(p, now)
+        return fenced
+
+    def _suspect(self, p, now):
+        # wykluczenie ogłaszamy wszystkim (także p, jeśli tylko stał), więc
+        # każdy przeżywający usuwa ten sam wpis, choćby jego dzierżawa
+        # jeszcze nie wygasła
+        silent = now - max(self._heard[p], self._t_req)
+        self.suspects += 1
+        self.detect_max = max(self.detect_max, silent)
+        _log(self.id, self.clock, f"Rank {p} milczy od "
+             f"{silent * 1e3:.0f} ms – wykluczam")
+        ts = self._tick()
+        for q in self.peers:
+            self._send(q, MType.SUSPECT, ts, arg=p + self.N * self._inc[p])
+        self._purge(p)
+
+    def _h_suspect(self, src, ts, arg):
+        if not self.active[src]:
+            return                     # sam wykluczony – nie wyklucza innych
+        p, inc = arg % self.N, arg // self.N
+        if p == self.id:
+            # wykluczono nas (także w trakcie JOIN – peery nie kolejkują już
+            # naszych REQUEST) – chyba że to spóźnione SUSPECT o poprzednim
+            # wcieleniu (wróciliśmy już przez JOIN)
+            if inc == self.inc and self.active[self.id]:
+                self._expelled = True
+            return
+        if inc >= self._inc[p] and p not in self._dead:
+            self._purge(p)
+
+    def _purge(self, p):
+        # jak DEPART: wpis p i czekanie na jego ACK znikają razem ze zmianą
+        # widoku; dołączający nie czeka już na jego SYNC
+        self._dead.add(p)
+        if self.state is State.WANTED:
+            self._recovering = True
+        self._h_depart(p, self.clock)
+        self._sync_wait.discard(p)
+        self._synced()
+
+    def _rejoin(self):
+        # wykluczono nas (albo sami uznaliśmy dzierżawę za straconą):
+        # porzucamy żądanie i wracamy jak nowy członek
+        self._expelled = False
+        self.Q.remove_pid(self.id)
+        self.state = State.RELEASED
+        self.joined = False
+        self.rejoins += 1
+        _log(self.id, self.clock, "Wykluczony – wracam przez JOIN")
+        self.join()
+
+    def _fault_due(self, kind):
+        # --fault: czy to nasza awaria i czy już na nią pora
+        if FAULT is None or self._fault_done:
+            return False
+        k, rank, after, _ = FAULT
+        if k != kind or rank != self.id or self._now() - self._t0 < after:
+            return False
+        self._fault_done = True
+        self.fault_at = self._now()
+        return True
+
+    def _crash(self):
+        # MPI nie przeżyje wyjścia procesu, więc awarię udajemy: rank
+        # milknie – nie obsługuje komunikatów, nie wysyła nic (ani ACK,
+        # ani HEARTBEAT), a jego wpis HELD zostaje w kolejkach innych.
+        # Na końcu dalej liczy odebrane w _quiesce, żeby MPI zakończyło się
+        # czysto.  W śladzie osobne zdarzenie CRASH – trace_check liczy je
+        # jako awarię, a martwego badacza zdejmuje z tunelu.
+        _log(self.id, self.clock, "AWARIA (crash)")
+        self._zombie = True
+        if self._tr:
+            self._trace(Ev.CRASH, self.wantDir.value)
+
+    def depart(self):
+        # tylko poza tunelem i bez żądania: nasz RELEASE wyszedł wcześniej
+        with self._cv:
+            self.joined = False
+            self.active[self.id] = False
+            self.departs += 1
+            self._bcast(MType.DEPART, self._tick(), everyone=True)
+            _log(self.id, self.clock, "DEPART")
+
+    # ---- rozdział odebranego komunikatu do handlera ----
+    def _dispatch(self, src, typ, ts, dir_, arg=0):
+        self._upd(ts)
+        if BCAST == "tree" and typ != MType.ACK:
+            src = self._relay(typ, ts, dir_, arg)
+        if COALESCE and self.state is State.WANTED and ts > self.ackTS:
+            self.Acked[src] = True     # niejawny ACK (reguła Lamporta)
+        if typ == MType.REQUEST:
+            self._h_req(src, ts, dir_)
+        elif typ == MType.ACK:
+            self._h_ack(src, ts, arg)
+        elif typ == MType.RELEASE:
+            self._h_rel(src, ts, dir_)
+        elif typ == MType.TERMINATE:
+            self._h_term(src)
+        elif typ == MType.JOIN:
+            self._h_join(src, arg)
+        elif typ == MType.SYNC:
+            self._h_sync(src, ts, dir_, arg)
+        elif typ == MType.DEPART:
+            self._h_depart(src, ts)
+        elif typ == MType.SUSPECT:
+            self._h_suspect(src, ts, arg)
+
+    # ---- obsługa porcji odebranych komunikatów ----
+    def _apply(self, batch):
+        # batch: [(src, [(typ, ts, dir, arg), ...]), ...] w kolejności
+        # odbioru.  Handlery idą po kolei (reguły kolejki i bramy bez
+        # zmian), ale ich odpowiedzi czekają w _out i _serve wysyła je
+        # jedną falą Isend zaraz po porcji, zamiast Send na każdy REQUEST.
+        if not batch:
+            return 0
+        self.mpi_in += len(batch)
+        if self._zombie:
+            return len(batch)          # --fault crash: odbieramy i milczymy
+        if LEASE:
+            now = self._now()
+            for src, _ in batch:
+                self._heard[src] = now
+        self._batching = True
+        for src, recs in batch:
+            for typ, ts, dir_, arg in recs:
+                self.n_recv[typ] += 1
+                if self._tr:
+                    self._trace(Ev.RECV, dir_, typ, src,
+                                max(self.clock, ts) + 1)
+                self._dispatch(src, typ, ts, dir_, arg)
+        self._batching = False
+        return len(batch)
+
+    # ---- odbiór wiadomości non‐blocking ----
+    def _poll(self):
+        # najpierw zbieramy wszystko, co czeka (Improbe + Mrecv: odbieramy
+        # dokładnie dopasowany komunikat, bez drugiego szukania w kolejce
+        # MPI), potem obsługujemy całą porcję
+        st = MPI.Status()
+        batch = []
+        if WIRE == "binary":
+            buf = self._pbuf
+            while True:
+                msg = self.c.Improbe(MPI.ANY_SOURCE, MPI.ANY_TAG, st)
+                if msg is None:
+                    break
+                msg.Recv([buf, MPI.INT])
+                self.bytes_recv += st.Get_count(MPI.BYTE)
+                batch.append((st.Get_source(),
+                              wire.unpack_all(buf, wire.nrec(st))))
+            return self._apply(batch)
+        while True:
+            msg = self.c.improbe(MPI.ANY_SOURCE, 0, st)
+            if msg is None:
+                break
+            typ_val, pl = msg.recv()
+            self.bytes_recv += st.Get_count(MPI.BYTE)
+            batch.append((st.Get_source(), [(typ_val, pl["ts"], pl.get("dir"),
+                                             pl.get("arg", 0))]))
+        return self._apply(batch)
+
+    # ---- tryb event: zbieramy wszystko, co już doszło ----
+    def _drain(self):
+        if WIRE == "binary":
+            return self._drain_binary()
+        batch = []
+        while True:
+            idx, msgs = MPI.Request.testsome(self._rreqs, self._rstats)
+            if not idx:
+                return self._apply(batch)
+            for i, st, (typ_val, pl) in zip(idx, self._rstats, msgs):
+                src = self.peers[i]
+                self._rreqs[i] = self.c.irecv(self._rbufs[i], source=src, tag=0)
+                self.bytes_recv += st.Get_count(MPI.BYTE)
+                batch.append((src, [(typ_val, pl["ts"], pl.get("dir"),
+                                     pl.get("arg", 0))]))
+
+    def _drain_binary(self):
+        batch = []
+        while True:
+            idx = MPI.Request.Testsome(self._rreqs, self._rstats)
+            if not idx:
+                return self._apply(batch)
+            for i, st in zip(idx, self._rstats):
+                recs = wire.unpack_all(self._rbufs[i], wire.nrec(st))
+                self._rreqs[i].Start()   # bufor już odczytany – wystaw ponownie
+                self.bytes_recv += st.Get_count(MPI.BYTE)
+                batch.append((self.peers[i], recs))
+
+    # ---- --progress thread: pętla wątku postępu ----
+    def _progress_loop(self):
+        # jak _serve w trybie event, ale bez cond: po każdej porcji
+        # komunikatów budzimy czekających w _serve (cond mógł się spełnić)
+        nap = IDLE_MIN
+        while True:
+            with self._cv:
+                if self._stop:
+                    return
+                self.polls += 1
+                if self._drain():
+                    nap = IDLE_MIN
+                    self._cv.notify_all()
+                else:
+                    self.empty_polls += 1
+                    nap = min(nap * 2, IDLE_MAX)
+                if self._out or self._ack_due:
+                    self._flush()
+                if LEASE and self._watch():
+                    self._cv.notify_all()  # wykluczony w tunelu wychodzi
+                wake = min(self._ack_due.values(), default=None)
+            now = time.time()
+            time.sleep(nap if wake is None else max(0.0, min(nap, wake - now)))
+
+    def _stop_progress(self):
+        if self._progress is None:
+            return
+        with self._cv:
+            self._stop = True
+        self._progress.join()
+        self._progress = None
+
+    # ---- obsługa komunikatów aż do spełnienia cond() albo chwili until ----
+    def _serve(self, until=None, cond=None):
+        if PROGRESS == "thread":
+            # komunikaty obsługuje wątek postępu; tu tylko czekamy na
+            # powiadomienie (wait zwalnia _cv, także zajęty rekurencyjnie)
+            with self._cv:
+                while cond is None or not cond():
+                    if until is None:
+                        self._cv.wait()
+                        continue
+                    left = until - time.time()
+                    if left <= 0:
+                        return False
+                    self._cv.wait(left)
+                return True
+
+        if PROGRESS == "poll":
+            nap = 0.001 if cond is not None else 0.005
+            while True:
+                self.polls += 1
+                if not self._poll():
+                    self.empty_polls += 1
+                if self._out or self._ack_due:
+                    self._flush()
+                if LEASE:
+                    self._watch()
+                if cond is not None and cond():
+                    return True
+                if until is not None and time.time() >= until:
+                    return False
+                time.sleep(nap)
+
+        # MPI_Wait w Open MPI kręci się aktywnie, więc zamiast blokować się
+        # w Waitany śpimy krótko między Testsome; drzemka rośnie tylko,
+        # gdy nic nie przychodzi, i nigdy nie przekracza until.
+        nap = IDLE_MIN
+        while True:
+            self.polls += 1
+            if self._drain():
+                nap = IDLE_MIN
+            else:
+                self.empty_polls += 1
+            if self._out or self._ack_due:
+                self._flush()
+            if LEASE:
+                self._watch()
+            if cond is not None and cond():
+                return True
+            now = time.time()
+            if until is not None and now >= until:
+                return False
+            wake = until
+            if self._ack_due:
+                due = min(self._ack_due.values())
+                wake = due if wake is None else min(wake, due)
+            time.sleep(nap if wake is None else max(0.0, min(nap, wake - now)))
+            nap = min(nap * 2, IDLE_MAX)
+
+    def _cancel_recvs(self):
+        MPI.Request.Waitall(self._wave)
+        self._wave.clear()
+        for r in self._rreqs:
+            r.Cancel()
+        MPI.Request.Waitall(self._rreqs)
+        if WIRE == "binary":
+            for r in self._rreqs:
+                r.Free()
+        self._rreqs = []
+
+    # ---- wejście / wyjście z tunelu ----
+    def enter(self, d: DIR):
+        with self._cv:
+            self._enter(d)
+
+    def _enter(self, d):
+        t_req = None
+        while True:
+            if self._expelled:
+                self._rejoin()
+            self._request(d)
+            if t_req is None:
+                t_req = self._t_req
+            if self._fault_due("pause"):
+                # --fault pause: stoimy z wysłanym REQUEST, nie obsługując
+                # nikogo (wątek postępu też czeka na _cv)
+                _log(self.id, self.clock, f"AWARIA (pause {FAULT[3]} s)")
+                time.sleep(FAULT[3])
+            self._serve(cond=lambda: self.should_terminate or self._expelled
+                        or self._ready())
+            if not self._expelled:
+                break
+        self._t_req = t_req            # czekanie liczymy od pierwszego żądania
+        if self.should_terminate:
+            return  # natychmiast wyjdź, jeśli dostaliśmy TERMINATE
+        self._admit()
+
+    # części enter() bez czekania – gate_sim woła je z pętli zdarzeń
+    def _request(self, d):
+        self.state, self.wantDir = State.WANTED, d
+        self._t_req, self._t_acked = self._now(), None
+        self._ack_scan = 0
+        ts = self._tick()
+        self.reqTS = self.ackTS = ts
+        self._req_view = self.view
+        # ACK tylko od członków; kto dołączy później, dostanie nasz wpis w SYNC
+        for p in self.peers:
+            self.Acked[p] = not self.active[p]
+
+        key = POLICY.key(ts, d.value)
+        self._floor = POLICY.floor(key)
+        self.Q.push(key, self.id, d.value)
+        # ta sama reguła, którą peery stosują do naszego REQUEST (tunel
+        # pusty, czoło innego koloru); bez niej ostatni członek bramy
+        # czekałby na komunikat, który przestawi mu kierunek
+        head_dir = self.Q.head_dir()
+        if head_dir != self.gateDir.value:
+            self.gateDir = DIR(head_dir)
+            self._flipped(head_dir)
+        self._bcast(MType.REQUEST, ts, d.value)
+        _log(self.id, self.clock, f"Staram się o {d.name}")
+
+    def _ready(self):
+        # warunek: od wszystkich aktywnych mamy ACK i mamy kolejkę pod gateDir
+        peers, k = self.peers, self._ack_scan
+        if k < len(peers):
+            # Acked zmienia się w czasie czekania tylko w jedną stronę,
+            # a kto dołączy (active), ma Acked od _request – sprawdzonych
+            # peerów nie skanujemy ponownie
+            while k < len(peers) and (self.Acked[peers[k]]
+                                      or not self.active[peers[k]]):
+                k += 1
+            self._ack_scan = k
+            if k < len(peers):
+                return False
+            if self._t_acked is None:
+                self._t_acked = self._now()
+        if not self._my_turn():
+            return False
+        if self._floor is not None and self.ackTS < self._floor:
+            self._close_epoch()
+            return False
+        return True
+
+    def _close_epoch(self):
+        # wyprzedzamy starsze żądania (gate_policy): drugi REQUEST każe
+        # peerom przesunąć zegar za floor, a nowe ACK potwierdzają, że
+        # ich następne żądania będą już za nami
+        self.ackTS = self._floor
+        self._ack_scan = 0
+        for p in self.peers:
+            self.Acked[p] = not self.active[p]
+        self.epochs_closed += 1
+        self._bcast(MType.REQUEST, self._tick(), self.wantDir.value)
+
+    def _admit(self):
+        now = self._now()
+        self.wait_ack += self._t_acked - self._t_req
+        self.wait_turn += now - self._t_acked
+        self._held()
+
+    def _held(self):
+        self.state = State.HELD
+        if self._recovering:
+            # pierwsze wejście po wykluczeniu peera, na którego czekaliśmy
+            self._recovering = False
+            self.recover_at = self._now()
+        w = self._now() - self._t_req
+        self.wait_sum += w
+        self.wait_max = max(self.wait_max, w)
+        if self._tr:
+            d = self.wantDir.value
+            self._tr.rec(self._t_req, self.reqTS, Ev.WANT, d)
+            self._trace(Ev.ENTER, d)
+        _log(self.id, self.clock, "==> WCHODZĘ <==")
+
+    def leave(self):
+        with self._cv:
+            self._leave()
+
+    def _leave(self):
+        # usuwamy własny wpis (reqTS, id, wantDir) z kolejki lokalnie
+        self.Q.remove_pid(self.id)
+
+        self.state = State.RELEASED
+        # log przed RELEASE: zegar wpisu poprzedza ts komunikatu, więc
+        # porządek Lamporta z logu (trace_check.py) widzi wyjście przed
+        # wejściami, które na nie czekały
+        _log(self.id, self.clock, "<== WYCHODZĘ ==>")
+        self._bcast(MType.RELEASE, self._tick(), self.gateDir.value)
+        self.passages += 1
+
+    # ---- podsumowanie: ile komunikatów kosztuje jedno przejście ----
+    def _counters(self):
+        return {"rank": self.id, "passages": self.passages,
+                "sent_recs": self.sent_recs, "sent_msgs": self.sent_msgs,
+                "sent_remote": self.sent_remote, "acks_saved": self.acks_saved,
+                "bytes_recv": self.bytes_recv, "polls": self.polls,
+                "empty_polls": self.empty_polls, "flips": self.flips,
+                "epochs_closed": self.epochs_closed,
+                "joins": self.joins, "departs": self.departs,
+                "view": self.view,
+                "suspects": self.suspects, "rejoins": self.rejoins,
+                "detect_max_s": self.detect_max,
+                "fault_at": self.fault_at, "recover_at": self.recover_at,
+                "shutdown_s": self.shutdown_s,
+                "census_waves": self.census_waves,
+                "wait_s": self.wait_sum, "wait_max_s": self.wait_max,
+                "wait_ack_s": self.wait_ack,
+                "wait_turn_s": self.wait_turn,
+                "cpu_s": time.process_time() - self._cpu0,
+                "sent": {t.name: self.n_sent[t] for t in MType if self.n_sent[t]},
+                "recv": {t.name: self.n_recv[t] for t in MType if self.n_recv[t]}}
+
+    def _report(self):
+        rows = self.c.gather(self._counters(), root=0)
+        if self.id == 0:
+            report(rows)
+
+    # ---- obciążenie: sen, tunel, kierunek (pętle run() wszystkich
+    # wariantów losują tylko tędy; bench_probe podmienia te metody) ----
+    def _think_time(self):
+        return random.uniform(0.2, 0.4)
+
+    def _tunnel_time(self):
+        return random.uniform(0.15, 0.3)
+
+    def _pick_dir(self):
+        return random.choice([DIR.A, DIR.B])
+
+    # ---- główna pętla procesu ----
+    def run(self):
+        random.seed(self.id * 1234 + int(time.time()))
+        # dzierżawy liczymy od startu pętli (po zbiorowym _topology),
+        # nie od konstruktora – ranki startują w różnych chwilach
+        self._t0 = self._alive_at = self._hb_next = self._now()
+        self._heard = [self._t0] * self.N
+
+        if not self.joined:
+            # --members K: rank K + i dołącza po (i + 1) · JOIN_AFTER s
+            self._serve(until=time.time()
+                        + JOIN_AFTER * (self.id - MEMBERS + 1))
+            self.join()
+
+        for _ in range(ITERS):
+            if self.should_terminate:
+                break  # przerwij wszystkie dalsze iteracje
+
+            _log(self.id, self.clock, "Śpię")
+            self._serve(until=time.time() + self._think_time(),
+                        cond=lambda: self.should_terminate)
+            if self.should_terminate:
+                break
+
+            self.enter(self._pick_dir())
+            if self.should_terminate:
+                break
+            if self._fault_due("crash"):
+                with self._cv:
+                    self._crash()
+                break
+
+            # tunel: symulowane przejście; wykluczony (--lease) wychodzi od
+            # razu – jego wpisu już nie ma, a drugi kierunek może wchodzić
+            self._serve(until=time.time() + self._tunnel_time(),
+                        cond=lambda: self.should_terminate or self._expelled)
+            if self.should_terminate:
+                break
+            if self._expelled:
+                _log(self.id, self.clock, "Wykluczony w tunelu – wychodzę")
+
+            with self._cv:
+                if self._tr:
+                    self._trace(Ev.LEAVE, self.wantDir.value)
+                self.leave()
+
+        if DEPART and not self.should_terminate and not self._zombie:
+            self.depart()
+        self._terminate()
+        self._stop_progress()
+        if COALESCE:
+            self._flush(force=True)
+        self._cancel_recvs()
+        self._report()
+        if self._tr:
+            self._tr.spill()
+
+        self._finalize()
+
+    # ---- koniec pracy (--termination) ----
+    def _terminate(self):
+        t0 = self._now()
+        if TERMINATION == "quiesce":
+            self._quiesce()
+        else:
+            # Jeżeli to JEST proces, który jako pierwszy dobiegł do końca
+            # pętli, wyślijmy TERMINATE. Pozostali wykryją tę flagę.
+            with self._cv:
+                if not self.should_terminate:
+                    self._bcast(MType.TERMINATE, self._tick())
+                    _log(self.id, self.clock, "TERMINATE")
+            # Poczekajmy jeszcze chwilę, żeby inne procesy przyjęły TERMINATE
+            self._serve(until=time.time() + 0.3)
+        self.shutdown_s = self._now() - t0
+
+    def _quiesce(self):
+        # rank, który skończył swoje ITERS, dalej obsługuje peerów i dokłada
+        # się do fal Iallreduce sum (wysłane, odebrane); do pierwszej fali
+        # dołącza dopiero po swojej pracy, więc ona jest też barierą
+        while True:
+            with self._cv:
+                req, tot = self._census()
+            while not self._serve(until=time.time() + IDLE_MAX, cond=req.Test):
+                pass
+            if self._quiet(tot):
+                return
+
+    def _census(self):
+        # wkład do fali; odroczone rekordy wypychamy wcześniej, żeby każdy
+        # odebrany komunikat miał już policzone odpowiedzi
+        if self._out or self._ack_due:
+            self._flush(force=True)
+        mine = array("q", [self.mpi_out, self.mpi_in])
+        tot = array("q", [0, 0])
+        self._census_buf = (mine, tot)  # żyją, dopóki fala trwa
+        self.census_waves += 1
+        return self.c.Iallreduce(mine, tot, op=MPI.SUM), tot
+
+    def _quiet(self, tot):
+        # cztery liczniki (Mattern): po pierwszej fali nikt nie zaczyna
+        # nowych żądań, zostają tylko odpowiedzi i rekordy w drodze;
+        # cisza, gdy dwie kolejne fale dały te same sumy, a wysłanych
+        # jest tyle, co odebranych – żaden komunikat nie jest w drodze
+        # i żaden już nie powstanie.  Wszyscy widzą te same sumy, więc
+        # kończą na tej samej fali.
+        cur = tuple(tot)
+        done = cur[0] == cur[1] and cur == self._census_last
+        self._census_last = cur
+        return done
+
+    def _finalize(self):
+        MPI.Finalize()
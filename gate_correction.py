@@ -13,9 +13,11 @@ Autor: Piotr <twoje_nazwisko>, 2025‑06‑06
 """
 
 from mpi4py import MPI
-import argparse, random, time, heapq
+import argparse, random, time
 from enum import Enum, auto
 
+from gate_queue import GateQueue
+
 # ---------- CLI ----------
 p = argparse.ArgumentParser()
 p.add_argument("--Y", type=int, default=3,
@@ -64,7 +66,7 @@ class Proc:
         self.wantDir = None
         self.gateDir = DIR.A           # startowy kolor bramy
         self.Acked   = [True] * self.N
-        self.Q       = []              # kopiec (ts, pid, dir)
+        self.Q       = GateQueue()     # kolejka (ts, pid, dir) z indeksem pid
         self.reqTS   = None            # ts naszego ostatniego REQUEST
         self.active  = [True] * self.N # śledzenie TERMINATE
 
@@ -87,31 +89,18 @@ class Proc:
 
     # ---- myTurn poprawiona zgodnie z pseudokodem ----
     def _my_turn(self):
-        if not self.Q:
-            return False
-        sortedQ = sorted(self.Q)  # rosnąco po (ts,pid,dir)
-        head_ts, head_pid, head_dir = sortedQ[0]
-        # Jeśli czołowy nie pasuje do gateDir, od razu False
-        if DIR(head_dir) != self.gateDir:
-            return False
-        # Zlicz wpisy tego samego koloru i szukaj, czy wśród nich jest nasz pid
-        pos = 0
-        for ts_i, pid_i, dir_i in sortedQ:
-            if DIR(dir_i) != self.gateDir:
-                break
-            pos += 1
-            if pid_i == self.id:
-                return pos <= Y
-        return False
+        # czy nasz wpis jest wśród pierwszych Y wpisów gateDir od czoła kolejki
+        return self.Q.my_turn(self.id, self.gateDir.value, Y)
 
     # ---- handlery komunikatów ----
     def _h_req(self, src, ts, dir_):
         # Lamport + wstaw do kolejki
-        heapq.heappush(self.Q, (ts, src, dir_))
+        self.Q.push(ts, src, dir_)
 
         # Jeśli tunel pusty *i* czoło innego koloru, przełącz bramę
-        if self.state != State.HELD and DIR(self.Q[0][2]) != self.gateDir:
-            self.gateDir = DIR(self.Q[0][2])
+        head_dir = self.Q.head_dir()
+        if self.state != State.HELD and head_dir != self.gateDir.value:
+            self.gateDir = DIR(head_dir)
             _log(self.id, self.clock,
                  f"Ustawiam bramę na {self.gateDir.name} (tunel pusty)")
 
@@ -121,16 +110,8 @@ class Proc:
         self.Acked[src] = True
 
     def _h_rel(self, src, ts, dir_):
-        # Usuwamy *wszystkie* wpisy o pid=src, niezależnie od ts:
-        to_remove = [entry for entry in self.Q if entry[1] == src]
-        if to_remove:
-            for entry in to_remove:
-                try:
-                    self.Q.remove(entry)
-                except ValueError:
-                    print("error removing")
-                    pass
-            heapq.heapify(self.Q)
+        # usuwamy wpis pochodzący od src (indeks pid -> wpis, bez skanowania Q)
+        self.Q.remove_pid(src)
 
     def _h_term(self, src):
         self.active[src] = False
@@ -160,7 +141,7 @@ class Proc:
         self.reqTS = ts
         for p in self.peers:
             self.Acked[p] = False
-        heapq.heappush(self.Q, (ts, self.id, d.value))
+        self.Q.push(ts, self.id, d.value)
         self._bcast(MType.REQUEST, dir=d.value, ts=ts)
         _log(self.id, self.clock, f"Staram się o {d.name}")
 
@@ -175,11 +156,7 @@ class Proc:
 
     def leave(self):
         # usuwamy własny wpis z kolejki lokalnie
-        try:
-            self.Q.remove((self.reqTS, self.id, self.wantDir.value))
-            heapq.heapify(self.Q)
-        except ValueError:
-            pass
+        self.Q.remove_pid(self.id)
 
         self.state = State.RELEASED
         self._bcast(MType.RELEASE, dir=self.gateDir.value, ts=self._tick())
@@ -0,0 +1,118 @@
+"""
+Hierarchiczny wariant bramy (--algorithm hier).
+
+COMM_WORLD dzielimy na węzły przez Split_type(COMM_TYPE_SHARED) (albo
+--node-size R, żeby udać kilka węzłów na jednej maszynie); liderem węzła
+jest jego najmniejszy rank.  Globalny protokół to żeton Raymonda z
+gate_token.py, ale tylko na drzewie liderów – ruch między węzłami zależy
+od liczby węzłów, nie ranków:
+• rank wysyła REQUEST z kierunkiem do swojego lidera i czeka na ACK,
+  przy wyjściu wysyła mu EXIT (komunikaty wewnątrz węzła),
+• lider zbiera żądania węzła w lokalnej kolejce FIFO i staje w kolejce
+  po żeton raz za cały węzeł,
+• z żetonem wpuszcza po kolei czekających z węzła, dopóki kierunek się
+  zgadza i jest miejsce (tokIn < Y); gdy czołowy nie pasuje, trzyma
+  żeton aż do wyjść; tura obejmuje tylko tych, którzy czekali na jej
+  początku – później przybyli stają w kolejce po żeton od nowa,
+• EXIT od członków idzie dalej do żetonu tak jak w wariancie token.
+"""
+
+import time
+from collections import deque
+
+import gate_core as core
+from gate_core import State, MType, _log
+from gate_token import TokenProc
+
+
+class HierProc(TokenProc):
+    def __init__(self, comm):
+        super().__init__(comm)
+        leaders = sorted(set(self.node_of))
+        self.leader = self.node_of[self.id]
+        self.is_leader = self.leader == self.id
+        # drzewo Raymonda tylko na liderach; członek zna wyłącznie lidera
+        i = leaders.index(self.leader)
+        self.parent = leaders[(i - 1) // 2] if i else self.id
+        self.holder = self.parent if self.is_leader else self.leader
+        self.local_q = deque()         # lider: (pid, dir) czekający w węźle
+        self._turn   = None            # ilu z local_q wpuszczamy w tej turze
+
+    # ---- lider: żeton wpuszcza cały węzeł ----
+    def _assign(self):
+        while self.holder == self.id and self.req_q:
+            nxt = self.req_q[0]
+            if nxt == self.id:
+                # tura węzła obejmuje tylko tych, którzy już czekają –
+                # inaczej zajęty węzeł nigdy nie oddałby żetonu
+                if self._turn is None:
+                    self._turn = len(self.local_q)
+                if not self._admit_local():
+                    return  # czekamy z żetonem, aż ktoś wyjdzie
+                self.req_q.popleft()
+                self._turn = None
+                if self.local_q:
+                    self.req_q.append(self.id)
+                continue
+            self.req_q.popleft()
+            self.holder = nxt
+            self.asked = False
+            self._send(nxt, MType.TOKEN, self.clock, self.tokDir, arg=self.tokIn)
+
+    def _admit_local(self):
+        while self._turn:
+            pid, d = self.local_q[0]
+            if self.tokIn and (self.tokDir != d or self.tokIn >= core.Y):
+                return False
+            self.local_q.popleft()
+            self._turn -= 1
+            if self.tokDir != d:
+                self._flipped(d)
+                _log(self.id, self.clock, f"Przestawiam bramę na {d}")
+            self.tokDir = d
+            self.tokIn += 1
+            if pid == self.id:
+                self._granted = True
+            else:
+                self._send(pid, MType.ACK, self.clock, d)
+        return True
+
+    def _demand(self):
+        # cały węzeł stoi w kolejce po żeton jednym wpisem
+        if self.id not in self.req_q:
+            self.req_q.append(self.id)
+        self._assign()
+        self._make_request()
+
+    # ---- handlery ----
+    def _h_req(self, src, ts, dir_):
+        if self.node_of[src] == self.id and src != self.id:
+            self.local_q.append((src, dir_))   # członek naszego węzła
+            self._demand()
+        else:
+            super()._h_req(src, ts, dir_)
+
+    def _h_ack(self, src, ts, arg=0):
+        self._granted = True           # lider wpuścił nas do tunelu
+
+    # ---- wejście / wyjście z tunelu ----
+    def enter(self, d):
+        self.state, self.wantDir = State.WANTED, d
+        self._t_req = time.time()
+        self.reqTS = self._tick()
+        self._granted = False
+        _log(self.id, self.clock, f"Staram się o {d.name}")
+
+        if self.is_leader:
+            self.local_q.append((self.id, d.value))
+            self._demand()
+        else:
+            self._send(self.leader, MType.REQUEST, self.reqTS, d.value)
+
+        self._serve(cond=lambda: self.should_terminate or self._granted)
+        if self.should_terminate:
+            return
+        self.gateDir = d
+        self._held()
+
+    # leave() z TokenProc: _h_exit(self.id) członka idzie do holder == lider
@@ -0,0 +1,199 @@
+"""
+Wiele niezależnych bram w jednym procesie (--algorithm multi --gates K).
+
+Zamiast K osobnych zadań gate.py (K razy więcej procesów i K pętli
+odpytujących MPI) jeden rank trzyma stan K bram – każda ma własną
+kolejkę Lamporta, kierunek, pojemność i Acked – a komunikaty wszystkich
+bram przechodzą przez jeden komunikator i jedną pętlę _serve.  Numer
+bramy jedzie w polu arg rekordu (MultiProc nie wkłada tam nic innego),
+_dispatch rozdziela rekordy po nim.
+
+Rekordy do tego samego adresata odkładamy w _out i wysyłamy razem na
+końcu obiegu pętli (do MAX_BATCH w jednym komunikacie): ACK dla kilku
+bram, RELEASE jednej i REQUEST drugiej jadą do peera jednym Send.
+
+API: enter(gate, dir) / leave(gate) – enter blokuje, ale w trakcie
+obsługuje ruch wszystkich bram.  run() prowadzi na każdej bramie osobny
+cykl sen → żądanie → tunel → wyjście, tak jakby na ranku działało K
+niezależnych badaczy; ITERS to liczba przejść przez każdą bramę.
+"""
+
+import random, time
+
+import gate_core as core
+from gate_core import Proc, State, MType, DIR, _log
+from gate_queue import GateQueue
+from gate_trace import Ev
+import gate_wire as wire
+
+
+class Gate:
+    """Stan jednej bramy widziany przez jeden proces."""
+    __slots__ = ("id", "cap", "Q", "dir", "Acked", "state", "want", "reqTS",
+                 "t_req", "t_acked", "left", "due")
+
+    def __init__(self, gid, cap, n):
+        self.id    = gid
+        self.cap   = cap               # pojemność (Y tej bramy)
+        self.Q     = GateQueue()
+        self.dir   = DIR.A             # gateDir
+        self.Acked = [True] * n
+        self.state = State.RELEASED
+        self.want  = None              # wantDir
+        self.reqTS = None
+        self.t_req = self.t_acked = None
+        self.left  = 0                 # run(): ile przejść zostało
+        self.due   = 0.0               # run(): koniec snu / tunelu
+
+
+class MultiProc(Proc):
+    def __init__(self, comm, caps=None):
+        super().__init__(comm)
+        caps = caps or [core.Y] * core.GATES
+        self.gates = [Gate(g, y, self.N) for g, y in enumerate(caps)]
+
+    # ---- wysyłanie: rekordy do jednego adresata sklejane w obiegu ----
+    def _send(self, dst, typ, ts, dir_=None, arg=0):
+        if core.WIRE != "binary":
+            return super()._send(dst, typ, ts, dir_, arg)
+        self._tick()
+        self.sent_recs += 1
+        self.n_sent[typ] += 1
+        if self._tr:
+            self._trace(Ev.SEND, dir_, typ, dst, ts)
+        recs = self._out.setdefault(dst, [])
+        recs.append((typ, ts, dir_, arg))
+        if len(recs) == wire.MAX_BATCH:
+            self._flush_dst(dst)
+
+    def _gbcast(self, g, typ, ts, dir_=None):
+        for p in self.peers:
+            self._send(p, typ, ts, dir_, g.id)
+
+    # ---- handlery (jak w Proc, ale na stanie bramy g) ----
+    def _turn_to(self, g, head_dir, msg):
+        g.dir = DIR(head_dir)
+        self._flipped(head_dir, gate=g.id)
+        _log(self.id, self.clock, f"{msg} {g.id} na {g.dir.name}")
+
+    def _h_req(self, g, src, ts, dir_):
+        g.Q.push(ts, src, dir_)
+        head_dir = g.Q.head_dir()
+        if g.state != State.HELD and head_dir != g.dir.value:
+            self._turn_to(g, head_dir, "Ustawiam bramę")
+        self._send(src, MType.ACK, self.clock, arg=g.id)
+
+    def _h_rel(self, g, src):
+        g.Q.remove_pid(src)
+        head_dir = g.Q.head_dir()
+        if head_dir is not None and head_dir != g.dir.value:
+            self._turn_to(g, head_dir, "Przestawiam bramę")
+
+    def _dispatch(self, src, typ, ts, dir_, arg=0):
+        self._upd(ts)
+        if typ == MType.TERMINATE:
+            self._h_term(src)
+            return
+        g = self.gates[arg]
+        if typ == MType.REQUEST:
+            self._h_req(g, src, ts, dir_)
+        elif typ == MType.ACK:
+            g.Acked[src] = True
+        elif typ == MType.RELEASE:
+            self._h_rel(g, src)
+
+    # ---- wejście / wyjście: część nieblokująca ----
+    def _request(self, g, d):
+        g.state, g.want = State.WANTED, d
+        g.t_req, g.t_acked = time.time(), None
+        g.reqTS = ts = self._tick()
+        for p in self.peers:
+            g.Acked[p] = False
+        g.Q.push(ts, self.id, d.value)
+        # jak w Proc._request: nasz wpis może stanąć na czele w drugim
+        # kierunku, a komunikat, który przestawiłby bramę, może nie przyjść
+        head_dir = g.Q.head_dir()
+        if head_dir != g.dir.value:
+            self._turn_to(g, head_dir, "Ustawiam bramę")
+        self._gbcast(g, MType.REQUEST, ts, d.value)
+        _log(self.id, self.clock, f"Staram się o {d.name} (brama {g.id})")
+
+    def _ready(self, g):
+        if g.t_acked is None:
+            if not all(g.Acked[p] or not self.active[p] for p in self.peers):
+                return False
+            g.t_acked = time.time()
+        return g.Q.my_turn(self.id, g.dir.value, g.cap)
+
+    def _held_g(self, g):
+        g.state = State.HELD
+        now = time.time()
+        self.wait_sum += now - g.t_req
+        self.wait_max = max(self.wait_max, now - g.t_req)
+        self.wait_ack += g.t_acked - g.t_req
+        self.wait_turn += now - g.t_acked
+        if self._tr:
+            self._tr.rec(g.t_req, g.reqTS, Ev.WANT, g.want.value, peer=g.id,
+                         gate=g.id)
+            self._trace(Ev.ENTER, g.want.value, peer=g.id, gate=g.id)
+        _log(self.id, self.clock, f"==> WCHODZĘ <== (brama {g.id})")
+
+    # ---- API ----
+    def enter(self, gate, d):
+        g = self.gates[gate]
+        self._request(g, d)
+        self._serve(cond=lambda: self.should_terminate or self._ready(g))
+        if not self.should_terminate:
+            self._held_g(g)
+
+    def leave(self, gate):
+        g = self.gates[gate]
+        if self._tr:
+            self._trace(Ev.LEAVE, g.want.value, peer=g.id, gate=g.id)
+        g.Q.remove_pid(self.id)
+        g.state = State.RELEASED
+        _log(self.id, self.clock, f"<== WYCHODZĘ ==> (brama {g.id})")
+        self._gbcast(g, MType.RELEASE, self._tick(), g.dir.value)
+        self.passages += 1
+
+    # ---- główna pętla: K niezależnych cykli na jednym progresie ----
+    def run(self):
+        random.seed(self.id * 1234 + int(time.time()))
+        now = time.time()
+        for g in self.gates:
+            g.left = core.ITERS
+            g.due = now + self._think_time()
+
+        def wake():
+            return any(g.state is State.WANTED and self._ready(g)
+                       for g in self.gates)
+
+        while not self.should_terminate:
+            now = time.time()
+            for g in self.gates:
+                if g.state is State.WANTED and self._ready(g):
+                    self._held_g(g)
+                    g.due = now + self._tunnel_time()
+                elif g.state is State.HELD and now >= g.due:
+                    self.leave(g.id)
+                    g.left -= 1
+                    g.due = now + self._think_time()
+                elif (g.state is State.RELEASED and g.left
+                      and now >= g.due):
+                    self._request(g, self._pick_dir())
+            if not any(g.left for g in self.gates):
+                break
+            timers = [g.due for g in self.gates
+                      if g.state is State.HELD
+                      or (g.state is State.RELEASED and g.left)]
+            self._serve(until=min(timers) if timers else None,
+                        cond=lambda: self.should_terminate or wake())
+
+        self._terminate()
+        self._flush(force=True)
+        self._cancel_recvs()
+        self._report()
+        if self._tr:
+            self._tr.spill()
+
+        self._finalize()
@@ -5,9 +5,11 @@ Zmodyfikowane: brak sygnału TERMINATE, wszystkie procesy kończą pełne iterac
 """
 
 from mpi4py import MPI
-import argparse, random, time, heapq
+import argparse, random, time
 from enum import Enum, auto
 
+from gate_queue import GateQueue
+
 # ---------- CLI ----------
 p = argparse.ArgumentParser()
 p.add_argument("--Y", type=int, default=3,
@@ -54,7 +56,7 @@ class Proc:
         self.wantDir = None
         self.gateDir = DIR.A           # startowy kierunek bramy
         self.Acked   = [True] * self.N
-        self.Q       = []              # kopiec (ts, pid, dir)
+        self.Q       = GateQueue()     # kolejka (ts, pid, dir) z indeksem pid
         self.reqTS   = None            # timestamp naszego REQUEST
 
     # ---- Lamport ----
@@ -76,30 +78,17 @@ class Proc:
 
     # ---- sprawdzenie, czy mogę wejść (myTurn) ----
     def _my_turn(self):
-        if not self.Q:
-            return False
-        sortedQ = sorted(self.Q)  # uporządkowane rosnąco po (ts, pid, dir)
-        head_ts, head_pid, head_dir = sortedQ[0]
-        # jeśli czołowy wpis nie ma kierunku gateDir, od razu False
-        if DIR(head_dir) != self.gateDir:
-            return False
-        # zlicz wpisy o tym samym kierunku aż do siebie
-        pos = 0
-        for ts_i, pid_i, dir_i in sortedQ:
-            if DIR(dir_i) != self.gateDir:
-                break
-            pos += 1
-            if pid_i == self.id:
-                return pos <= Y
-        return False
+        # czy nasz wpis jest wśród pierwszych Y wpisów gateDir od czoła kolejki
+        return self.Q.my_turn(self.id, self.gateDir.value, Y)
 
     # ---- handlery ----
     def _h_req(self, src, ts, dir_):
         # aktualizacja zegara była już w _poll()
-        heapq.heappush(self.Q, (ts, src, dir_))
+        self.Q.push(ts, src, dir_)
         # jeżeli tunel jest pusty (self.state != HELD) i czołowy wpis = inny kierunek:
-        if self.state != State.HELD and DIR(self.Q[0][2]) != self.gateDir:
-            self.gateDir = DIR(self.Q[0][2])
+        head_dir = self.Q.head_dir()
+        if self.state != State.HELD and head_dir != self.gateDir.value:
+            self.gateDir = DIR(head_dir)
             _log(self.id, self.clock,
                  f"Ustawiam bramę na {self.gateDir.name} (tunel pusty)")
 
@@ -109,19 +98,13 @@ class Proc:
         self.Acked[src] = True
 
     def _h_rel(self, src, ts, dir_):
-        # usuwamy wszystkie wpisy pochodzące od src (pid = src)
-        to_remove = [entry for entry in self.Q if entry[1] == src]
-        for entry in to_remove:
-            try:
-                self.Q.remove(entry)
-            except ValueError:
-                pass
-        if to_remove:
-            heapq.heapify(self.Q)
+        # usuwamy wpis pochodzący od src (indeks pid -> wpis, bez skanowania Q)
+        self.Q.remove_pid(src)
 
         # po usunięciu: jeśli Q ma czołowy inny kierunek, zmień gateDir
-        if self.Q and DIR(self.Q[0][2]) != self.gateDir:
-            self.gateDir = DIR(self.Q[0][2])
+        head_dir = self.Q.head_dir()
+        if head_dir is not None and head_dir != self.gateDir.value:
+            self.gateDir = DIR(head_dir)
             _log(self.id, self.clock,
                  f"Przestawiam bramę na {self.gateDir.name}")
 
@@ -150,7 +133,7 @@ class Proc:
         for p in self.peers:
             self.Acked[p] = False
 
-        heapq.heappush(self.Q, (ts, self.id, d.value))
+        self.Q.push(ts, self.id, d.value)
         self._bcast(MType.REQUEST, dir=d.value, ts=ts)
         _log(self.id, self.clock, f"Staram się o {d.name}")
 
@@ -165,11 +148,7 @@ class Proc:
 
     def leave(self):
         # usuwamy własny wpis (reqTS, id, wantDir) z kolejki lokalnie
-        try:
-            self.Q.remove((self.reqTS, self.id, self.wantDir.value))
-            heapq.heapify(self.Q)
-        except ValueError:
-            pass
+        self.Q.remove_pid(self.id)
 
         self.state = State.RELEASED
         self._bcast(MType.RELEASE, dir=self.gateDir.value, ts=self._tick())
@@ -3,9 +3,11 @@
 """
 
 from mpi4py import MPI
-import argparse, random, time, heapq
+import argparse, random, time
 from enum import Enum, auto
 
+from gate_queue import GateQueue
+
 # ---------- CLI ----------
 p = argparse.ArgumentParser()
 p.add_argument("--Y", type=int, default=3,
@@ -53,7 +55,7 @@ class Proc:
         self.wantDir = None
         self.gateDir = DIR.A           # startowy kierunek bramy (dowolnie A)
         self.Acked   = [True] * self.N
-        self.Q       = []              # kopiec (ts, pid, dir)
+        self.Q       = GateQueue()     # kolejka (ts, pid, dir) z indeksem pid
         self.reqTS   = None            # timestamp naszego REQUEST
         self.active  = [True] * self.N # czy proces jeszcze nie dał TERMINATE
         self.should_terminate = False  # flaga, by przerwać natychmiast
@@ -77,32 +79,19 @@ class Proc:
 
     # ---- myTurn: czy mogę wejść? ----
     def _my_turn(self):
-        if not self.Q:
-            return False
-        sortedQ = sorted(self.Q)  # rosnąco po (ts,pid,dir)
-        head_ts, head_pid, head_dir = sortedQ[0]
-        # 1) jeśli czołowy nie pasuje do gateDir → nie mogę wejść
-        if DIR(head_dir) != self.gateDir:
-            return False
-        # 2) zlicz, ile wpisów o gateDir stoi do mojego pid
-        pos = 0
-        for ts_i, pid_i, dir_i in sortedQ:
-            if DIR(dir_i) != self.gateDir:
-                break
-            pos += 1
-            if pid_i == self.id:
-                return (pos <= Y)
-        return False
+        # czy nasz wpis jest wśród pierwszych Y wpisów gateDir od czoła kolejki
+        return self.Q.my_turn(self.id, self.gateDir.value, Y)
 
     # ---- handler dla REQUEST ----
     def _h_req(self, src, ts, dir_):
         # 1) zaktualizowany clock już był w _poll()
-        heapq.heappush(self.Q, (ts, src, dir_))
+        self.Q.push(ts, src, dir_)
 
         # 2) jeśli tunel pusty (tj. żadnego HELD) i czołowy <normalnie> inny kolor:
-        if self.state != State.HELD and DIR(self.Q[0][2]) != self.gateDir:
+        head_dir = self.Q.head_dir()
+        if self.state != State.HELD and head_dir != self.gateDir.value:
             # przełącz tunel na kolor czoła
-            self.gateDir = DIR(self.Q[0][2])
+            self.gateDir = DIR(head_dir)
             _log(self.id, self.clock,
                  f"Ustawiam bramę na {self.gateDir.name} (tunel pusty)")
 
@@ -115,19 +104,13 @@ class Proc:
 
     # ---- handler dla RELEASE ----
     def _h_rel(self, src, ts, dir_):
-        # 1) usuwamy wszystkie wpisy danego procesu (pid=src), bo każdy REQUEST dubluje się po zmianach
-        to_remove = [entry for entry in self.Q if entry[1] == src]
-        for entry in to_remove:
-            try:
-                self.Q.remove(entry)
-            except ValueError:
-                pass
-        if to_remove:
-            heapq.heapify(self.Q)
+        # usuwamy wpis pochodzący od src (indeks pid -> wpis, bez skanowania Q)
+        self.Q.remove_pid(src)
 
         # 2) jeśli kolejka nie jest pusta i czołowy wpis ma inny kolor niż gateDir, przełącz
-        if self.Q and DIR(self.Q[0][2]) != self.gateDir:
-            self.gateDir = DIR(self.Q[0][2])
+        head_dir = self.Q.head_dir()
+        if head_dir is not None and head_dir != self.gateDir.value:
+            self.gateDir = DIR(head_dir)
             _log(self.id, self.clock,
                  f"Przestawiam bramę na {self.gateDir.name}")
 
@@ -166,7 +149,7 @@ class Proc:
             self.Acked[p] = False
 
         # wrzucamy własny REQUEST do kolejki i rozsyłamy
-        heapq.heappush(self.Q, (ts, self.id, d.value))
+        self.Q.push(ts, self.id, d.value)
         self._bcast(MType.REQUEST, dir=d.value, ts=ts)
         _log(self.id, self.clock, f"Staram się o {d.name}")
 
@@ -186,11 +169,7 @@ class Proc:
     # ---- procedura opuszczenia tunelu ----
     def leave(self):
         # usuwamy lokalnie SWÓJ wpis (reqTS, id, wantDir)
-        try:
-            self.Q.remove((self.reqTS, self.id, self.wantDir.value))
-            heapq.heapify(self.Q)
-        except ValueError:
-            pass
+        self.Q.remove_pid(self.id)
 
         self.state = State.RELEASED
         # rozsyłamy RELEASE aktualnego gateDir
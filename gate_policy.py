@@ -0,0 +1,87 @@
+"""
+Polityki przełączania kierunku bramy (--dir-policy).
+
+Kolejka GateQueue porządkuje wpisy po pierwszym polu, nie zaglądając
+w nie, więc polityka to klucz sortowania żądania liczony z jego
+(ts, dir) – ten sam na każdym ranku, bez dodatkowego stanu.  Brama
+nadal wpuszcza czoło kolejki i przestawia się na kierunek czoła;
+polityka decyduje tylko, kto jest przed kim.
+
+Bezpieczeństwo: proces wchodzi, mając ACK od wszystkich, i musi wtedy
+znać każde żądanie o mniejszym kluczu.  Dopóki klucz rośnie z ts,
+wystarcza reguła Lamporta – późniejsze żądania peera mają ts większy
+niż jego ACK, więc i większy klucz.  Gdy polityka stawia nowsze żądania
+przed starszymi, starsze (te, które można wyprzedzić) podaje
+floor(klucz): zanim wejdzie, wysyła jeszcze raz REQUEST („zamknięcie
+epoki”), a peer przed odpowiedzią przesuwa zegar za floor – każde jego
+następne żądanie ma wtedy klucz większy niż nasz.  Zamknięcie kosztuje 2(N-1)
+komunikatów i jest wysyłane dopiero, gdy żądanie doszło do czoła, więc
+do tej pory kierunek czoła zbiera kolejne żądania swojej epoki.
+
+• fifo     – klucz ts (jak dotąd): brama zmienia kierunek, gdy tylko
+             czoło kolejki ma inny kolor; przy mieszanym ruchu A/B fazy
+             bywają jedno-, dwuosobowe.
+• epoch:W  – czas Lamporta dzielony na epoki po W tyknięć; w epoce
+             najpierw wszystkie żądania jednego kierunku, potem drugiego
+             (parzyste epoki: A, B, nieparzyste: B, A, więc faza na
+             granicy epok się skleja).  Żądanie czeka co najwyżej na
+             swoją i wcześniejsze epoki – to ogranicza zagłodzenie.  Zegar
+             rośnie o ~3 tyknięcia na przejście w systemie, więc W ≈ 3×
+             liczba przejść, przez które kierunek może trzymać bramę.
+"""
+
+
+class Fifo:
+    """Kolejność po (ts, pid) – przełączenie przy pierwszej zmianie koloru."""
+    name = "fifo"
+
+    def key(self, ts, dir_):
+        return ts
+
+    def floor(self, key):
+        return None
+
+
+class Epoch:
+    """Grupowanie kierunków w epokach W tyknięć zegara Lamporta.
+
+    W epoce e żądania pierwszego kierunku mają klucz (e, False, ts), więc
+    stają przed starszymi żądaniami drugiego kierunku (e, True, ts).
+    Wyprzedzane są więc żądania drugiego kierunku: peer, który już je
+    potwierdził, może potem zgłosić nowsze żądanie pierwszego kierunku
+    tej samej epoki, a ono stanie przed nimi, choć ACK go nie obejmuje.
+    Dlatego tylko one mają floor – ostatnie tyknięcie epoki e.  Po
+    zamknięciu epoki zegar każdego peera jest za floor, jego następne
+    żądania należą do epoki ≥ e + 1 i mają większy klucz, a ACK znów
+    znaczy „znam każde żądanie o mniejszym kluczu”.  Żądania pierwszego
+    kierunku wyprzedzić nie można – nowsze z tej samej epoki ma większy
+    ts albo drugi kierunek, z późniejszej większą epokę – więc nie
+    zamykają epoki.
+    """
+
+    def __init__(self, width):
+        if width < 1:
+            raise ValueError("epoch:W wymaga W >= 1")
+        self.w = width
+        self.name = f"epoch:{width}"
+
+    def key(self, ts, dir_):
+        # (epoka, czy drugi kierunek epoki, ts)
+        e = ts // self.w
+        return (e, dir_ != ("A" if e % 2 == 0 else "B"), ts)
+
+    def floor(self, key):
+        # drugi kierunek epoki mogą wyprzedzić nowsze żądania pierwszego
+        # kierunku tej epoki – zanim wejdziemy, peery muszą wyjść poza nią
+        e, second, _ = key
+        return (e + 1) * self.w - 1 if second else None
+
+
+def parse(spec):
+    """fifo | epoch:W  ->  obiekt polityki."""
+    kind, _, val = spec.partition(":")
+    if kind == "fifo" and not val:
+        return Fifo()
+    if kind == "epoch" and val.isdigit():
+        return Epoch(int(val))
+    raise ValueError(f"nieznana polityka kierunku: {spec!r}")
@@ -0,0 +1,127 @@
+"""
+Kolejka żądań bramy – uporządkowane wpisy (ts, pid, dir) z indeksem pid -> wpis.
+
+Zamiast sortować całą kolejkę przy każdym sprawdzeniu myTurn trzymamy
+osobną posortowaną listę dla każdego kierunku oraz słownik pid -> wpis:
+• wstawienie / usunięcie wpisu to bisect po liście jednego kierunku,
+• czoło kolejki to minimum z czół list kierunków,
+• długość prefiksu jednego kierunku od czoła i pozycja procesu w tym
+  prefiksie to po jednym bisect – nie trzeba przechodzić całej kolejki.
+
+Każdy proces ma w kolejce co najwyżej jeden wpis (kanały MPI są FIFO,
+więc RELEASE zawsze dociera przed kolejnym REQUEST tego samego nadawcy).
+
+Wpis zbiorczy (push z n > 1 – kilku badaczy z jednego ranku w jednym
+REQUEST) zajmuje w myTurn n z cap miejsc; wagi trzymamy osobno, więc
+kolejka bez takich wpisów liczy myTurn jak dotąd.
+"""
+
+from bisect import bisect_left, insort
+
+
+class GateQueue:
+    __slots__ = ("_by_dir", "_by_pid", "_w")
+
+    def __init__(self, dirs=("A", "B")):
+        self._by_dir = {d: [] for d in dirs}  # kierunek -> posortowane wpisy
+        self._by_pid = {}                     # pid -> wpis (ts, pid, dir)
+        self._w = {}                          # pid -> n, tylko dla n > 1
+
+    def __len__(self):
+        return len(self._by_pid)
+
+    def __bool__(self):
+        return bool(self._by_pid)
+
+    def __contains__(self, pid):
+        return pid in self._by_pid
+
+    def __iter__(self):
+        # pełna kolejka w porządku (ts, pid) – tylko do logów / debugowania
+        return iter(sorted(self._by_pid.values()))
+
+    def get(self, pid):
+        return self._by_pid.get(pid)
+
+    # ---- modyfikacje ----
+    def push(self, ts, pid, dir_, n=1):
+        old = self._by_pid.get(pid)
+        if old is not None:
+            self._drop(old)
+        e = (ts, pid, dir_)
+        insort(self._by_dir[dir_], e)
+        self._by_pid[pid] = e
+        if n > 1:
+            self._w[pid] = n
+        return e
+
+    def remove_pid(self, pid):
+        """Usuwa wpis procesu pid; zwraca usunięty wpis albo None."""
+        e = self._by_pid.pop(pid, None)
+        self._w.pop(pid, None)
+        if e is not None:
+            lst = self._by_dir[e[2]]
+            del lst[bisect_left(lst, e)]
+        return e
+
+    def _drop(self, e):
+        del self._by_pid[e[1]]
+        self._w.pop(e[1], None)
+        lst = self._by_dir[e[2]]
+        del lst[bisect_left(lst, e)]
+
+    # ---- zapytania ----
+    def head(self):
+        """Najstarszy wpis (ts, pid, dir) albo None, gdy kolejka pusta."""
+        best = None
+        for lst in self._by_dir.values():
+            if lst and (best is None or lst[0] < best):
+                best = lst[0]
+        return best
+
+    def head_dir(self):
+        h = self.head()
+        return None if h is None else h[2]
+
+    def _run_end(self, dir_):
+        # pierwszy wpis innego kierunku – koniec prefiksu dir_ od czoła
+        end = None
+        for d, lst in self._by_dir.items():
+            if d != dir_ and lst and (end is None or lst[0] < end):
+                end = lst[0]
+        return end
+
+    def prefix_len(self, dir_=None):
+        """Ile wpisów kierunku dir_ stoi od czoła kolejki bez przerwy.
+
+        Bez argumentu liczony jest prefiks kierunku czoła."""
+        if dir_ is None:
+            dir_ = self.head_dir()
+            if dir_ is None:
+                return 0
+        lst = self._by_dir[dir_]
+        end = self._run_end(dir_)
+        return len(lst) if end is None else bisect_left(lst, end)
+
+    def count(self, dir_):
+        return len(self._by_dir[dir_])
+
+    def my_turn(self, pid, gate_dir, cap):
+        """Czy wpis pid jest wśród pierwszych cap wpisów kierunku gate_dir
+        w nieprzerwanym prefiksie od czoła kolejki (myTurn z pseudokodu)."""
+        e = self._by_pid.get(pid)
+        if e is None or e[2] != gate_dir:
+            return False
+        end = self._run_end(gate_dir)
+        if end is not None and end < e:
+            return False  # przed nami stoi ktoś w przeciwnym kierunku
+        lst = self._by_dir[gate_dir]
+        k = bisect_left(lst, e)
+        if k >= cap or not self._w:
+            return k < cap
+        # wpisy zbiorcze: sumujemy wagi co najwyżej cap wpisów przed nami
+        w = self._w
+        used = w.get(pid, 1)
+        for _, p, _ in lst[:k]:
+            used += w.get(p, 1)
+        return used <= cap
@@ -0,0 +1,271 @@
+"""
+Wariant bramy z kworami Maekawy (--algorithm quorum).
+
+Ranki leżą wierszami w siatce k × k (k = ⌈√N⌉, ostatni wiersz może być
+niepełny).  Kworum procesu to jego wiersz i kolumna – ok. 2√N arbitrów,
+a każde dwa kwora mają wspólny element.  (Płaszczyzna rzutowa dałaby
+kwora rzędu √N, ale istnieje tylko dla N = q² + q + 1, q – potęga liczby
+pierwszej; siatka działa dla każdego N z Get_size().)
+
+Każdy arbiter ma jeden głos.  Zgłaszający wysyła REQUEST tylko do
+swojego kworum i dostaje GRANT albo FAILED; gdy przychodzi żądanie
+starsze niż to, które trzyma głos, arbiter pyta posiadacza INQUIRE,
+a ten oddaje głos (YIELD), jeśli sam dostał już gdzieś FAILED – tak
+Maekawa unika zakleszczenia.  Komplet głosów daje wyłączność tylko na
+decyzję „wchodzę”, nie na cały tunel:
+• stan bramy (ile wejść łącznie, kierunek) jedzie z głosem: GRANT niesie
+  stan znany arbitrowi, a RELEASE po wejściu rozsyła nowy; dwa kwora
+  się przecinają, więc najświeższy stan zawsze do nas dotrze,
+• wyjścia to rosnące liczniki: wychodzący wysyła EXIT do swojego kworum.
+  Wyjście p liczy dla zgłaszającego q dokładnie jeden arbiter – komórka
+  (wiersz p, kolumna q), a gdy jej nie ma, (wiersz q, kolumna p) – i
+  podaje sumę w rekordzie EXITS doklejonym do GRANT,
+• w tunelu jest (wejścia − wyjścia); gdy kierunek się nie zgadza albo
+  miejsc brak, zgłaszający trzyma głosy, a arbitrzy dosyłają mu EXITS
+  przy każdym wyjściu, aż tunel się zwolni.
+Bez rywalizacji przejście kosztuje ok. 4(2√N − 2) komunikatów zamiast
+3(N − 1).  Wymaga --wire binary (GRANT i EXITS idą jednym komunikatem).
+"""
+
+import math, time
+from bisect import insort
+
+import gate_core as core
+from gate_core import Proc, State, MType, DIR, _log
+from gate_trace import Ev
+
+
+# ---------- siatka kworów ----------
+def grid_side(n):
+    k = math.isqrt(n)
+    return k if k * k == n else k + 1
+
+def quorum(p, n, k):
+    """Wiersz i kolumna p w siatce k × k (bez nieistniejących komórek)."""
+    r, c = divmod(p, k)
+    row = {r * k + j for j in range(k) if r * k + j < n}
+    col = {i * k + c for i in range(k) if i * k + c < n}
+    return sorted(row | col)
+
+def counter_of(p, q, n, k):
+    """Arbiter z kworum q, który liczy dla q wyjścia procesu p."""
+    a = (p // k) * k + q % k
+    return a if a < n else (q // k) * k + p % k
+
+
+class QuorumProc(Proc):
+    def __init__(self, comm):
+        super().__init__(comm)
+        self.k = grid_side(self.N)
+        self.quorum = quorum(self.id, self.N, self.k)
+
+        # --- zgłaszający ---
+        self.granted   = set()         # arbitrzy, których głos trzymamy
+        self.failed    = False         # dostaliśmy FAILED dla bieżącego żądania
+        self.inquired  = set()         # odroczone INQUIRE (do YIELD po FAILED)
+        self.st_ent    = 0             # najświeższy stan bramy z GRANT:
+        self.st_dir    = DIR.A.value   #   ile wejść łącznie i kierunek
+        self.exits_from = {}           # arbiter -> suma wyjść, które nam liczy
+        self.n_exits   = 0             # ile razy sami wyszliśmy z tunelu
+        self._admitted = False
+
+        # --- arbiter ---
+        self.lock     = None           # (ts, pid) – komu oddaliśmy głos
+        self.waiting  = []             # posortowane (ts, pid) czekających
+        self.a_inq    = False          # INQUIRE do posiadacza już wysłane
+        self.a_failed = set()          # żądania, którym wysłaliśmy FAILED
+        self.a_ent, self.a_dir = 0, DIR.A.value
+        self.exits    = {}             # pid z naszego wiersza/kolumny -> wyjścia
+        self.clients  = self.quorum    # siatka jest symetryczna
+
+    # ---- wysyłanie: do siebie bez MPI ----
+    def _qsend(self, dst, typ, dir_=None, arg=0, ts=None, exits=None):
+        ts = self.clock if ts is None else ts
+        if dst == self.id:
+            self._dispatch(dst, typ, ts, dir_, arg)
+            if exits is not None:
+                self._dispatch(dst, MType.EXITS, ts, None, exits)
+        elif exits is None:
+            self._send(dst, typ, ts, dir_, arg)
+        else:
+            # GRANT z doklejonym EXITS – jeden komunikat protokołu
+            self._tick()
+            self.sent_recs += 1
+            self.n_sent[typ] += 1
+            self.n_sent[MType.EXITS] += 1
+            if self._tr:
+                self._trace(Ev.SEND, dir_, typ, dst, ts)
+                self._trace(Ev.SEND, None, MType.EXITS, dst, ts)
+            # rekordy czekające w _out (porcja w _apply, --coalesce) muszą
+            # wyjść przed GRANT – FAILED / INQUIRE nie może go wyprzedzić
+            if dst in self._out:
+                self._flush_dst(dst)
+            self._send_recs(dst, [(typ, ts, dir_, arg),
+                                  (MType.EXITS, ts, None, exits)])
+
+    # ---- arbiter ----
+    def _exit_sum(self, q):
+        return sum(self.exits.get(p, 0) for p in self.clients
+                   if counter_of(p, q, self.N, self.k) == self.id)
+
+    def _grant(self, req):
+        self.lock, self.a_inq = req, False
+        self.a_failed.discard(req)
+        q = req[1]
+        self._qsend(q, MType.GRANT, self.a_dir, self.a_ent,
+                    exits=self._exit_sum(q))
+
+    def _next(self):
+        self.lock = None
+        if self.waiting:
+            self._grant(self.waiting.pop(0))
+
+    def _fail(self, req):
+        if req not in self.a_failed:
+            self.a_failed.add(req)
+            self._qsend(req[1], MType.FAILED, arg=req[0])
+
+    def _h_req(self, src, ts, dir_):
+        req = (ts, src)
+        if self.lock is None:
+            self._grant(req)
+            return
+        insort(self.waiting, req)
+        if req < self.lock and req == self.waiting[0]:
+            # wyprzedza posiadacza i wszystkich czekających
+            if len(self.waiting) > 1:
+                self._fail(self.waiting[1])
+            if not self.a_inq:
+                self.a_inq = True
+                self._qsend(self.lock[1], MType.INQUIRE, arg=self.lock[0])
+        else:
+            self._fail(req)
+
+    def _h_yield(self, src, ts):
+        if self.lock == (ts, src):
+            insort(self.waiting, self.lock)
+            self._next()
+
+    def _h_release(self, src, dir_, ent):
+        if ent > self.a_ent:
+            self.a_ent, self.a_dir = ent, dir_
+        if self.lock is not None and self.lock[1] == src:
+            self._next()
+
+    def _h_exit(self, src, n):
+        if n <= self.exits.get(src, 0):
+            return
+        self.exits[src] = n
+        # posiadacz głosu może czekać na to wyjście
+        if self.lock is not None:
+            q = self.lock[1]
+            if counter_of(src, q, self.N, self.k) == self.id:
+                self._qsend(q, MType.EXITS, arg=self._exit_sum(q))
+
+    # ---- zgłaszający ----
+    def _pending(self, ts):
+        return (self.state is State.WANTED and not self._admitted
+                and ts == self.reqTS)
+
+    def _yield(self, a):
+        self.granted.discard(a)
+        self.exits_from.pop(a, None)
+        self._qsend(a, MType.YIELD, arg=self.reqTS)
+
+    def _h_grant(self, src, dir_, ent):
+        self.granted.add(src)
+        if ent > self.st_ent:
+            self.st_ent, self.st_dir = ent, dir_
+
+    def _h_exits(self, src, total):
+        if src in self.granted:        # inaczej: po YIELD albo po wejściu
+            self.exits_from[src] = total
+            self._try_admit()
+
+    def _h_failed(self, src, ts):
+        if not self._pending(ts):
+            return
+        self.failed = True
+        if len(self.granted) < len(self.quorum):
+            for a in self.inquired & self.granted:
+                self._yield(a)
+        self.inquired.clear()
+
+    def _h_inquire(self, src, ts):
+        # z kompletem głosów nie oddajemy – zwolni je RELEASE po wejściu
+        if not self._pending(ts) or src not in self.granted \
+           or len(self.granted) == len(self.quorum):
+            return
+        if self.failed:
+            self._yield(src)
+        else:
+            self.inquired.add(src)
+
+    def _try_admit(self):
+        if self._admitted or len(self.granted) < len(self.quorum):
+            return
+        d = self.wantDir.value
+        inside = self.st_ent - sum(self.exits_from.values())
+        if inside and (self.st_dir != d or inside >= core.Y):
+            return  # trzymamy głosy, aż EXITS pokażą wolny tunel
+        if self.st_dir != d:
+            self._flipped(d)
+            _log(self.id, self.clock, f"Przestawiam bramę na {d}")
+        self._admitted = True
+        self.st_ent, self.st_dir = self.st_ent + 1, d
+        self.granted.clear()
+        self.inquired.clear()
+        for a in self.quorum:
+            self._qsend(a, MType.RELEASE, d, self.st_ent)
+
+    def _dispatch(self, src, typ, ts, dir_, arg=0):
+        if typ == MType.GRANT:
+            self._upd(ts)
+            self._h_grant(src, dir_, arg)
+        elif typ == MType.EXITS:
+            self._upd(ts)
+            self._h_exits(src, arg)
+        elif typ == MType.FAILED:
+            self._upd(ts)
+            self._h_failed(src, arg)
+        elif typ == MType.INQUIRE:
+            self._upd(ts)
+            self._h_inquire(src, arg)
+        elif typ == MType.YIELD:
+            self._upd(ts)
+            self._h_yield(src, arg)
+        elif typ == MType.RELEASE:
+            self._upd(ts)
+            self._h_release(src, dir_, arg)
+        elif typ == MType.EXIT:
+            self._upd(ts)
+            self._h_exit(src, arg)
+        else:
+            super()._dispatch(src, typ, ts, dir_, arg)
+
+    # ---- wejście / wyjście z tunelu ----
+    def enter(self, d):
+        self.state, self.wantDir = State.WANTED, d
+        self._t_req = time.time()
+        self.reqTS = self._tick()
+        self.granted, self.inquired, self.exits_from = set(), set(), {}
+        self.failed = self._admitted = False
+        self.st_ent = 0
+        _log(self.id, self.clock, f"Staram się o {d.name}")
+
+        for a in self.quorum:
+            self._qsend(a, MType.REQUEST, d.value, ts=self.reqTS)
+
+        self._serve(cond=lambda: self.should_terminate or self._admitted)
+        if self.should_terminate:
+            return
+        self.gateDir = d
+        self._held()
+
+    def leave(self):
+        self.state = State.RELEASED
+        _log(self.id, self.clock, "<== WYCHODZĘ ==>")   # przed EXIT, jak w Proc
+        self.n_exits += 1
+        for a in self.quorum:
+            self._qsend(a, MType.EXIT, arg=self.n_exits)
+        self.passages += 1
@@ -0,0 +1,105 @@
+"""
+Wariant bramy w stylu Ricarta–Agrawali (--algorithm ra).
+
+Zamiast kolejki Lamporta i rozgłaszanego RELEASE proces odracza odpowiedź
+na cudze REQUEST, dopóki sam jest przed nadawcą (HELD albo WANTED
+z mniejszym (ts, pid)), a odroczone ACK wysyła dopiero przy wyjściu.
+Kierunek i pojemność Y zostają zachowane tak:
+• jesteśmy przed nadawcą w tym samym kierunku – od razu odsyłamy HOLD
+  („zajmuję jedno z Y miejsc przed tobą”), a ACK dopiero przy wyjściu,
+• jesteśmy przed nadawcą w przeciwnym kierunku – milczymy aż do wyjścia.
+Proces wchodzi, gdy od każdego peera ma ACK albo HOLD i HOLD-ów jest
+mniej niż Y.  Bez rywalizacji przejście kosztuje 2(N-1) komunikatów.
+
+Pole arg w ACK/HOLD niesie ts REQUEST, na który odpowiadamy, więc
+spóźniona odpowiedź na wcześniejsze żądanie jest ignorowana.
+"""
+
+import time
+
+import gate_core as core
+from gate_core import Proc, State, MType, _log
+
+# stan odpowiedzi peera na nasze bieżące REQUEST
+NONE, HOLD, ACK = 0, 1, 2
+
+
+class RAProc(Proc):
+    def __init__(self, comm):
+        super().__init__(comm)
+        self.reply    = [NONE] * self.N
+        self.n_ack    = 0
+        self.n_hold   = 0
+        self.deferred = []             # (pid, ts) – ACK do wysłania przy wyjściu
+
+    # ---- czy nasze żądanie ma pierwszeństwo przed (ts, pid) ----
+    def _ahead_of(self, ts, pid):
+        if self.state is State.HELD:
+            return True
+        return self.state is State.WANTED and (self.reqTS, self.id) < (ts, pid)
+
+    # ---- handlery ----
+    def _h_req(self, src, ts, dir_):
+        if not self._ahead_of(ts, src):
+            self._send(src, MType.ACK, self.clock, arg=ts)
+            return
+        if dir_ == self.wantDir.value:
+            self._send(src, MType.HOLD, self.clock, dir_, arg=ts)
+        self.deferred.append((src, ts))
+
+    def _h_ack(self, src, ts, arg=0):
+        if self.state is not State.WANTED or arg != self.reqTS:
+            return  # odpowiedź na wcześniejsze żądanie
+        prev = self.reply[src]
+        if prev == ACK:
+            return
+        if prev == HOLD:
+            self.n_hold -= 1
+        self.reply[src] = ACK
+        self.n_ack += 1
+
+    def _h_hold(self, src, arg):
+        if self.state is not State.WANTED or arg != self.reqTS \
+           or self.reply[src] != NONE:
+            return
+        self.reply[src] = HOLD
+        self.n_hold += 1
+
+    def _dispatch(self, src, typ, ts, dir_, arg=0):
+        if typ == MType.HOLD:
+            self._upd(ts)
+            self._h_hold(src, arg)
+        else:
+            super()._dispatch(src, typ, ts, dir_, arg)
+
+    # ---- wejście / wyjście z tunelu ----
+    def enter(self, d):
+        self.state, self.wantDir = State.WANTED, d
+        self._t_req = time.time()
+        self.reqTS = self._tick()
+        self.reply = [NONE] * self.N
+        self.n_ack = self.n_hold = 0
+
+        self._bcast(MType.REQUEST, self.reqTS, d.value)
+        _log(self.id, self.clock, f"Staram się o {d.name}")
+
+        # wszyscy odpowiedzieli (ACK albo HOLD) i przed nami < Y w naszym kierunku
+        need = len(self.peers)
+        def ready():
+            return self.should_terminate or (
+                self.n_ack + self.n_hold >= need and self.n_hold < core.Y)
+
+        self._serve(cond=ready)
+        if self.should_terminate:
+            return
+        self.gateDir = d
+        self._held()
+
+    def leave(self):
+        self.state = State.RELEASED
+        _log(self.id, self.clock, "<== WYCHODZĘ ==>")   # przed ACK, jak w Proc
+        ts = self._tick()
+        for pid, req_ts in self.deferred:
+            self._send(pid, MType.ACK, ts, arg=req_ts)
+        self.deferred = []
+        self.passages += 1
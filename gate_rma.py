@@ -0,0 +1,132 @@
+"""
+Wariant bramy na jednostronnym RMA (--algorithm rma).
+
+Stan bramy leży w oknie MPI na ranku 0 – trzy słowa int32:
+
+    [NEXT, SERVING, STATE]
+
+• NEXT    – licznik biletów (Fetch_and_op SUM),
+• SERVING – bilet, który jest teraz obsługiwany,
+• STATE   – kierunek * DIR_BIT + liczba badaczy w tunelu.
+
+Wejście: pobieramy bilet, czekamy, aż SERVING go pokaże, a potem
+Compare_and_swap przestawia STATE z (kierunek, n) na (d, n+1), gdy tunel
+jest pusty albo ma nasz kierunek i n < Y.  Dopiero wtedy SERVING rośnie
+i kolejny bilet może próbować – jak w kolejce Lamporta nikt nie wyprzedza
+czekającego w przeciwnym kierunku.  Wyjście to jedno Fetch_and_op(-1).
+
+Każda operacja to osobna epoka pasywna Lock(0, LOCK_SHARED) / Unlock,
+więc nikt nie musi odpowiadać na cudze komunikaty: czekający odpytuje
+okno z rosnącą drzemką (do POLL_MAX), a proces w tunelu nie robi nic.
+Jeden wspólny licznik biletów zamiast osobnych na kierunek zachowuje
+kolejność FIFO między kierunkami.  Bez rywalizacji przejście to
+ok. 5 operacji RMA.
+"""
+
+from mpi4py import MPI
+import time
+from array import array
+
+import gate_core as core
+from gate_core import Proc, State, DIR, _log
+
+NEXT, SERVING, STATE = range(3)
+DIR_BIT = 1 << 16                  # STATE = kod kierunku * DIR_BIT + zajętość
+DIR_CODE = {DIR.A: 0, DIR.B: 1}
+HOST = 0                           # rank trzymający okno
+POLL_MAX = 5e-3                    # górna granica drzemki między odczytami okna [s]
+
+
+class RMAProc(Proc):
+    def __init__(self, comm):
+        super().__init__(comm)
+        self._mem = array("i", [0] * (3 if self.id == HOST else 0))
+        self.win = MPI.Win.Create(self._mem, self._mem.itemsize, comm=comm)
+        self._o = array("i", [0])      # bufory operacji atomowych
+        self._cmp = array("i", [0])
+        self._r = array("i", [0])
+        self.rma_ops = 0               # operacje atomowe na oknie
+
+    # ---- operacje atomowe na oknie (każda = jedna podróż do HOST) ----
+    def _rma(self, slot, val, op):
+        self._o[0] = val
+        self.win.Lock(HOST, MPI.LOCK_SHARED)
+        self.win.Fetch_and_op([self._o, MPI.INT], [self._r, MPI.INT],
+                              HOST, slot, op)
+        self.win.Unlock(HOST)
+        self.rma_ops += 1
+        self.sent_recs += 1
+        self._count_msg(HOST)
+        return self._r[0]
+
+    def _get(self, slot):
+        return self._rma(slot, 0, MPI.NO_OP)
+
+    def _add(self, slot, val):
+        return self._rma(slot, val, MPI.SUM)
+
+    def _cas(self, slot, old, new):
+        self._o[0], self._cmp[0] = new, old
+        self.win.Lock(HOST, MPI.LOCK_SHARED)
+        self.win.Compare_and_swap([self._o, MPI.INT], [self._cmp, MPI.INT],
+                                  [self._r, MPI.INT], HOST, slot)
+        self.win.Unlock(HOST)
+        self.rma_ops += 1
+        self.sent_recs += 1
+        self._count_msg(HOST)
+        return self._r[0] == old
+
+    def _try_pass(self, code):
+        cur = self._get(STATE)
+        occ, dir_ = cur % DIR_BIT, cur // DIR_BIT
+        if occ and (dir_ != code or occ >= core.Y):
+            return False
+        if not self._cas(STATE, cur, code * DIR_BIT + occ + 1):
+            return False                # ktoś właśnie wyszedł – spróbuj znowu
+        if dir_ != code:
+            self._flipped(self.wantDir.value)
+            _log(self.id, self.clock, f"Przestawiam bramę na {self.wantDir.name}")
+        return True
+
+    def _wait(self, cond):
+        # każdy odczyt okna to podróż do HOST, więc drzemka rośnie dalej
+        # niż w _serve (IDLE_MAX); komunikaty (TERMINATE) zbieramy po drodze
+        nap = core.IDLE_MIN
+        while True:
+            if core.PROGRESS == "event":
+                self._drain()
+            else:
+                self._poll()
+            if self.should_terminate or cond():
+                return
+            time.sleep(nap)
+            nap = min(nap * 2, POLL_MAX)
+
+    # ---- wejście / wyjście z tunelu ----
+    def enter(self, d):
+        self.state, self.wantDir = State.WANTED, d
+        self._t_req = time.time()
+        self.reqTS = self._tick()
+        _log(self.id, self.clock, f"Staram się o {d.name}")
+
+        ticket = self._add(NEXT, 1)
+        self._wait(lambda: self._get(SERVING) == ticket)
+        if self.should_terminate:
+            return
+        code = DIR_CODE[d]
+        self._wait(lambda: self._try_pass(code))
+        if self.should_terminate:
+            return
+        self._add(SERVING, 1)
+        self.gateDir = d
+        self._held()
+
+    def leave(self):
+        self.state = State.RELEASED
+        self._add(STATE, -1)
+        self.passages += 1
+        _log(self.id, self.clock, "<== WYCHODZĘ ==>")
+
+    def _cancel_recvs(self):
+        super()._cancel_recvs()
+        self.win.Free()                # okno też jest częścią transportu
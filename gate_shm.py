@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Brama Lamporta na jednej maszynie bez mpiexec: transport przez
+multiprocessing.shared_memory zamiast MPI.
+
+    python3 gate_shm.py -n 8 --Y 3 --iterations 5 --silent
+
+Launcher tworzy jeden blok pamięci współdzielonej z pierścieniem SPSC
+(jeden pisarz, jeden czytelnik) dla każdej uporządkowanej pary
+(nadawca, odbiorca) i forkuje N procesów.  Pierścień to nagłówek
+[head, tail] (int64, każdy we własnej linii cache) i CAP slotów po
+jednym rekordzie gate_wire (REC słów int32):
+
+• nadawca wpisuje rekord do slotu head % CAP, potem publikuje head + 1,
+• odbiorca czyta sloty od tail do head, potem publikuje nowy tail.
+
+Bez blokad: head pisze tylko nadawca, tail tylko odbiorca, a wyrównane
+zapisy 8-bajtowe są niepodzielne; kolejność „rekord, potem head”
+zapewnia model pamięci x86 (TSO) – na słabszych modelach (ARM) trzeba
+by bariery.  Pełny pierścień: nadawca w międzyczasie obsługuje własne
+przychodzące, więc dwa procesy nie zakleszczą się na sobie.
+
+ShmProc to Proc z gate_core z podmienionym transportem (_transmit,
+_send_recs, _drain) – algorytm, --coalesce, --progress event / poll,
+--trace i raport są te same co w gate.py.  Raport: każdy proces oddaje
+liczniki przez multiprocessing.Queue, a launcher drukuje je jak rank 0.
+"""
+
+import multiprocessing as mp, time
+from multiprocessing import shared_memory
+
+import mpi4py
+mpi4py.rc.initialize = False          # gate.py importuje MPI; nie startujemy go
+
+import gate
+import gate_core as core
+import gate_policy
+from gate_core import Proc
+from gate_trace import Ev
+import gate_wire as wire
+
+CAP = 256                             # rekordów w pierścieniu
+HDR = 128                             # nagłówek: head i tail w osobnych liniach
+RING = HDR + CAP * wire.REC_BYTES     # bajtów na pierścień
+
+
+class Ring:
+    """Pierścień SPSC rekordów gate_wire w bloku pamięci współdzielonej."""
+    __slots__ = ("hdr", "slots")
+
+    def __init__(self, buf, off):
+        self.hdr = buf[off:off + HDR].cast("q")         # [0] head, [8] tail
+        self.slots = buf[off + HDR:off + RING].cast("i")
+
+    def full(self):
+        return self.hdr[0] - self.hdr[8] == CAP
+
+    def put(self, rec):
+        h = self.hdr[0]
+        wire.pack(self.slots, *rec, off=(h % CAP) * wire.REC)
+        self.hdr[0] = h + 1
+
+    def take(self):
+        """Wszystkie dostępne rekordy (typ, ts, dir, arg)."""
+        h, t = self.hdr[0], self.hdr[8]
+        if h == t:
+            return ()
+        recs = [wire.unpack(self.slots, (i % CAP) * wire.REC)
+                for i in range(t, h)]
+        self.hdr[8] = h
+        return recs
+
+    def release(self):
+        self.hdr.release()
+        self.slots.release()
+
+
+def ring_offset(src, dst, n):
+    return (src * n + dst) * RING
+
+
+class ShmProc(Proc):
+    def __init__(self, rank, size, shm, results):
+        self.shm, self.results = shm, results
+        self._setup(rank, size)
+        self.node_of = [0] * size      # jedna maszyna = jeden węzeł
+        self._tx = {p: Ring(shm.buf, ring_offset(rank, p, size))
+                    for p in self.peers}
+        self._rx = [(p, Ring(shm.buf, ring_offset(p, rank, size)))
+                    for p in self.peers]
+
+    # ---- transport ----
+    def _put(self, dst, rec):
+        ring = self._tx[dst]
+        while ring.full():
+            self._drain()
+            time.sleep(core.IDLE_MIN)
+        ring.put(rec)
+
+    def _transmit(self, dst, typ, ts, dir_, arg):
+        if core.COALESCE:
+            return super()._transmit(dst, typ, ts, dir_, arg)
+        self._count_msg(dst)
+        self._put(dst, (typ, ts, dir_, arg))
+
+    def _send_recs(self, dst, recs):
+        # --coalesce: sklejone rekordy jadą po kolei, ale liczymy jeden komunikat
+        for rec in recs:
+            self._put(dst, rec)
+        self._count_msg(dst)
+
+    def _drain(self):
+        handled = 0
+        for src, ring in self._rx:
+            recs = ring.take()
+            if not recs:
+                continue
+            self.bytes_recv += len(recs) * wire.REC_BYTES
+            for typ, ts, dir_, arg in recs:
+                self.n_recv[typ] += 1
+                if self._tr:
+                    self._trace(Ev.RECV, dir_, typ, src,
+                                max(self.clock, ts) + 1)
+                self._dispatch(src, typ, ts, dir_, arg)
+            handled += 1
+        return handled
+
+    _poll = _drain
+
+    def _cancel_recvs(self):
+        for ring in self._tx.values():
+            ring.release()
+        for _, ring in self._rx:
+            ring.release()
+
+    def _report(self):
+        self.results.put(self._counters())
+
+    def _finalize(self):
+        self.shm.close()
+
+
+def worker(rank, size, shm, results, args):
+    # fork: dziecko dziedziczy odwzorowanie bloku, nie podłączamy się po nazwie
+    core.configure(args)
+    ShmProc(rank, size, shm, results).run()
+
+
+def main():
+    ap = gate.p
+    ap.prog = "gate_shm.py"
+    ap.add_argument("-n", type=int, default=4, help="liczba procesów")
+    # fale liczenia idą przez Iallreduce, a tu nie ma komunikatora MPI
+    ap.set_defaults(termination="broadcast")
+    args = ap.parse_args()
+    if args.algorithm != "lamport":
+        ap.error("gate_shm.py obsługuje tylko --algorithm lamport")
+    if args.wire != "binary" or args.progress == "thread":
+        ap.error("gate_shm.py wymaga --wire binary i --progress event/poll")
+    if args.termination != "broadcast":
+        ap.error("gate_shm.py obsługuje tylko --termination broadcast")
+    if args.members or args.depart or args.fault:
+        ap.error("--members / --depart / --fault wymagają --termination "
+                 "quiesce, a tej gate_shm.py nie obsługuje")
+    if args.lease_ms:
+        ap.error("gate_shm.py nie obsługuje --lease-ms")
+    if args.bcast == "tree" and args.coalesce:
+        ap.error("--bcast tree działa tylko bez --coalesce")
+    try:
+        gate_policy.parse(args.dir_policy)
+    except ValueError as e:
+        ap.error(str(e))
+
+    ctx = mp.get_context("fork")
+    shm = shared_memory.SharedMemory(create=True, size=args.n * args.n * RING)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(r, args.n, shm, results,
+                                              args))
+             for r in range(args.n)]
+    try:
+        for pr in procs:
+            pr.start()
+        rows = sorted((results.get() for _ in procs), key=lambda r: r["rank"])
+        for pr in procs:
+            pr.join()
+    finally:
+        shm.close()
+        shm.unlink()
+    core.configure(args)
+    core.report(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Symulator zdarzeń dyskretnych dla bramy Lamporta: N wirtualnych procesów
+w jednym procesie Pythona, bez MPI i bez prawdziwego spania.
+
+    python3 gate_sim.py -n 1000 --iterations 10 --Y 3 \\
+        --latency exp:0.0005 --think uniform:0.2,0.4 --tunnel uniform:0.15,0.3
+
+Każdy wirtualny proces to SimProc – podklasa Proc z gate_core, w której
+podmienione są tylko zegar (_now zwraca czas symulacji) i transport
+(_transmit wstawia rekord do kolejki zdarzeń z opóźnieniem łącza).
+Handlery (_h_req, _h_ack, _h_rel), _my_turn, części enter() (_request,
+_ready, _admit) i leave() to ten sam kod co w gate.py.  Zamiast
+blokującego _serve pętla zdarzeń sama wywołuje _dispatch, a po każdym
+zdarzeniu procesu sprawdza, czy może wejść.
+
+Opóźnienia łączy i czasy snu / tunelu: uniform:a,b | exp:średnia |
+const:x [s].  Kanały zostają FIFO – komunikat nie wyprzedza
+poprzedniego na tym samym łączu, nawet gdy wylosuje krótsze opóźnienie.
+--dir-policy jak w gate.py (gate_policy) – np. porównanie przepustowości
+i maksymalnego czekania dla fifo i epoch:W przy dużym N.  --bcast tree
+jak w gate.py: rozgłoszenia idą drzewem, każdy skok ma własne opóźnienie.
+
+Na końcu drukujemy ten sam raport co gate.py (core.report) oraz czas
+wirtualny i przepustowość.  Nie ma TERMINATE: proces po ITERS
+przejściach tylko odpowiada innym, a symulacja trwa, aż wszyscy
+skończą.  Lamport wysyła 3(N-1) komunikatów na przejście, więc koszt
+rośnie jak N²·ITERS – N = 1000 × 10 iteracji to ~3·10⁷ zdarzeń.
+"""
+
+import argparse, heapq, random, time
+
+import mpi4py
+mpi4py.rc.initialize = False          # gate_core importuje MPI; nie startujemy go
+
+import gate_core as core
+import gate_policy
+from gate_core import Proc, State, DIR
+
+MSG, WAKE, LEAVE = 0, 1, 2            # rodzaje zdarzeń
+
+
+def parse_dist(spec, rng):
+    """uniform:a,b | exp:średnia | const:x  ->  funkcja () -> czas [s]."""
+    kind, _, val = spec.partition(":")
+    nums = [float(v) for v in val.split(",")] if val else []
+    if kind == "uniform" and len(nums) == 2:
+        return lambda: rng.uniform(*nums)
+    if kind == "exp" and len(nums) == 1:
+        return lambda: rng.expovariate(1.0 / nums[0])
+    if kind == "const" and len(nums) == 1:
+        return lambda: nums[0]
+    raise ValueError(f"nieznany rozkład: {spec!r}")
+
+
+class SimProc(Proc):
+    def __init__(self, sim, rank, size):
+        self.sim = sim
+        self._setup(rank, size)
+        self.node_of = list(range(size))   # każdy proces to osobny węzeł
+        self.left = core.ITERS
+
+    def _now(self):
+        return self.sim.now
+
+    def _transmit(self, dst, typ, ts, dir_, arg):
+        self._count_msg(dst)
+        self.sim.post(self.id, dst, (typ, ts, dir_, arg))
+
+
+class Sim:
+    def __init__(self, n, latency, think, tunnel, seed):
+        self.rng = random.Random(seed)
+        self.latency = parse_dist(latency, self.rng)
+        self.think = parse_dist(think, self.rng)
+        self.tunnel = parse_dist(tunnel, self.rng)
+        self.now = 0.0
+        self.ev = []                       # kopiec (czas, nr, rodzaj, pid, dane)
+        self.seq = 0
+        self.last = {}                     # (src, dst) -> czas ostatniej dostawy
+        self.procs = [SimProc(self, i, n) for i in range(n)]
+        self.events = 0
+
+    def at(self, t, kind, pid, data=None):
+        self.seq += 1
+        heapq.heappush(self.ev, (t, self.seq, kind, pid, data))
+
+    def post(self, src, dst, rec):
+        # FIFO na łączu: nie wcześniej niż poprzedni komunikat src -> dst
+        t = self.now + self.latency()
+        link = (src, dst)
+        t = max(t, self.last.get(link, 0.0))
+        self.last[link] = t
+        self.at(t, MSG, dst, (src, rec))
+
+    def _try_enter(self, p):
+        if p.state is State.WANTED and p._ready():
+            p._admit()
+            self.at(self.now + self.tunnel(), LEAVE, p.id)
+
+    def run(self):
+        for p in self.procs:
+            self.at(self.think(), WAKE, p.id)
+        ev, procs = self.ev, self.procs
+        while ev:
+            self.now, _, kind, pid, data = heapq.heappop(ev)
+            self.events += 1
+            p = procs[pid]
+            if kind == MSG:
+                src, (typ, ts, dir_, arg) = data
+                p.n_recv[typ] += 1
+                p._dispatch(src, typ, ts, dir_, arg)
+            elif kind == WAKE:
+                p._request(self.rng.choice([DIR.A, DIR.B]))
+            else:
+                p.leave()
+                p.left -= 1
+                if p.left:
+                    self.at(self.now + self.think(), WAKE, pid)
+                continue
+            self._try_enter(p)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=100, help="liczba procesów")
+    ap.add_argument("--Y", type=int, default=3)
+    ap.add_argument("--iterations", type=int, default=10)
+    ap.add_argument("--latency", default="const:0.0001",
+                    help="opóźnienie łącza (rozkład) [s]")
+    ap.add_argument("--think", default="uniform:0.2,0.4",
+                    help="rozkład snu między przejściami [s]")
+    ap.add_argument("--tunnel", default="uniform:0.15,0.3",
+                    help="rozkład czasu w tunelu [s]")
+    ap.add_argument("--dir-policy", default="fifo",
+                    help="polityka kierunku: fifo | epoch:W (gate_policy)")
+    ap.add_argument("--bcast", choices=["flat", "tree"], default="flat",
+                    help="rozgłaszanie REQUEST / RELEASE (jak w gate.py)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--stats", metavar="PLIK",
+                    help="zapisz liczniki (suma i per proces) do pliku JSON")
+    ap.add_argument("--log", action="store_true",
+                    help="drukuj logi _log (jak gate.py bez --silent)")
+    args = ap.parse_args()
+    core.Y, core.ITERS, core.SILENT = args.Y, args.iterations, not args.log
+    core.STATS = args.stats
+    core.POLICY = gate_policy.parse(args.dir_policy)
+    core.BCAST = args.bcast
+
+    cpu0, t0 = time.process_time(), time.time()
+    sim = Sim(args.n, args.latency, args.think, args.tunnel, args.seed)
+    sim.run()
+    cpu, wall = time.process_time() - cpu0, time.time() - t0
+
+    rows = [p._counters() for p in sim.procs]
+    # CPU symulatora jest jeden na wszystkich – liczymy go raz
+    for r in rows:
+        r["cpu_s"] = 0.0
+    rows[0]["cpu_s"] = cpu
+    core.report(rows)
+    n = sum(p.passages for p in sim.procs)
+    print(f"[0] czas wirtualny: {sim.now:.2f} s, przepustowość: "
+          f"{n / max(sim.now, 1e-9):.1f} przejść/s, zdarzeń: {sim.events} "
+          f"({sim.events / max(wall, 1e-9):.0f}/s, {wall:.1f} s)", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Wariant bramy z żetonem na drzewie Raymonda (--algorithm token).
+
+Procesy tworzą drzewo binarne (rodzic i = (i-1)//2), żeton startuje
+w ranku 0.  Każdy węzeł pamięta holder – sąsiada w stronę żetonu – i
+kolejkę FIFO sąsiadów (albo siebie), którzy o żeton prosili.  REQUEST
+i TOKEN idą tylko po krawędziach drzewa, więc kosztują O(log N)
+komunikatów zamiast rozgłaszania do N-1 peerów.
+
+Żeton niesie kierunek bramy i liczbę badaczy w tunelu (pole arg):
+• właściciel żetonu wchodzi, gdy tunel jest pusty albo ma jego kierunek
+  i jest w nim mniej niż Y osób; potem oddaje żeton dalej, choć sam
+  jest jeszcze w tunelu,
+• gdy kierunek się nie zgadza, żeton czeka u niego na wyjścia,
+• wychodzący wysyła EXIT do holder; węzły przekazują go dalej, aż
+  dotrze do żetonu, który zwalnia miejsce.
+Kolejki są FIFO, więc nikt nie wyprzedza czekającego w przeciwnym kierunku.
+"""
+
+import time
+from collections import deque
+
+import gate_core as core
+from gate_core import Proc, State, MType, DIR, _log
+
+
+class TokenProc(Proc):
+    def __init__(self, comm):
+        super().__init__(comm)
+        self.parent = (self.id - 1) // 2 if self.id else self.id
+        self.holder = self.parent      # sąsiad w stronę żetonu (== id: mamy go)
+        self.asked  = False            # czy wysłaliśmy już REQUEST do holder
+        self.req_q  = deque()          # sąsiedzi / my, którzy chcą żetonu
+        self.tokDir = DIR.A.value      # stan niesiony przez żeton
+        self.tokIn  = 0                # ilu badaczy jest w tunelu
+        self._granted = False
+
+    # ---- Raymond: oddanie żetonu / wejście ----
+    def _assign(self):
+        while self.holder == self.id and self.req_q:
+            nxt = self.req_q[0]
+            if nxt == self.id:
+                d = self.wantDir.value
+                if self.tokIn and (self.tokDir != d or self.tokIn >= core.Y):
+                    return  # czekamy z żetonem, aż ktoś wyjdzie
+                self.req_q.popleft()
+                if self.tokDir != d:
+                    self._flipped(d)
+                    _log(self.id, self.clock, f"Przestawiam bramę na {d}")
+                self.tokDir = d
+                self.tokIn += 1
+                self._granted = True
+                continue
+            self.req_q.popleft()
+            self.holder = nxt
+            self.asked = False
+            self._send(nxt, MType.TOKEN, self.clock, self.tokDir, arg=self.tokIn)
+
+    def _make_request(self):
+        if self.holder != self.id and self.req_q and not self.asked:
+            self._send(self.holder, MType.REQUEST, self.clock)
+            self.asked = True
+
+    # ---- handlery ----
+    def _h_req(self, src, ts, dir_):
+        self.req_q.append(src)
+        self._assign()
+        self._make_request()
+
+    def _h_token(self, src, dir_, inside):
+        self.holder = self.id
+        self.tokDir, self.tokIn = dir_, inside
+        self.gateDir = DIR(dir_)
+        self._assign()
+        self._make_request()
+
+    def _h_exit(self, src, n=1):
+        # n – ile wyjść niesie komunikat (--algorithm hier zlicza je w węźle)
+        if self.holder != self.id:
+            self._send(self.holder, MType.EXIT, self.clock, arg=n)
+            return
+        self.tokIn -= n
+        self._assign()
+        self._make_request()
+
+    def _dispatch(self, src, typ, ts, dir_, arg=0):
+        if typ == MType.TOKEN:
+            self._upd(ts)
+            self._h_token(src, dir_, arg)
+        elif typ == MType.EXIT:
+            self._upd(ts)
+            self._h_exit(src, arg or 1)
+        else:
+            super()._dispatch(src, typ, ts, dir_, arg)
+
+    # ---- wejście / wyjście z tunelu ----
+    def enter(self, d):
+        self.state, self.wantDir = State.WANTED, d
+        self._t_req = time.time()
+        self.reqTS = self._tick()
+        self._granted = False
+        _log(self.id, self.clock, f"Staram się o {d.name}")
+
+        self.req_q.append(self.id)
+        self._assign()
+        self._make_request()
+
+        self._serve(cond=lambda: self.should_terminate or self._granted)
+        if self.should_terminate:
+            return
+        self.gateDir = d
+        self._held()
+
+    def leave(self):
+        self.state = State.RELEASED
+        _log(self.id, self.clock, "<== WYCHODZĘ ==>")   # przed EXIT, jak w Proc
+        self._h_exit(self.id)
+        self.passages += 1
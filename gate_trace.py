@@ -0,0 +1,78 @@
+"""
+Binarny ślad zdarzeń bramy (--trace KATALOG).
+
+Zamiast formatować i drukować każdą zmianę stanu jak _log, proces
+zapisuje rekordy stałej długości do prealokowanego bufora:
+
+    [czas (double), zegar Lamporta, rank, rodzaj, dir, typ kom., peer, brama]
+
+Zapis to jedno struct.pack_into – bez formatowania i bez I/O.  Pełny
+bufor (i resztę przy końcu run()) zrzucamy na raz do KATALOG/trace.<rank>.bin;
+scala je i eksportuje do formatu Chrome / Perfetto trace_merge.py.
+Brama to numer bramy przy --algorithm multi (każda ma własny tunel),
+w pozostałych wariantach 0.
+Moduł nie importuje MPI, więc nadaje się też do narzędzi offline.
+"""
+
+import glob, os, struct
+from enum import IntEnum
+
+
+class Ev(IntEnum):
+    WANT  = 0   # początek starania się o wejście (czas z _t_req)
+    ENTER = 1
+    LEAVE = 2
+    SEND  = 3
+    RECV  = 4
+    FLIP  = 5   # zmiana kierunku bramy widziana lokalnie
+    CRASH = 6   # --fault crash: rank milknie (w tunelu, kierunek jak ENTER)
+
+
+# czas, zegar, rank, rodzaj, dir (0 = A, 1 = B, -1), typ komunikatu, peer,
+# brama
+REC = struct.Struct("<diihbbii")
+DIR_CODE = {"A": 0, "B": 1, None: -1}
+DIR_NAME = {0: "A", 1: "B", -1: None}
+CAP = 1 << 16                   # rekordów w buforze przed zrzutem
+
+
+def trace_path(dir_, rank):
+    return os.path.join(dir_, f"trace.{rank}.bin")
+
+
+class Tracer:
+    def __init__(self, dir_, rank, cap=CAP):
+        os.makedirs(dir_, exist_ok=True)
+        self.path = trace_path(dir_, rank)
+        self.rank = rank
+        self.cap = cap
+        self.buf = bytearray(cap * REC.size)
+        self.n = 0
+        open(self.path, "wb").close()
+
+    def rec(self, t, clock, kind, dir_=None, mtype=-1, peer=-1, gate=0):
+        REC.pack_into(self.buf, self.n * REC.size, t, clock, self.rank,
+                      kind, DIR_CODE[dir_], mtype, peer, gate)
+        self.n += 1
+        if self.n == self.cap:
+            self.spill()
+
+    def spill(self):
+        with open(self.path, "ab") as f:
+            f.write(memoryview(self.buf)[:self.n * REC.size])
+        self.n = 0
+
+
+# ---------- odczyt (offline) ----------
+def read(path, chunk=CAP):
+    """Rekordy (t, clock, rank, kind, dir, mtype, peer, gate), po kawałku."""
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(chunk * REC.size)
+            if not data:
+                return
+            yield from REC.iter_unpack(data[:len(data) - len(data) % REC.size])
+
+
+def files(dir_):
+    return sorted(glob.glob(os.path.join(dir_, "trace.*.bin")))
@@ -0,0 +1,38 @@
+"""
+Typy bramy wspólne dla procesu MPI i narzędzi offline (trace_merge.py):
+kierunek, stan procesu i typy komunikatów.  Bez importu MPI.
+"""
+
+from enum import Enum, IntEnum, auto
+
+
+class DIR(Enum):
+    A = "A"
+    B = "B"
+
+def opposite(d):
+    return DIR.B if d is DIR.A else DIR.A
+
+class State(Enum):
+    RELEASED = auto()
+    WANTED   = auto()
+    HELD     = auto()
+
+class MType(IntEnum):
+    REQUEST   = 0
+    ACK       = 1
+    RELEASE   = 2
+    TERMINATE = 3  # sygnał zakończenia
+    HOLD      = 4  # --algorithm ra: „jestem przed tobą w twoim kierunku”
+    TOKEN     = 5  # --algorithm token: przekazanie żetonu (dir, zajęte miejsca)
+    EXIT      = 6  # token: wyjście z tunelu, płynie do żetonu; quorum: do kworum
+    GRANT     = 7  # --algorithm quorum: głos arbitra (+ stan bramy)
+    FAILED    = 8  # --algorithm quorum: arbiter obiecał głos komuś przed tobą
+    INQUIRE   = 9  # --algorithm quorum: „oddasz głos?” – przyszło starsze żądanie
+    YIELD     = 10 # --algorithm quorum: oddanie głosu arbitrowi (RELINQUISH)
+    EXITS     = 11 # --algorithm quorum: ile wyjść liczy dla ciebie arbiter
+    JOIN      = 12 # --members: rank wchodzi do bramy, prosi o stan
+    SYNC      = 13 # odpowiedź na JOIN: zegar i własny wpis nadawcy (arg = ts)
+    DEPART    = 14 # --depart: rank wychodzi z bramy, nie czekajcie na jego ACK
+    HEARTBEAT = 15 # --lease: „żyję” do członka, któremu dawno nic nie wysłaliśmy
+    SUSPECT   = 16 # --lease: dzierżawa ranku wygasła – usuńcie go (arg = kto)
@@ -0,0 +1,73 @@
+"""
+Binarny format komunikatów bramy (zamiast piklowanych krotek (typ, dict)).
+
+Komunikat to rekord REC słów int32:
+
+    [typ, ts, dir, arg]
+
+• typ  – wartość MType (przy zbiorczych komunikatach tag nie wystarcza),
+• ts   – znacznik czasu Lamporta,
+• dir  – 0 = A, 1 = B, -1 = brak,
+• arg  – pole zależne od typu i wariantu, np. nadawca rozgłoszenia
+         przy --bcast tree, liczba doręczonych rozgłoszeń w ACK, reqTS
+         w SYNC, wcielenie w JOIN / SUSPECT, numer bramy (gate_multi),
+         slot badacza (gate_async); 0, gdy nieużywane.
+
+Bufory są prealokowane i wysyłane przez Send / Isend z MPI.INT.  Kilka
+rekordów do jednego adresata można skleić w jeden komunikat (do MAX_BATCH
+rekordów); liczbę rekordów odczytuje się ze statusu (Get_count).
+
+Nadawca ustawia tag jak w program.c – tag_of(typ) dla pojedynczego
+rekordu, TAG_BATCH dla sklejonych – ale służy on tylko do podglądu ruchu
+(profilery, PMPI).  Odbiorcy przyjmują MPI.ANY_TAG: typ jest w rekordzie,
+a odbiór po tagu rozbiłby kanał od jednego nadawcy na kilka i pozwolił
+np. RELEASE wyprzedzić REQUEST, na czym kolejka Lamporta by się wyłożyła.
+"""
+
+from array import array
+
+from mpi4py import MPI
+
+REC = 4                               # słów int32 w rekordzie
+F_TYPE, F_TS, F_DIR, F_ARG = range(REC)
+REC_BYTES = REC * array("i").itemsize
+
+# tag = typ + 1 (tag 0 zostaje dla ścieżki pickle), patrz tag_of
+TAG_BATCH = 32                        # powyżej tagów typów (typ + 1)
+MAX_BATCH = 8                         # maks. rekordów w jednym komunikacie
+
+DIR_CODE = {"A": 0, "B": 1, None: -1}
+DIR_NAME = ("A", "B")
+
+
+def new_buf(nrec=1):
+    """Prealokowany bufor na nrec rekordów."""
+    return array("i", bytes(nrec * REC_BYTES))
+
+
+def pack(buf, typ, ts, dir_=None, arg=0, off=0):
+    buf[off + F_TYPE] = typ
+    buf[off + F_TS] = ts
+    buf[off + F_DIR] = DIR_CODE[dir_]
+    buf[off + F_ARG] = arg
+
+
+def unpack(buf, off=0):
+    """Zwraca (typ, ts, dir, arg); dir jako "A"/"B" albo None."""
+    d = buf[off + F_DIR]
+    return (buf[off + F_TYPE], buf[off + F_TS],
+            DIR_NAME[d] if d >= 0 else None, buf[off + F_ARG])
+
+
+def unpack_all(buf, n):
+    """Lista n rekordów (typ, ts, dir, arg) z bufora."""
+    return [unpack(buf, k * REC) for k in range(n)]
+
+
+def tag_of(typ):
+    return typ + 1
+
+
+def nrec(status):
+    """Ile rekordów przyszło w komunikacie opisanym przez status."""
+    return status.Get_count(MPI.INT) // REC
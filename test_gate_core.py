@@ -0,0 +1,185 @@
+"""
+Scenariusze dla Proc z gate_core bez MPI: ranki to SimProc z gate_sim,
+a kolejność doręczeń ustalamy ręcznie (kanały FIFO, jak w MPI).
+
+    python3 -m pytest -q test_gate_core.py
+"""
+
+from collections import deque
+
+import pytest
+
+import gate_core as core
+from gate_core import DIR, State, MType
+from gate_sim import SimProc
+
+
+class Net:
+    """Kanały src -> dst jako kolejki; deliver() doręcza jeden rekord."""
+
+    def __init__(self, n, cls=SimProc):
+        self.now = 0.0
+        self.links = {}
+        self.procs = [cls(self, i, n) for i in range(n)]
+
+    def post(self, src, dst, rec):
+        self.links.setdefault((src, dst), deque()).append(rec)
+
+    def pending(self, src, dst):
+        return [MType(r[0]) for r in self.links.get((src, dst), ())]
+
+    def deliver(self, src, dst):
+        typ, ts, dir_, arg = self.links[src, dst].popleft()
+        self.procs[dst]._dispatch(src, typ, ts, dir_, arg)
+
+    def drain(self, hold=()):
+        # doręcza wszystko poza kanałami z hold, aż nic nie zostanie
+        moved = True
+        while moved:
+            moved = False
+            for link, q in list(self.links.items()):
+                if q and link not in hold:
+                    self.deliver(*link)
+                    moved = True
+
+
+@pytest.fixture
+def late_join(monkeypatch):
+    # ranki 0 i 1 w bramie od startu, rank 2 dołącza
+    monkeypatch.setattr(core, "MEMBERS", 2)
+    monkeypatch.setattr(core, "SILENT", True)
+    return Net(3)
+
+
+def test_request_after_sync_survives_late_sync(late_join):
+    net = late_join
+    p0, p1, p2 = net.procs
+    p2._join()
+
+    # SYNC od 0 dochodzi, SYNC od 1 się spóźnia (1 nie dostał jeszcze JOIN)
+    net.deliver(2, 0)
+    net.deliver(0, 2)
+    assert p2._sync_wait == {1} and not p2.joined
+
+    # 0 prosi o A; jego REQUEST do 2 jedzie za SYNC i dochodzi przed SYNC od 1
+    p0._request(DIR.A)
+    assert net.pending(0, 2) == [MType.REQUEST]
+    net.drain(hold={(2, 1)})
+    assert p0._ready()
+    p0._admit()
+    assert p2.Q.get(0) is not None, "REQUEST od 0 zgubiony przed ostatnim SYNC"
+
+    # spóźnione SYNC od 1; potem 2 prosi o B, gdy 0 jest w tunelu w A
+    net.drain()
+    assert p2.joined
+    p2._request(DIR.B)
+    net.drain()
+    assert p0.state is State.HELD
+    assert not p2._ready(), "2 wchodzi w B, gdy 0 jest w tunelu w A"
+
+    p0.leave()
+    net.drain()
+    assert p2._ready()
+
+
+def test_request_before_sync_is_only_acked(late_join):
+    net = late_join
+    p0, p1, p2 = net.procs
+
+    # 0 prosi o A, zanim dostanie JOIN – jego wpis przyjdzie w SYNC
+    p0._request(DIR.A)
+    p2._join()
+    net.deliver(0, 1)
+    net.deliver(1, 0)
+    net.deliver(2, 1)
+    net.deliver(1, 2)
+    net.deliver(2, 0)
+    net.drain()
+    assert p2.joined
+    assert [pid for _, pid, _ in p2.Q] == [0]
+    assert p0._ready()
+
+
+@pytest.fixture
+def leased_join(monkeypatch, late_join):
+    monkeypatch.setattr(core, "LEASE", 0.4)
+    monkeypatch.setattr(core, "HEARTBEAT", 0.1)
+    return late_join
+
+
+def test_joiner_sends_heartbeats(leased_join):
+    net = leased_join
+    p2 = net.procs[2]
+    p2._join()
+    net.links.clear()
+    net.now += core.HEARTBEAT
+    p2._watch()
+    assert not p2.joined
+    assert net.pending(2, 0) == [MType.HEARTBEAT]
+    assert net.pending(2, 1) == [MType.HEARTBEAT]
+
+
+def test_joiner_honors_suspect_and_resyncs(leased_join):
+    net = leased_join
+    p0, p1, p2 = net.procs
+    p2._join()
+    net.deliver(2, 0)
+    net.deliver(2, 1)
+    net.deliver(0, 2)                  # SYNC od 0; SYNC od 1 jeszcze w drodze
+
+    # 0 uznaje 2 za martwego, zanim ten skończył JOIN
+    p0._request(DIR.A)
+    p0._suspect(2, net.now)
+    net.drain(hold={(1, 2)})
+    assert p2._expelled and not p2.joined
+
+    # dalszy ciąg join(): nowe wcielenie, stare SYNC od 1 nie zostawia
+    # nieaktualnego wpisu
+    p2._expelled = False
+    p2._join()
+    net.drain()
+    assert p2.joined and p0.active[2] and p1.active[2]
+    assert [pid for _, pid, _ in p2.Q] == [0]
+
+
+@pytest.fixture
+def coalesced(monkeypatch):
+    monkeypatch.setattr(core, "COALESCE", True)
+    monkeypatch.setattr(core, "SILENT", True)
+    return Net(2)
+
+
+def test_coalesce_release_replaces_ack(coalesced):
+    net = coalesced
+    p0, p1 = net.procs
+    p0._request(DIR.A)
+    net.drain()
+    assert p0._ready()
+    p0._admit()
+
+    # 1 prosi o B: nie wejdzie przed RELEASE od 0, więc 0 nie potwierdza
+    p1._request(DIR.B)
+    net.deliver(1, 0)
+    assert net.pending(0, 1) == [] and p0.acks_saved == 1
+    assert not p1._ready()
+
+    p0.leave()
+    assert net.pending(0, 1) == [MType.RELEASE]
+    net.drain()
+    assert p1._ready()
+    assert p0.n_sent[MType.ACK] == 0
+
+
+def test_coalesce_acks_same_direction(coalesced):
+    net = coalesced
+    p0, p1 = net.procs
+    p0._request(DIR.A)
+    net.drain()
+    assert p0._ready()
+    p0._admit()
+    # ten sam kierunek: 1 może wejść obok 0, więc ACK idzie od razu
+    p1._request(DIR.A)
+    net.deliver(1, 0)
+    assert net.pending(0, 1) == [MType.ACK]
+    net.drain()
+    assert p1._ready()
@@ -0,0 +1,66 @@
+"""
+Scenariusze dla MultiProc z gate_multi bez MPI: ranki jak SimProc z gate_sim
+(zegar i transport symulacji), doręczenia ręcznie przez Net z test_gate_core.
+
+    python3 -m pytest -q test_gate_multi.py
+"""
+
+import pytest
+
+import gate_core as core
+from gate_core import DIR, State
+from gate_multi import Gate, MultiProc
+from gate_sim import SimProc
+from test_gate_core import Net
+
+
+class SimMulti(SimProc, MultiProc):
+    def __init__(self, sim, rank, size):
+        super().__init__(sim, rank, size)
+        self.gates = [Gate(g, core.Y, size) for g in range(core.GATES)]
+
+
+@pytest.fixture
+def two_ranks(monkeypatch):
+    # pickle: MultiProc._send nie odkłada rekordów w _out, idą od razu
+    monkeypatch.setattr(core, "WIRE", "pickle")
+    monkeypatch.setattr(core, "SILENT", True)
+    monkeypatch.setattr(core, "GATES", 2)
+    return Net(2, SimMulti)
+
+
+def test_lone_request_turns_gate(two_ranks):
+    net = two_ranks
+    p0, p1 = net.procs
+    g0, g1 = p0.gates[1], p1.gates[1]
+
+    # 0 przechodzi przez bramę 1 w A i wychodzi – dalej nic nie wysyła
+    p0._request(g0, DIR.A)
+    net.drain()
+    assert p0._ready(g0)
+    p0._held_g(g0)
+    p0.leave(1)
+    net.drain()
+
+    # 1 prosi o B; jedynym komunikatem do niego jest ACK od 0
+    p1._request(g1, DIR.B)
+    net.drain()
+    assert p1._ready(g1), "brama 1 u ranku 1 została w A"
+    assert p1.gates[0].dir is DIR.A
+
+
+def test_opposite_requests_on_one_gate(two_ranks):
+    net = two_ranks
+    p0, p1 = net.procs
+    g0, g1 = p0.gates[0], p1.gates[0]
+    p0._request(g0, DIR.A)
+    p1._request(g1, DIR.B)
+    net.drain()
+
+    # ts równe, wygrywa mniejszy pid: najpierw 0 w A, potem 1 w B
+    assert p0._ready(g0) and not p1._ready(g1)
+    p0._held_g(g0)
+    p0.leave(0)
+    net.drain()
+    assert g0.state is State.RELEASED
+    assert p1._ready(g1) and g1.dir is DIR.B
@@ -0,0 +1,136 @@
+"""
+GateQueue (gate_queue.py) – kolejka, na której stoją wszystkie warianty.
+
+    python3 -m pytest -q test_gate_queue.py
+"""
+
+import random
+
+from gate_queue import GateQueue
+
+
+def queue(*entries):
+    q = GateQueue()
+    for e in entries:
+        q.push(*e)
+    return q
+
+
+def test_empty():
+    q = GateQueue()
+    assert not q and len(q) == 0
+    assert q.head() is None and q.head_dir() is None
+    assert q.prefix_len() == 0 and q.prefix_len("A") == 0
+    assert not q.my_turn(0, "A", 3)
+    assert q.remove_pid(0) is None
+
+
+def test_push_orders_by_ts_then_pid():
+    q = queue((5, 2, "A"), (3, 1, "B"), (5, 0, "B"))
+    assert list(q) == [(3, 1, "B"), (5, 0, "B"), (5, 2, "A")]
+    assert q.head() == (3, 1, "B") and q.head_dir() == "B"
+    assert 2 in q and q.get(2) == (5, 2, "A")
+    assert q.count("A") == 1 and q.count("B") == 2
+
+
+def test_push_replaces_entry_of_same_pid():
+    # drugi REQUEST tego samego procesu (np. zamknięcie epoki) zastępuje wpis
+    q = queue((1, 0, "A"), (2, 1, "A"))
+    q.push(3, 0, "B")
+    assert len(q) == 2
+    assert list(q) == [(2, 1, "A"), (3, 0, "B")]
+    assert q.count("A") == 1
+
+
+def test_remove_pid():
+    q = queue((1, 0, "A"), (2, 1, "B"), (3, 2, "A"))
+    assert q.remove_pid(0) == (1, 0, "A")
+    assert q.remove_pid(0) is None
+    assert q.head() == (2, 1, "B")
+    assert q.remove_pid(1) == (2, 1, "B")
+    assert q.head_dir() == "A" and q.prefix_len() == 1
+
+
+def test_prefix_len():
+    q = queue((1, 0, "A"), (2, 1, "A"), (3, 2, "B"), (4, 3, "A"))
+    assert q.prefix_len() == 2
+    assert q.prefix_len("A") == 2
+    assert q.prefix_len("B") == 0     # czoło w innym kierunku
+    q.remove_pid(0)
+    q.remove_pid(1)
+    assert q.prefix_len() == 1 and q.prefix_len("B") == 1
+
+
+def test_my_turn_capacity_and_direction():
+    q = queue((1, 0, "A"), (2, 1, "A"), (3, 2, "A"), (4, 3, "B"), (5, 4, "A"))
+    assert q.my_turn(0, "A", 2) and q.my_turn(1, "A", 2)
+    assert not q.my_turn(2, "A", 2)   # trzeci przy cap 2
+    assert q.my_turn(2, "A", 3)
+    assert not q.my_turn(4, "A", 9)   # za wpisem B
+    assert not q.my_turn(3, "B", 9)   # brama w A, przed nami A
+    assert not q.my_turn(0, "B", 9)   # wpis w innym kierunku niż brama
+    assert not q.my_turn(7, "A", 9)   # brak wpisu
+
+
+def test_my_turn_tie_on_ts_broken_by_pid():
+    q = queue((4, 2, "A"), (4, 1, "B"))
+    assert q.head() == (4, 1, "B")
+    assert q.my_turn(1, "B", 1)
+    assert not q.my_turn(2, "A", 1)
+    q = queue((4, 1, "A"), (4, 0, "A"))
+    assert q.my_turn(0, "A", 1) and not q.my_turn(1, "A", 1)
+
+
+def test_weighted_entries():
+    # wpis zbiorczy n badaczy zajmuje n z cap miejsc
+    q = queue((1, 0, "A", 2), (2, 1, "A"), (3, 2, "A", 3))
+    assert q.my_turn(0, "A", 2)
+    assert not q.my_turn(1, "A", 2)   # 2 + 1 > 2
+    assert q.my_turn(1, "A", 3)
+    assert not q.my_turn(2, "A", 5)   # 2 + 1 + 3 > 5
+    assert q.my_turn(2, "A", 6)
+    assert not q.my_turn(0, "A", 1)   # sam wpis większy niż cap
+    # usunięcie i zastąpienie kasują wagę
+    q.remove_pid(0)
+    assert q.my_turn(1, "A", 1)
+    q.push(4, 2, "A")
+    assert q.my_turn(2, "A", 2)
+    # prefiks liczy wpisy, nie wagi
+    assert queue((1, 0, "A", 5), (2, 1, "A")).prefix_len() == 2
+
+
+def test_tuple_keys_from_policy():
+    # gate_policy.Epoch daje klucze (epoka, drugi kierunek epoki, ts)
+    q = queue(((0, True, 5), 0, "B"), ((0, False, 9), 1, "A"),
+              ((1, False, 2), 2, "A"))
+    assert q.head() == ((0, False, 9), 1, "A")
+    assert q.prefix_len() == 1
+    assert q.my_turn(1, "A", 3) and not q.my_turn(2, "A", 3)
+
+
+def test_matches_sorted_list_model():
+    # losowe operacje vs lista sortowana przy każdym zapytaniu
+    rng = random.Random(7)
+    q, model = GateQueue(), {}
+    for step in range(2000):
+        pid = rng.randrange(12)
+        if rng.random() < 0.6:
+            e = (rng.randrange(50), pid, rng.choice("AB"))
+            q.push(*e)
+            model[pid] = e
+        else:
+            assert q.remove_pid(pid) == model.pop(pid, None)
+        full = sorted(model.values())
+        assert list(q) == full
+        assert q.head() == (full[0] if full else None)
+        run = 0
+        while run < len(full) and full[run][2] == full[0][2]:
+            run += 1
+        assert q.prefix_len() == run
+        for gate_dir in "AB":
+            cap = rng.randrange(1, 5)
+            for p, e in model.items():
+                k = full.index(e)
+                want = (e[2] == gate_dir and k < run and full[0][2] == gate_dir
+                        and k < cap)
+                assert q.my_turn(p, gate_dir, cap) == want, (step, p)
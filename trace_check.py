@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Offline weryfikacja i analiza przebiegu bramy – strumieniowo, w stałej
+pamięci, na ślad z gate.py --trace albo na zwykłe logi _log.
+
+    mpiexec -n 64 python3 gate.py --silent --trace slad --Y 3
+    python3 trace_check.py slad --Y 3
+    mpiexec -n 8 python3 gate.py --Y 2 > przebieg.log
+    python3 trace_check.py przebieg.log --Y 2 --series zajetosc.csv
+
+Sprawdzane niezmienniki:
+• pojemność – w tunelu nigdy więcej niż Y badaczy w jednym kierunku,
+• jeden kierunek – nigdy ktoś w A i ktoś w B jednocześnie,
+  oba dla każdej bramy osobno (--algorithm multi: pole brama rekordu,
+  w logu „(brama k)”; pozostałe warianty mają jedną bramę 0),
+• parowanie – u każdego badacza ENTER i LEAVE na przemian, LEAVE w tym
+  samym kierunku co ENTER, a na końcu nikt nie zostaje w tunelu.
+  Badacz to (rank, peer): przy --algorithm async kilku badaczy jednego
+  ranka bywa w tunelu naraz i ślad niesie ich slot w polu peer (w logu
+  „(badacz k)”); --algorithm multi – numer bramy; pozostałe warianty
+  mają peer = -1, czyli badacz = rank.
+Zdarzenie CRASH (--fault crash) zdejmuje badacza z tunelu jak LEAVE, ale
+nie jest naruszeniem – liczymy je osobno jako awarie.
+W tym samym przebiegu liczymy histogram zajętości (ile czasu tunel miał
+k badaczy w A / w B), średnie wykorzystanie Y, liczbę zmian kierunku
+i rozkład przerw przy zmianie (od ostatniego wyjścia w starym kierunku
+do pierwszego wejścia w nowym).  Przy K bramach histogram sumuje czas
+wszystkich bram, a --series – ich zajętość.
+
+Pliki trace.<rank>.bin czytamy kawałkami przez np.fromfile i scalamy
+k-drożnie: z każdego pliku trzymamy co najwyżej jeden kawałek, a na
+raz przetwarzamy wszystko do „znaku wodnego” – najmniejszego ostatniego
+klucza wśród nieskończonych plików.  Zajętość, sprawdzanie niezmienników
+i histogramy to operacje na całych wektorach (cumsum, bincount,
+lexsort), bez pętli po zdarzeniach w Pythonie.
+
+Porządek: --order time (domyślny dla śladu) to zegar ścienny – ranki na
+jednej maszynie; --order clock to (zegar Lamporta, pid).  Log _log nie
+ma czasu ściennego, więc zawsze idzie wg zegara Lamporta (a „czas”
+w histogramach to takty zegara).  To wystarcza dla wariantów, w których
+wejście jest przyczynowo poprzedzone wyjściami, na które czekało
+(komunikat niesie zegar); RMA nie przenosi zegara – tam tylko --trace
+z --order time.
+"""
+
+import argparse, os, re, sys, tempfile
+
+import numpy as np
+
+from gate_trace import Ev, REC, Tracer, files
+
+# układ REC ("<diihbbii") jako dtype – np.fromfile czyta rekordy wprost
+DTYPE = np.dtype([("t", "<f8"), ("clock", "<i4"), ("rank", "<i4"),
+                  ("kind", "<i2"), ("dir", "i1"), ("mtype", "i1"),
+                  ("peer", "<i4"), ("gate", "<i4")])
+assert DTYPE.itemsize == REC.size
+
+MEM_MB = 256                   # budżet na bufory czytników
+GAP_BINS = np.logspace(-6, 3, 91)   # przerwy przy zmianie: 1 µs … 1000 s
+MAX_SHOWN = 10                 # ile naruszeń wypisać ze szczegółami
+
+LOG_RE = re.compile(r"^\[(\d+)\] \[t(\d+)\] (Staram się o ([AB])|==> WCHODZĘ <==|<== WYCHODZĘ ==>|AWARIA \(crash\))"
+                    r"(?: \((badacz|brama) (\d+)\))?")
+
+
+# ---------- wejście: log _log → pliki śladu ----------
+def from_log(paths, dir_):
+    """Przepisuje zdarzenia z logów do dir_/trace.<rank>.bin (t = zegar)."""
+    tracers, want = {}, {}
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                m = LOG_RE.match(line)
+                if not m:
+                    continue
+                r, clock = int(m[1]), int(m[2])
+                slot = int(m[6]) if m[6] else -1
+                gate = slot if m[5] == "brama" else 0
+                if r not in tracers:
+                    tracers[r] = Tracer(dir_, r, cap=4096)
+                if m[4]:
+                    want[r, slot] = m[4]
+                    tracers[r].rec(clock, clock, Ev.WANT, m[4], peer=slot,
+                                   gate=gate)
+                else:
+                    kind = (Ev.ENTER if "WCHODZĘ" in m[3] else
+                            Ev.CRASH if "AWARIA" in m[3] else Ev.LEAVE)
+                    tracers[r].rec(clock, clock, kind, want.get((r, slot)),
+                                   peer=slot, gate=gate)
+    for tr in tracers.values():
+        tr.spill()
+    return len(tracers)
+
+
+# ---------- scalanie k-drożne kawałkami ----------
+class Reader:
+    """Zdarzenia ENTER/LEAVE/CRASH jednego ranka, po kawałku z pliku."""
+
+    def __init__(self, path, chunk):
+        self.f = open(path, "rb")
+        self.chunk = chunk
+        self.buf = np.empty(0, DTYPE)
+        self.done = False
+
+    def fill(self):
+        while not len(self.buf) and not self.done:
+            a = np.fromfile(self.f, DTYPE, self.chunk)
+            if len(a) < self.chunk:
+                self.done = True
+                self.f.close()
+            self.buf = a[(a["kind"] == Ev.ENTER) | (a["kind"] == Ev.LEAVE)
+                         | (a["kind"] == Ev.CRASH)]
+
+
+def merged(paths, by_clock, mem_mb=MEM_MB):
+    """Kolejne posortowane partie zdarzeń ENTER/LEAVE/CRASH ze wszystkich ranków."""
+    key = "clock" if by_clock else "t"
+    chunk = max(1024, mem_mb * 2**20 // (2 * DTYPE.itemsize * max(1, len(paths))))
+    readers = [Reader(p, chunk) for p in paths]
+    while True:
+        for rd in readers:
+            rd.fill()
+        live = [rd for rd in readers if len(rd.buf)]
+        if not live:
+            return
+        # znak wodny: najmniejszy ostatni (klucz, rank) wśród czytników,
+        # które mogą mieć jeszcze coś w pliku
+        marks = [(rd.buf[key][-1], rd.buf["rank"][-1])
+                 for rd in live if not rd.done]
+        wk, wr = min(marks) if marks else (np.inf, 0)
+        parts = []
+        for rd in live:
+            k, r = rd.buf[key], rd.buf["rank"]
+            n = int(np.count_nonzero((k < wk) | ((k == wk) & (r <= wr))))
+            parts.append(rd.buf[:n])
+            rd.buf = rd.buf[n:]
+        batch = np.concatenate(parts)
+        # stabilnie: w obrębie ranka zostaje kolejność z pliku
+        batch = batch[np.lexsort((batch["rank"], batch[key]))]
+        # analiza robi kilkanaście wektorów na zdarzenie – po kawałku
+        for i in range(0, len(batch), chunk):
+            yield batch[i:i + chunk]
+
+
+# ---------- analiza ----------
+class Checker:
+    def __init__(self, Y, n_ranks, by_clock, series_bin=None):
+        self.Y = Y
+        self.by_clock = by_clock
+        self.events = 0
+        self.crashes = 0
+        # stan per brama (wiersz = numer bramy; wiersze dokładamy, gdy
+        # w śladzie pojawi się większy numer)
+        self.occ = np.zeros((1, 2), np.int64)     # bieżąca zajętość A, B
+        self.last_dir = np.full(1, -1)            # kierunek ostatniego wejścia
+        self.t_last = np.full(1, np.nan)          # czas ostatniego zdarzenia
+        self.F = np.zeros((1, 2))                 # ∫occ dt (dla --series)
+        # badacz (rank, peer + 1) w tunelu; kolumny dokładamy, gdy w śladzie
+        # pojawi się większy slot
+        self.inside = np.zeros((n_ranks, 1), bool)
+        self.in_dir = np.full((n_ranks, 1), -1, np.int8)
+        self.t_prev = None
+        self.hist = np.zeros((2, Y + 1))          # czas przy zajętości k
+        self.max_occ = 0
+        self.switches = 0
+        self.gap_hist = np.zeros(len(GAP_BINS) + 1, np.int64)
+        self.gap_sum = self.gap_max = 0.0
+        self.bad = {"pojemność": 0, "dwa kierunki": 0, "ENTER w tunelu": 0,
+                    "LEAVE poza tunelem": 0, "LEAVE w innym kierunku": 0}
+        self.shown = []
+        # przebieg zajętości: całka ∫occ dt (suma po bramach) w punktach
+        # siatki co series_bin
+        self.bin = series_bin
+        self.edges, self.F_edges = None, []
+
+    @property
+    def gates(self):
+        return len(self.occ)
+
+    def _grow_gates(self, k):
+        grow = k - self.gates
+        if grow > 0:
+            self.occ = np.pad(self.occ, ((0, grow), (0, 0)))
+            self.last_dir = np.pad(self.last_dir, (0, grow),
+                                   constant_values=-1)
+            self.t_last = np.pad(self.t_last, (0, grow),
+                                 constant_values=np.nan)
+            self.F = np.pad(self.F, ((0, grow), (0, 0)))
+
+    def _note(self, what, ev, occ):
+        self.bad[what] += len(ev)
+        for e, (a, b) in zip(ev[:MAX_SHOWN - len(self.shown)], occ):
+            who = f"{e['rank']}/{e['peer']}" if e["peer"] >= 0 else e["rank"]
+            gate = f" brama {e['gate']}" if self.gates > 1 else ""
+            self.shown.append(f"{what}: rank {who}{gate} t={e['t']:.6f} "
+                              f"zegar {e['clock']} {Ev(e['kind']).name} "
+                              f"{'AB'[e['dir']] if e['dir'] >= 0 else '?'} "
+                              f"(w tunelu A={a}, B={b})")
+
+    def feed(self, b):
+        n = len(b)
+        self.events += n
+        t = (b["clock"] if self.by_clock else b["t"]).astype(np.float64)
+        enter = b["kind"] == Ev.ENTER
+        crash = b["kind"] == Ev.CRASH
+        self.crashes += int(np.count_nonzero(crash))
+        d = b["dir"].astype(np.int64)
+        s = b["peer"].astype(np.int64) + 1
+        g = b["gate"].astype(np.int64)
+
+        # ---- parowanie ENTER/LEAVE per badacz (rank, peer) ----
+        grow = int(s.max()) + 1 - self.inside.shape[1]
+        if grow > 0:
+            self.inside = np.pad(self.inside, ((0, 0), (0, grow)))
+            self.in_dir = np.pad(self.in_dir, ((0, 0), (0, grow)),
+                                 constant_values=-1)
+        inside, in_dir = self.inside.reshape(-1), self.in_dir.reshape(-1)
+        who = b["rank"].astype(np.int64) * self.inside.shape[1] + s
+        o = np.argsort(who, kind="stable")
+        wo, eo, do, co = who[o], enter[o], d[o], crash[o]
+        first = np.ones(n, bool)
+        first[1:] = wo[1:] != wo[:-1]
+        was_in = np.where(first, inside[wo], np.roll(eo, 1))
+        was_dir = np.where(first, in_dir[wo], np.roll(do, 1))
+        last = np.ones(n, bool)
+        last[:-1] = first[1:]
+        inside[wo[last]] = eo[last]
+        in_dir[wo[last]] = do[last]
+        bad_pair = np.zeros(n, np.int8)       # w kolejności partii
+        bad_pair[o[eo & was_in]] = 1
+        bad_pair[o[~eo & ~co & ~was_in]] = 2
+        bad_pair[o[~eo & ~co & was_in & (do != was_dir)]] = 3
+        # LEAVE / CRASH zwalnia miejsce w kierunku swojego ENTER, bez
+        # wejścia nie zmienia zajętości
+        d = d.copy()
+        d[o] = np.where(~eo & was_in, was_dir, do)
+        idle = np.zeros(n, bool)
+        idle[o] = ~eo & ~was_in
+        step = np.where(enter, 1, np.where(idle, 0, -1))
+
+        # ---- tunel każdej bramy osobno: odcinki [t_prev, t_1), …,
+        # [t_k, t[-1]] z zajętością tej bramy (znane bramy bez zdarzeń
+        # w partii mają jeden odcinek) ----
+        self._grow_gates(int(g.max()) + 1)
+        t_prev = t[0] if self.t_prev is None else self.t_prev
+        if self.bin:
+            if self.edges is None:
+                self.edges, k0 = t[0], 0
+            else:
+                k0 = int((t_prev - self.edges) // self.bin) + 1
+            k1 = int((t[-1] - self.edges) // self.bin) + 1
+            hi = self.edges + self.bin * np.arange(k0, k1)
+            F_hi = np.zeros((len(hi), 2))
+        occ = np.zeros((n, 2), np.int64)      # zajętość bramy po zdarzeniu
+        for k in range(self.gates):
+            i = np.flatnonzero(g == k)
+            ti, di, si = t[i], d[i], step[i]
+            occ[i] = self.occ[k] + np.cumsum(
+                np.stack([np.where(di == 0, si, 0),
+                          np.where(di == 1, si, 0)], 1), 0)
+            lv = np.concatenate([self.occ[k][None], occ[i]])
+            tt = np.concatenate([[t_prev], ti, [t[-1]]])
+            dt = np.diff(tt)
+            top = int(lv.max()) + 1 - self.hist.shape[1]
+            if top > 0:
+                self.hist = np.pad(self.hist, ((0, 0), (0, top)))
+            self.max_occ = max(self.max_occ, int(lv.sum(1).max()))
+            m = self.hist.shape[1]
+            self.hist[0] += np.bincount(np.clip(lv[:, 0], 0, None), dt, m)[:m]
+            self.hist[1] += np.bincount(np.clip(lv[:, 1], 0, None), dt, m)[:m]
+
+            # przerwa przy zmianie kierunku: od poprzedniego zdarzenia tej
+            # bramy (ostatniego wyjścia w starym kierunku) do wejścia
+            ie = np.flatnonzero(enter[i])
+            if len(ie):
+                de = di[ie]
+                before = np.concatenate([[self.last_dir[k]], de[:-1]])
+                t_before = np.concatenate([[self.t_last[k]], ti[:-1]])[ie]
+                sw = (de != before) & (before >= 0)
+                if sw.any():
+                    gaps = (ti[ie] - t_before)[sw]
+                    self.switches += len(gaps)
+                    self.gap_sum += gaps.sum()
+                    self.gap_max = max(self.gap_max, gaps.max())
+                    self.gap_hist += np.bincount(
+                        np.searchsorted(GAP_BINS, gaps),
+                        minlength=len(self.gap_hist))
+                self.last_dir[k] = de[-1]
+            if len(i):
+                self.t_last[k] = ti[-1]
+
+            if self.bin:
+                FF = self.F[k] + np.concatenate(
+                    [[[0, 0]], np.cumsum(lv * dt[:, None], 0)])
+                F_hi[:, 0] += np.interp(hi, tt, FF[:, 0])
+                F_hi[:, 1] += np.interp(hi, tt, FF[:, 1])
+                self.F[k] = FF[-1]
+            self.occ[k] = lv[-1]
+
+        over = enter & (occ > self.Y).any(1)
+        both = enter & (occ > 0).all(1)
+        for what, m in (("pojemność", over), ("dwa kierunki", both),
+                        ("ENTER w tunelu", bad_pair == 1),
+                        ("LEAVE poza tunelem", bad_pair == 2),
+                        ("LEAVE w innym kierunku", bad_pair == 3)):
+            if m.any():
+                self._note(what, b[m], occ[m])
+
+        if self.bin and len(hi):
+            self.F_edges.append(np.column_stack([hi, F_hi]))
+        self.t_prev = t[-1]
+
+    def finish(self):
+        left = np.argwhere(self.inside)
+        self.bad["ENTER bez LEAVE"] = len(left)
+        for rk, s in left[:MAX_SHOWN - len(self.shown)]:
+            who = f"{rk}/{s - 1}" if s else rk
+            self.shown.append(f"ENTER bez LEAVE: rank {who} został w tunelu "
+                              f"{'AB'[self.in_dir[rk, s]]}")
+
+    def series(self):
+        """Wiersze (początek przedziału, średnia zajętość A, B)."""
+        if not self.F_edges:
+            return np.empty((0, 3))
+        E = np.concatenate(self.F_edges)
+        return np.column_stack([E[:-1, 0], np.diff(E[:, 1]) / self.bin,
+                                np.diff(E[:, 2]) / self.bin])
+
+    def gap_pct(self, q):
+        c = np.cumsum(self.gap_hist)
+        i = int(np.searchsorted(c, q * c[-1]))
+        return GAP_BINS[min(i, len(GAP_BINS) - 1)]
+
+    def report(self):
+        unit = "taktów" if self.by_clock else "s"
+        total = self.hist[0].sum()
+        print(f"zdarzeń ENTER/LEAVE/CRASH: {self.events}, Y = {self.Y}, "
+              f"porządek: {'zegar Lamporta' if self.by_clock else 'czas ścienny'}")
+        if self.gates > 1:
+            print(f"bram: {self.gates} – zajętość i niezmienniki per brama, "
+                  f"histogram sumuje czas wszystkich bram")
+        nbad = sum(self.bad.values())
+        for what, k in self.bad.items():
+            print(f"  {what:<24} {k:>10}")
+        for s in self.shown:
+            print("  ! " + s)
+        if self.crashes:
+            print(f"  {'awarie (CRASH)':<24} {self.crashes:>10}  "
+                  f"(nie naruszenie)")
+        print("OK – niezmienniki zachowane" if not nbad else
+              f"NARUSZENIA: {nbad}")
+        if not total:
+            return
+        print(f"\nczas w tunelu wg zajętości [{unit}, % przebiegu]:")
+        print(f"  {'k':>3} {'A':>14} {'B':>14}")
+        for k in range(self.hist.shape[1]):
+            a, b = self.hist[0, k], self.hist[1, k]
+            print(f"  {k:>3} {a:>9.3f} {a / total:>4.0%} {b:>9.3f} {b / total:>4.0%}")
+        levels = np.arange(self.hist.shape[1])
+        mean = (self.hist @ levels).sum() / total
+        # przy jednym kierunku naraz pusty w A lub w B jest zawsze, więc
+        # pusty w obu = czas(A pusty) + czas(B pusty) − całość
+        idle = max(self.hist[0, 0] + self.hist[1, 0] - total, 0)
+        busy = total - idle
+        print(f"średnia zajętość: {mean:.2f} ({mean / self.Y:.0%} Y), "
+              f"gdy niepusty: {mean * total / busy if busy else 0:.2f} "
+              f"({mean * total / busy / self.Y if busy else 0:.0%} Y), "
+              f"pusty przez {idle / total:.0%}, maks. {self.max_occ}")
+        if self.switches:
+            fmt = (lambda x: f"{x:.0f}") if self.by_clock else (lambda x: f"{x * 1e3:.2f} ms")
+            print(f"zmiany kierunku: {self.switches}, przerwa śr. "
+                  f"{fmt(self.gap_sum / self.switches)}, maks. {fmt(self.gap_max)}"
+                  + ("" if self.by_clock else
+                     f", p50 ≤ {fmt(self.gap_pct(0.5))}, p95 ≤ {fmt(self.gap_pct(0.95))}"))
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("inputs", nargs="+",
+                   help="katalog z trace.<rank>.bin albo plik(i) z logiem _log")
+    p.add_argument("--Y", type=int, default=3, help="pojemność bramy")
+    p.add_argument("--order", choices=["time", "clock"], default="time",
+                   help="porządek scalania śladu (log zawsze wg zegara)")
+    p.add_argument("--series", metavar="PLIK",
+                   help="zapisz średnią zajętość A/B w przedziałach do CSV")
+    p.add_argument("--bin", type=float, default=0.1,
+                   help="szerokość przedziału --series [s albo takty zegara]")
+    p.add_argument("--mem", type=int, default=MEM_MB,
+                   help="budżet pamięci na bufory czytników [MB]")
+    args = p.parse_args()
+
+    tmp = None
+    if len(args.inputs) == 1 and os.path.isdir(args.inputs[0]):
+        paths = files(args.inputs[0])
+        by_clock = args.order == "clock"
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        from_log(args.inputs, tmp.name)
+        paths = files(tmp.name)
+        by_clock = True
+    if not paths:
+        p.error("brak zdarzeń na wejściu")
+
+    ranks = [int(os.path.basename(x).split(".")[1]) for x in paths]
+    ch = Checker(args.Y, max(ranks) + 1, by_clock,
+                 args.bin if args.series else None)
+    for batch in merged(paths, by_clock, args.mem):
+        ch.feed(batch)
+    ch.finish()
+    ch.report()
+    if args.series:
+        np.savetxt(args.series, ch.series(), fmt="%.6f", delimiter=",",
+                   header="t,A,B", comments="")
+    if tmp:
+        tmp.cleanup()
+    sys.exit(1 if sum(ch.bad.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Scalanie śladów z gate.py --trace i eksport do Chrome / Perfetto.
+
+    mpiexec -n 4 python3 gate.py --silent --trace slad
+    python3 trace_merge.py slad --text                # wg (zegar Lamporta, pid)
+    python3 trace_merge.py slad --chrome slad.json    # ui.perfetto.dev
+
+W eksporcie każdy badacz to osobny wątek z plastrami „czeka X” (WANT →
+ENTER) i „tunel X” (ENTER → LEAVE).  Badacz to (rank, peer), jak
+w trace_check: --algorithm async ma kilku badaczy na rank (slot w peer),
+--algorithm multi – jednego na bramę; ich wątki leżą pod wątkiem ranka,
+który dostaje komunikaty i zmiany kierunku.  Komunikaty to strzałki od
+SEND do RECV – k-ty wysłany rekord danego typu od a do b paruje się
+z k-tym odebranym (jeden tag = kanał FIFO).  Licznik „tunel” pokazuje,
+ilu badaczy jest w tunelu w kierunku A i B (przy wielu bramach – licznik
+na bramę).  Oś czasu to zegar ścienny
+względem pierwszego zdarzenia (na wielu węzłach zależy od synchronizacji
+zegarów; porządek --text opiera się tylko na zegarze Lamporta).
+"""
+
+import argparse, json
+from collections import defaultdict
+
+from gate_trace import Ev, DIR_NAME, files, read
+from gate_types import MType
+
+
+def load(dir_):
+    return [e for path in files(dir_) for e in read(path)]
+
+
+def describe(e):
+    t, clock, rank, kind, d, mtype, peer, gate = e
+    s = f"[{rank}] [t{clock:06d}] {Ev(kind).name:<5}"
+    if gate:
+        s += f" brama {gate}"
+    if d >= 0:
+        s += f" {DIR_NAME[d]}"
+    if mtype >= 0:
+        s += f" {MType(mtype).name}"
+    if peer >= 0:
+        s += (" -> " if kind == Ev.SEND else " <- ") + str(peer)
+    return s
+
+
+def to_chrome(evs):
+    t0 = min(e[0] for e in evs)
+    def us(t):
+        return round((t - t0) * 1e6, 1)
+
+    # tid: rank r to r·stride, jego badacz (r, peer) – r·stride + peer + 1
+    gate_evs = (Ev.WANT, Ev.ENTER, Ev.LEAVE, Ev.CRASH)
+    who = {(e[2], e[6]) for e in evs if e[3] in gate_evs}
+    stride = max([peer for _, peer in who] + [-1]) + 2
+    multi = any(e[7] for e in evs)
+    def tid(r, peer=-1):
+        return r * stride + peer + 1
+
+    names = {tid(r): f"rank {r}" for r in {e[2] for e in evs}}
+    for r, peer in who:
+        if peer >= 0:
+            names[tid(r, peer)] = (f"rank {r} {'brama' if multi else 'badacz'}"
+                                   f" {peer}")
+    out = [{"ph": "M", "name": "thread_name", "pid": 0, "tid": k,
+            "args": {"name": names[k]}} for k in sorted(names)]
+    want, inside = {}, {}
+    occ = defaultdict(lambda: {"A": 0, "B": 0})
+    sends, recvs = defaultdict(list), defaultdict(list)
+
+    def counter(t, gate):
+        out.append({"ph": "C", "name": f"tunel {gate}" if multi else "tunel",
+                    "pid": 0, "ts": us(t), "args": dict(occ[gate])})
+
+    for t, clock, r, kind, d, mtype, peer, gate in sorted(evs):
+        dn = DIR_NAME[d]
+        if kind == Ev.WANT:
+            want[r, peer] = t
+        elif kind == Ev.ENTER:
+            if (r, peer) in want:
+                w = want.pop((r, peer))
+                out.append({"ph": "X", "name": f"czeka {dn}", "cat": "gate",
+                            "pid": 0, "tid": tid(r, peer), "ts": us(w),
+                            "dur": us(t) - us(w)})
+            inside[r, peer] = t
+            occ[gate][dn] += 1
+            counter(t, gate)
+        elif kind in (Ev.LEAVE, Ev.CRASH) and (r, peer) in inside:
+            # CRASH (--fault crash) kończy pobyt w tunelu jak LEAVE
+            t_in = inside.pop((r, peer))
+            name = f"tunel {dn}" + (" (awaria)" if kind == Ev.CRASH else "")
+            out.append({"ph": "X", "name": name, "cat": "gate",
+                        "pid": 0, "tid": tid(r, peer), "ts": us(t_in),
+                        "dur": us(t) - us(t_in), "args": {"clock": clock}})
+            occ[gate][dn] -= 1
+            counter(t, gate)
+        elif kind == Ev.FLIP:
+            out.append({"ph": "i", "name": f"brama {gate} → {dn}" if multi
+                        else f"brama → {dn}", "s": "t",
+                        "pid": 0, "tid": tid(r), "ts": us(t)})
+        elif kind == Ev.SEND:
+            sends[(r, peer, mtype)].append((t, clock))
+        elif kind == Ev.RECV:
+            recvs[(peer, r, mtype)].append((t, clock))
+
+    # strzałki: do plastra SEND u nadawcy i RECV u odbiorcy
+    flow = 0
+    for (src, dst, mtype), sent in sends.items():
+        name = MType(mtype).name
+        for (ts, cs), (tr, cr) in zip(sent, recvs.get((src, dst, mtype), [])):
+            flow += 1
+            out += [
+                {"ph": "X", "name": name, "cat": "msg", "pid": 0,
+                 "tid": tid(src), "ts": us(ts), "dur": 1,
+                 "args": {"clock": cs, "to": dst}},
+                {"ph": "s", "name": name, "cat": "msg", "id": flow,
+                 "pid": 0, "tid": tid(src), "ts": us(ts)},
+                {"ph": "X", "name": name, "cat": "msg", "pid": 0,
+                 "tid": tid(dst), "ts": us(tr), "dur": 1,
+                 "args": {"clock": cr, "from": src}},
+                {"ph": "f", "bp": "e", "name": name, "cat": "msg", "id": flow,
+                 "pid": 0, "tid": tid(dst), "ts": us(tr)},
+            ]
+    return {"traceEvents": out, "displayTimeUnit": "ms"}
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("dir", help="katalog z plikami trace.<rank>.bin")
+    p.add_argument("--text", action="store_true",
+                   help="wypisz scalone zdarzenia wg (zegar Lamporta, pid)")
+    p.add_argument("--chrome", metavar="PLIK",
+                   help="zapisz ślad w formacie Chrome / Perfetto (JSON)")
+    args = p.parse_args()
+
+    evs = load(args.dir)
+    if not evs:
+        p.error(f"brak zdarzeń w {args.dir}")
+    if args.text:
+        for e in sorted(evs, key=lambda e: (e[1], e[2], e[0])):
+            print(describe(e))
+    if args.chrome:
+        with open(args.chrome, "w") as f:
+            json.dump(to_chrome(evs), f)
+    print(f"zdarzeń: {len(evs)}, ranków: {len({e[2] for e in evs})}")
+
+
+if __name__ == "__main__":
+    main()